@@ -0,0 +1,198 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Asyncio facade of the instance_ha proxy.
+
+The proxy of openstacksdk is blocking, so each call is run in a thread of
+the default executor of the event loop. A semaphore bounds the number of
+calls in flight, so that thousands of coroutines can share one client
+without flooding the API::
+
+    conn = openstack.connect(cloud='mycloud')
+    client = aio.AsyncHAClient(conn.instance_ha)
+    async for segment in client.segments():
+        async for host in client.hosts(segment.uuid):
+            ...
+    notifications = await client.gather(client.get_notification, uuids)
+"""
+
+import asyncio
+import itertools
+
+from masakariclient.common import executor as masakariclient_executor
+import masakariclient.common.utils as masakariclient_utils
+
+# Number of items of a listing fetched by a single thread hop
+DEFAULT_CHUNK_SIZE = 100
+
+
+class AsyncHAClient(object):
+    """Asyncio wrapper of an instance_ha proxy."""
+
+    def __init__(self, proxy,
+                 concurrency=masakariclient_executor.DEFAULT_CONCURRENCY,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        """Create a client.
+
+        :param proxy: The instance_ha proxy of an openstacksdk connection
+        :param concurrency: Maximum number of API calls in flight
+        :param chunk_size: Number of items of a listing fetched at once
+        """
+        self.proxy = proxy
+        self.concurrency = max(1, concurrency)
+        self.chunk_size = chunk_size
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def call(self, func, *args, **kwargs):
+        """Run a blocking call in a thread once a slot is available."""
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def _iterate(self, func, *args, **query):
+        # The listings are paginated lazily by the proxy, so the generator
+        # is advanced a chunk at a time in a thread.
+        items = await self.call(lambda: iter(func(*args, **query)))
+        while True:
+            chunk = await self.call(
+                lambda: list(itertools.islice(items, self.chunk_size)))
+            for item in chunk:
+                yield item
+            if len(chunk) < self.chunk_size:
+                return
+
+    # Segments
+
+    def segments(self, **query):
+        """Return an async iterator of the segments."""
+        return self._iterate(self.proxy.segments, **query)
+
+    async def get_segment(self, *args, **kwargs):
+        """Get a segment."""
+        return await self.call(self.proxy.get_segment, *args, **kwargs)
+
+    async def create_segment(self, **attrs):
+        """Create a segment."""
+        return await self.call(self.proxy.create_segment, **attrs)
+
+    async def update_segment(self, *args, **kwargs):
+        """Update a segment."""
+        return await self.call(self.proxy.update_segment, *args, **kwargs)
+
+    async def delete_segment(self, *args, **kwargs):
+        """Delete a segment."""
+        return await self.call(self.proxy.delete_segment, *args, **kwargs)
+
+    # Hosts
+
+    def hosts(self, *args, **query):
+        """Return an async iterator of the hosts of a segment."""
+        return self._iterate(self.proxy.hosts, *args, **query)
+
+    async def get_host(self, *args, **kwargs):
+        """Get a host."""
+        return await self.call(self.proxy.get_host, *args, **kwargs)
+
+    async def create_host(self, *args, **kwargs):
+        """Create a host."""
+        return await self.call(self.proxy.create_host, *args, **kwargs)
+
+    async def update_host(self, *args, **kwargs):
+        """Update a host."""
+        return await self.call(self.proxy.update_host, *args, **kwargs)
+
+    async def delete_host(self, *args, **kwargs):
+        """Delete a host."""
+        return await self.call(self.proxy.delete_host, *args, **kwargs)
+
+    # Notifications
+
+    def notifications(self, **query):
+        """Return an async iterator of the notifications."""
+        return self._iterate(self.proxy.notifications, **query)
+
+    async def get_notification(self, *args, **kwargs):
+        """Get a notification."""
+        return await self.call(self.proxy.get_notification, *args, **kwargs)
+
+    async def create_notification(self, **attrs):
+        """Create a notification."""
+        return await self.call(self.proxy.create_notification, **attrs)
+
+    # VM moves
+
+    def vmoves(self, *args, **query):
+        """Return an async iterator of the VM moves of a notification."""
+        return self._iterate(self.proxy.vmoves, *args, **query)
+
+    async def get_vmove(self, *args, **kwargs):
+        """Get a VM move."""
+        return await self.call(self.proxy.get_vmove, *args, **kwargs)
+
+    # Helpers
+
+    async def get_uuids_by_name(self, names, segment=None):
+        """Resolve names of segments, or of hosts of a segment, to uuids.
+
+        See :func:`masakariclient.common.utils.get_uuids_by_name`.
+        """
+        # The resolution lists the resources once, outside the semaphore
+        # which would otherwise be held for the whole listing.
+        return await asyncio.to_thread(masakariclient_utils.get_uuids_by_name,
+                                       self.proxy, names, segment=segment)
+
+    async def gather(self, func, items, return_exceptions=False):
+        """Call a coroutine function for each item concurrently.
+
+        :param func: A coroutine function taking a single item, typically a
+                     method of this client
+        :param items: An iterable of items
+        :param return_exceptions: Return the exceptions instead of raising
+                                  the first one
+        :return: The list of the results, in the order of the items
+        """
+        return await asyncio.gather(*(func(item) for item in items),
+                                    return_exceptions=return_exceptions)
+
+    async def map(self, func, items):
+        """Call a coroutine function for each item concurrently.
+
+        Unlike :meth:`gather`, at most ``concurrency`` tasks exist at any
+        time, so arbitrarily long streams of items are processed with
+        constant memory.
+
+        :param func: A coroutine function taking a single item
+        :param items: An iterable of items
+        :return: An async iterator of (item, result, error) tuples in the
+                 completion order, error being the exception raised or None
+        """
+        items = iter(items)
+        pending = {}
+
+        def _fill():
+            for item in itertools.islice(items,
+                                         self.concurrency - len(pending)):
+                pending[asyncio.ensure_future(func(item))] = item
+
+        _fill()
+        try:
+            while pending:
+                done, _pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    item = pending.pop(task)
+                    error = task.exception()
+                    result = None if error is not None else task.result()
+                    _fill()
+                    yield item, result, error
+        finally:
+            for task in pending:
+                task.cancel()
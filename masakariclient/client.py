@@ -0,0 +1,289 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""High-level Python API of the Masakari client.
+
+:class:`HAClient` offers the name resolution, listings and bulk operations
+of the ``openstack segment`` and ``openstack notification`` commands to
+Python programs, without the overhead of a CLI process per operation::
+
+    conn = openstack.connect(cloud='mycloud')
+    client = HAClient.from_connection(conn, concurrency=20)
+    for attrs, host, error in client.create_hosts('segment-1', hosts):
+        ...
+"""
+
+import time
+
+from masakariclient.common import exception as exc
+from masakariclient.common import executor as masakariclient_executor
+from masakariclient.common.i18n import _
+import masakariclient.common.utils as masakariclient_utils
+
+
+class HAClient(object):
+    """High-level client of the Masakari API.
+
+    The bulk operations run their API calls in parallel through a
+    :class:`~masakariclient.common.executor.BulkExecutor`, and return a
+    generator of (item, result, error) tuples, error being the exception
+    raised for the item or None.
+    """
+
+    def __init__(self, proxy,
+                 concurrency=masakariclient_executor.DEFAULT_CONCURRENCY,
+                 deadline=None):
+        """Create a client.
+
+        :param proxy: The instance_ha proxy of an openstacksdk connection
+        :param concurrency: Maximum number of API calls made in parallel by
+                            the bulk operations
+        :param deadline: Seconds after which the calls of a bulk operation
+                         fail, default no deadline
+        """
+        self.proxy = proxy
+        self.concurrency = concurrency
+        self.deadline = deadline
+
+    @classmethod
+    def from_connection(cls, conn, **kwargs):
+        """Create a client from an openstacksdk connection."""
+        return cls(conn.instance_ha, **kwargs)
+
+    def _executor(self, **kwargs):
+        return masakariclient_executor.BulkExecutor(
+            concurrency=self.concurrency, deadline=self.deadline, **kwargs)
+
+    def supports_microversion(self, version):
+        """Return whether the proxy uses at least a microversion."""
+        return masakariclient_utils.supports_microversion(self.proxy, version)
+
+    # Name resolution
+
+    def resolve_segment(self, segment):
+        """Return the uuid of a segment given by name or ID."""
+        return self.resolve_segments([segment])[segment]
+
+    def resolve_segments(self, segments):
+        """Return a dict mapping segment names or IDs to uuids.
+
+        The segments are listed at most once.
+        """
+        return masakariclient_utils.get_uuids_by_name(self.proxy, segments)
+
+    def resolve_hosts(self, segment, hosts):
+        """Return a dict mapping the names or IDs of hosts to uuids.
+
+        :param segment: Name or ID of the segment of the hosts
+        :param hosts: Names or IDs of the hosts
+        """
+        return masakariclient_utils.get_uuids_by_name(
+            self.proxy, hosts, segment=self.resolve_segment(segment))
+
+    # Listings
+
+    def segments(self, limit=None, marker=None, sort=None, filters=None):
+        """Return a generator of the segments.
+
+        :param sort: Comma-separated list of keys, each optionally followed
+                     by a sort direction, e.g. "name:asc,created_at"
+        :param filters: A list of "key=value" strings
+        """
+        return self.proxy.segments(**masakariclient_utils.format_queries(
+            limit=limit, marker=marker, sort=sort, filters=filters))
+
+    def hosts(self, segment, limit=None, marker=None, sort=None,
+              filters=None):
+        """Return a generator of the hosts of a segment, by name or ID."""
+        return self.proxy.hosts(
+            self.resolve_segment(segment),
+            **masakariclient_utils.format_queries(
+                limit=limit, marker=marker, sort=sort, filters=filters))
+
+    def all_hosts(self, sort=None, filters=None):
+        """Return a generator of the hosts of all segments.
+
+        The hosts of the segments are listed in parallel.
+
+        :return: A generator of (segment, host) tuples
+        """
+        queries = masakariclient_utils.format_queries(sort=sort,
+                                                      filters=filters)
+
+        def _hosts(segment):
+            return list(self.proxy.hosts(segment.uuid, **queries))
+
+        for segment, hosts in self._executor().run(_hosts,
+                                                   self.proxy.segments()):
+            for host in hosts:
+                yield segment, host
+
+    def notifications(self, limit=None, marker=None, sort=None,
+                      filters=None):
+        """Return a generator of the notifications."""
+        return self.proxy.notifications(**masakariclient_utils.format_queries(
+            limit=limit, marker=marker, sort=sort, filters=filters))
+
+    # Bulk operations on segments
+
+    def create_segments(self, segments):
+        """Create segments in parallel.
+
+        ``is_enabled`` is dropped when the microversion does not support it.
+
+        :param segments: An iterable of dicts of segment attributes
+        """
+        with_enabled = self.supports_microversion('1.2')
+
+        def _create(attrs):
+            attrs = masakariclient_utils.remove_unspecified_items(dict(attrs))
+            if not with_enabled:
+                attrs.pop('is_enabled', None)
+            return self.proxy.create_segment(**attrs)
+
+        return self._executor().map(_create, segments, idempotent=False)
+
+    def update_segments(self, updates):
+        """Update segments in parallel.
+
+        :param updates: An iterable of (segment name or ID, dict of
+                        attributes) tuples
+        """
+        updates = list(updates)
+        uuids = self.resolve_segments([segment for segment, _attrs in updates])
+
+        def _update(update):
+            segment, attrs = update
+            return self.proxy.update_segment(segment=uuids[segment], **attrs)
+
+        return self._executor().map(_update, updates)
+
+    def delete_segments(self, segments):
+        """Delete segments given by name or ID in parallel."""
+        segments = list(segments)
+        uuids = self.resolve_segments(segments)
+
+        def _delete(segment):
+            self.proxy.delete_segment(uuids[segment], False)
+
+        return self._executor().map(_delete, segments, idempotent=False)
+
+    # Bulk operations on hosts
+
+    def create_hosts(self, segment, hosts):
+        """Create hosts in a segment in parallel.
+
+        :param segment: Name or ID of the segment
+        :param hosts: An iterable of dicts of host attributes
+        """
+        segment_id = self.resolve_segment(segment)
+
+        def _create(attrs):
+            return self.proxy.create_host(
+                segment_id=segment_id,
+                **masakariclient_utils.remove_unspecified_items(dict(attrs)))
+
+        return self._executor().map(_create, hosts, idempotent=False)
+
+    def update_hosts(self, segment, updates):
+        """Update hosts of a segment in parallel.
+
+        :param segment: Name or ID of the segment
+        :param updates: An iterable of (host name or ID, dict of attributes)
+                        tuples
+        """
+        updates = list(updates)
+        segment_id = self.resolve_segment(segment)
+        uuids = masakariclient_utils.get_uuids_by_name(
+            self.proxy, [host for host, _attrs in updates],
+            segment=segment_id)
+
+        def _update(update):
+            host, attrs = update
+            return self.proxy.update_host(uuids[host], segment_id=segment_id,
+                                          **attrs)
+
+        return self._executor().map(_update, updates)
+
+    def delete_hosts(self, segment, hosts, ignore_missing=False):
+        """Delete hosts of a segment given by name or ID in parallel.
+
+        Masakari refuses to delete a host while a recovery is using it, so
+        the conflicts are retried.
+        """
+        hosts = list(hosts)
+        segment_id = self.resolve_segment(segment)
+        uuids = masakariclient_utils.get_uuids_by_name(
+            self.proxy, hosts, segment=segment_id)
+
+        def _delete(host):
+            self.proxy.delete_host(uuids[host], segment_id=segment_id,
+                                   ignore_missing=ignore_missing)
+
+        return self._executor(retry_on=(409,), backoff=1).map(
+            _delete, hosts, idempotent=ignore_missing)
+
+    # Notifications
+
+    def create_notifications(self, notifications):
+        """Create notifications in parallel.
+
+        :param notifications: An iterable of dicts of notification attributes
+        """
+        def _create(attrs):
+            return self.proxy.create_notification(**attrs)
+
+        return self._executor().map(_create, notifications,
+                                    idempotent=False)
+
+    def wait_for_notifications(self, notifications, interval=5, timeout=600):
+        """Wait until the recovery of notifications is over.
+
+        The notifications still in flight are fetched in parallel at each
+        poll.
+
+        :param notifications: UUIDs of the notifications
+        :param interval: Seconds between two polls
+        :param timeout: Maximum time to wait in seconds
+        :return: A dict mapping each uuid to the notification in its final
+                 status, e.g. finished, failed or ignored
+        :raises: :class:`~masakariclient.common.exception.DeadlineExceeded`
+                 when the timeout expires
+        """
+        in_flight = list(notifications)
+        finished = {}
+        deadline = time.monotonic() + timeout
+        while True:
+            pending = []
+            for uuid, notification in self._executor().run(
+                    self.proxy.get_notification, in_flight):
+                if (notification.status in
+                        masakariclient_utils.IN_FLIGHT_NOTIFICATION_STATUSES):
+                    pending.append(uuid)
+                else:
+                    finished[uuid] = notification
+            in_flight = pending
+            if not in_flight:
+                return finished
+            if time.monotonic() + interval > deadline:
+                raise exc.DeadlineExceeded(
+                    _('Timed out waiting for the notifications %s.')
+                    % ', '.join(sorted(in_flight)))
+            time.sleep(interval)
+
+    def wait_for_notification(self, notification, interval=5, timeout=600):
+        """Wait until the recovery of a notification is over.
+
+        :return: The notification in its final status
+        """
+        return self.wait_for_notifications(
+            [notification], interval=interval, timeout=timeout)[notification]
@@ -0,0 +1,408 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local SQLite archive of the notifications and their VM moves.
+
+Masakari purges its old notifications, and the history queries paging
+through the API are slow. :func:`sync` copies the notifications generated
+since the last sync, along with the VM moves of the COMPUTE_HOST ones, to
+an SQLite database, which :class:`Archive` then queries locally.
+
+The high-water mark of a sync is the generated time of the oldest archived
+notification whose recovery is not over, or else of the newest one, so
+that the notifications still in flight are fetched again until they reach
+their final status.
+"""
+
+import logging
+import os
+import pathlib
+import sqlite3
+
+from oslo_serialization import jsonutils
+
+from masakariclient.common import exception as exc
+from masakariclient.common import executor as masakariclient_executor
+from masakariclient.common.i18n import _
+from masakariclient.common import rows as masakariclient_rows
+import masakariclient.common.utils as masakariclient_utils
+
+LOG = logging.getLogger(__name__)
+
+# Version of the schema, stored as the user_version of the database
+SCHEMA_VERSION = 1
+
+NOTIFICATION_COLUMNS = ('notification_uuid', 'generated_time', 'status',
+                        'type', 'source_host_uuid', 'payload', 'created_at',
+                        'updated_at')
+VMOVE_COLUMNS = ('uuid', 'notification_uuid', 'server_id', 'server_name',
+                 'source_host', 'dest_host', 'start_time', 'end_time',
+                 'type', 'status', 'message')
+
+# Notification columns the queries filter on with an exact match
+FILTER_COLUMNS = ('type', 'status', 'source_host_uuid')
+
+# Number of rows written between two commits of a sync
+BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    notification_uuid TEXT PRIMARY KEY,
+    generated_time TEXT,
+    status TEXT,
+    type TEXT,
+    source_host_uuid TEXT,
+    payload TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    vmoves_synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS notifications_generated_time
+    ON notifications (generated_time);
+CREATE INDEX IF NOT EXISTS notifications_source_host_uuid
+    ON notifications (source_host_uuid);
+CREATE INDEX IF NOT EXISTS notifications_status ON notifications (status);
+CREATE INDEX IF NOT EXISTS notifications_type ON notifications (type);
+CREATE TABLE IF NOT EXISTS vmoves (
+    uuid TEXT PRIMARY KEY,
+    notification_uuid TEXT NOT NULL,
+    server_id TEXT,
+    server_name TEXT,
+    source_host TEXT,
+    dest_host TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    type TEXT,
+    status TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS vmoves_notification_uuid
+    ON vmoves (notification_uuid);
+"""
+
+
+class Archive(object):
+    """SQLite archive of notifications and VM moves."""
+
+    def __init__(self, path, readonly=False):
+        """Open an archive, creating it unless it is opened read-only.
+
+        :param path: Path of the SQLite database
+        :param readonly: Open the database read-only, for the queries
+        """
+        self.path = path
+        try:
+            if readonly:
+                self._db = sqlite3.connect(
+                    pathlib.Path(os.path.abspath(path)).as_uri() +
+                    '?mode=ro', uri=True)
+            else:
+                self._db = sqlite3.connect(path)
+            version = self._db.execute('PRAGMA user_version').fetchone()[0]
+            if version > SCHEMA_VERSION:
+                self._db.close()
+                raise exc.CommandError(
+                    _('The archive %(path)s has the schema version '
+                      '%(version)d, which is newer than the supported one.')
+                    % {'path': path, 'version': version})
+            if readonly:
+                if version < SCHEMA_VERSION:
+                    self._db.close()
+                    raise exc.CommandError(
+                        _('%s is not an archive written by a sync.') % path)
+            else:
+                self._db.executescript(_SCHEMA)
+                self._db.execute('PRAGMA user_version = %d'
+                                 % SCHEMA_VERSION)
+        except sqlite3.Error as ex:
+            raise exc.CommandError(_('Unable to open archive %(path)s: '
+                                     '%(error)s')
+                                   % {'path': path, 'error': ex})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+    def commit(self):
+        self._db.commit()
+
+    def high_water_mark(self):
+        """Return the generated time the next sync starts from, or None."""
+        statuses = masakariclient_utils.IN_FLIGHT_NOTIFICATION_STATUSES
+        # Only the placeholders of the statuses are interpolated
+        oldest_in_flight, = self._db.execute(
+            'SELECT MIN(generated_time) FROM notifications '  # nosec B608
+            'WHERE status IN (%s)' % ', '.join('?' * len(statuses)),
+            statuses).fetchone()
+        if oldest_in_flight is not None:
+            return oldest_in_flight
+        newest, = self._db.execute(
+            'SELECT MAX(generated_time) FROM notifications').fetchone()
+        return newest
+
+    def add_notification(self, row):
+        """Insert or update a notification.
+
+        The VM moves of a notification are fetched again when it is in
+        flight, or was at the time of the last sync, since they may have
+        changed since then.
+
+        :param row: A tuple of the :data:`NOTIFICATION_COLUMNS`
+        :return: Whether the VM moves of the notification are to be fetched
+        """
+        values = list(row)
+        payload = NOTIFICATION_COLUMNS.index('payload')
+        if values[payload] is not None:
+            values[payload] = jsonutils.dumps(values[payload])
+        statuses = masakariclient_utils.IN_FLIGHT_NOTIFICATION_STATUSES
+        in_flight = ', '.join('?' * len(statuses))
+        # Only the constant columns and the placeholders are interpolated
+        self._db.execute(
+            'INSERT INTO notifications (%s) VALUES (%s) '  # nosec B608
+            'ON CONFLICT (notification_uuid) DO UPDATE SET %s, '
+            'vmoves_synced = CASE WHEN excluded.status IN (%s) OR '
+            'notifications.status IN (%s) THEN 0 ELSE vmoves_synced END'
+            % (', '.join(NOTIFICATION_COLUMNS),
+               ', '.join('?' * len(NOTIFICATION_COLUMNS)),
+               ', '.join('%s = excluded.%s' % (column, column)
+                         for column in NOTIFICATION_COLUMNS
+                         if column != 'notification_uuid'),
+               in_flight, in_flight),
+            values + list(statuses) * 2)
+        synced, = self._db.execute(
+            'SELECT vmoves_synced FROM notifications '
+            'WHERE notification_uuid = ?', (row[0],)).fetchone()
+        return not synced
+
+    def pending_vmoves(self):
+        """Return the COMPUTE_HOST notifications missing their VM moves."""
+        return [uuid for uuid, in self._db.execute(
+            "SELECT notification_uuid FROM notifications "
+            "WHERE type = 'COMPUTE_HOST' AND vmoves_synced = 0 "
+            "ORDER BY generated_time")]
+
+    def set_vmoves(self, notification_uuid, rows):
+        """Replace the VM moves of a notification.
+
+        :param rows: Tuples of the :data:`VMOVE_COLUMNS` but
+                     notification_uuid
+        :return: The number of VM moves
+        """
+        columns = [column for column in VMOVE_COLUMNS
+                   if column != 'notification_uuid']
+        self._db.execute('DELETE FROM vmoves WHERE notification_uuid = ?',
+                         (notification_uuid,))
+        cursor = self._db.executemany(
+            'INSERT OR REPLACE INTO vmoves (notification_uuid, %s) '
+            'VALUES (?, %s)' % (', '.join(columns),
+                                ', '.join('?' * len(columns))),
+            ((notification_uuid,) + tuple(row) for row in rows))
+        self._db.execute('UPDATE notifications SET vmoves_synced = 1 '
+                         'WHERE notification_uuid = ?', (notification_uuid,))
+        return max(cursor.rowcount, 0)
+
+    def counts(self):
+        """Return the numbers of archived notifications and VM moves."""
+        notifications, = self._db.execute(
+            'SELECT COUNT(*) FROM notifications').fetchone()
+        vmoves, = self._db.execute('SELECT COUNT(*) FROM vmoves').fetchone()
+        return notifications, vmoves
+
+    def query_notifications(self, columns, filters=None, sort=None,
+                            limit=None, formatters=None):
+        """Return the archived notifications matching filters.
+
+        :param columns: The :data:`NOTIFICATION_COLUMNS` of each row
+        :param filters: A dict of filters, see :func:`_where`
+        :param sort: A list of (column, direction) pairs, default the
+                     newest notifications first
+        :param limit: Maximum number of rows
+        :param formatters: A dict mapping columns to the
+                           :class:`cliff.columns.FormattableColumn` classes
+                           wrapping their values
+        :return: An iterator of tuples
+        """
+        rows = self._query(
+            NOTIFICATION_COLUMNS, columns, 'notifications AS n', 'n',
+            filters, sort, limit, default_order='n.generated_time DESC')
+        formatters = formatters or {}
+        converters = []
+        for column in columns:
+            formatter = formatters.get(column)
+            if column == 'payload':
+                converters.append(_loads if formatter is None else
+                                  lambda value, f=formatter: f(_loads(value)))
+            else:
+                converters.append(formatter)
+        if not any(converters):
+            return rows
+        return (tuple(value if convert is None else convert(value)
+                      for convert, value in zip(converters, row))
+                for row in rows)
+
+    def query_vmoves(self, columns, filters=None, sort=None, limit=None):
+        """Return the VM moves of the archived notifications matching filters.
+
+        :param columns: The :data:`VMOVE_COLUMNS` of each row
+        :param filters: A dict of filters on the notifications, see
+                        :func:`_where`
+        :param sort: A list of (column, direction) pairs, default the moves
+                     of the newest notifications first
+        :param limit: Maximum number of rows
+        :return: An iterator of tuples
+        """
+        return self._query(
+            VMOVE_COLUMNS, columns,
+            'vmoves AS t JOIN notifications AS n '
+            'ON t.notification_uuid = n.notification_uuid', 't',
+            filters, sort, limit,
+            default_order='n.generated_time DESC, t.start_time ASC')
+
+    def _query(self, valid_columns, columns, source, alias, filters, sort,
+               limit, default_order):
+        # The columns are interpolated in the statement, only known ones
+        # are accepted.
+        for column in list(columns) + [key for key, _dir in sort or ()]:
+            if column not in valid_columns:
+                raise exc.CommandError(
+                    _('Unknown field: %(column)s. The valid fields are: '
+                      '%(valid)s.') % {'column': column,
+                                       'valid': ', '.join(valid_columns)})
+        where, params = _where(filters or {})
+        # The values are bound as placeholders and the columns are
+        # whitelisted above.
+        sql = 'SELECT %s FROM %s' % (  # nosec B608
+            ', '.join('%s.%s' % (alias, column) for column in columns),
+            source)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY ' + (', '.join(
+            '%s.%s %s' % (alias, key,
+                          'DESC' if direction == 'desc' else 'ASC')
+            for key, direction in sort or ()) or default_order)
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        return iter(self._db.execute(sql, params))
+
+
+def _loads(value):
+    return None if value is None else jsonutils.loads(value)
+
+
+def _where(filters):
+    """Return the WHERE clauses and parameters of notification filters.
+
+    :param filters: A dict with optional ``type``, ``status`` and
+                    ``source_host_uuid`` lists of values, and
+                    ``generated_since`` and ``generated_until`` times
+    """
+    clauses = []
+    params = []
+    for column in FILTER_COLUMNS:
+        values = filters.get(column)
+        if values:
+            clauses.append('n.%s IN (%s)'
+                           % (column, ', '.join('?' * len(values))))
+            params.extend(values)
+    if filters.get('generated_since'):
+        clauses.append('n.generated_time >= ?')
+        params.append(filters['generated_since'])
+    if filters.get('generated_until'):
+        clauses.append('n.generated_time < ?')
+        params.append(filters['generated_until'])
+    return clauses, params
+
+
+def sync(manager, archive, executor=None):
+    """Copy the notifications generated since the last sync to an archive.
+
+    The notifications are listed in the order of their generated time and
+    committed by batches, so an interrupted sync resumes where it stopped.
+    The VM moves of the COMPUTE_HOST notifications are fetched in parallel
+    while the listing goes on, and fetched again by the next sync when it
+    failed.
+
+    :param manager: The instance_ha proxy
+    :param archive: The :class:`Archive` to write to
+    :param executor: The BulkExecutor fetching the VM moves
+    :return: A dict of the high-water mark the sync started from and the
+             numbers of notifications and VM moves written, and of VM move
+             listings which failed
+    """
+    if executor is None:
+        executor = masakariclient_executor.BulkExecutor()
+    since = archive.high_water_mark()
+    stats = {'generated_since': since, 'notifications': 0, 'vmoves': 0,
+             'vmove_errors': 0}
+    writes = [0]
+
+    def _written(count):
+        writes[0] += count
+        if writes[0] >= BATCH_SIZE:
+            archive.commit()
+            writes[0] = 0
+
+    query = {'sort_key': ['generated_time'], 'sort_dir': ['asc']}
+    if since is not None:
+        query['generated_since'] = since
+    notifications = masakariclient_rows.notifications(
+        manager, NOTIFICATION_COLUMNS, **query)
+    type_index = NOTIFICATION_COLUMNS.index('type')
+
+    def _ingest():
+        for row in notifications:
+            pending = archive.add_notification(row)
+            stats['notifications'] += 1
+            _written(1)
+            if pending and row[type_index] == 'COMPUTE_HOST':
+                yield row[0]
+
+    if not masakariclient_utils.supports_microversion(manager, '1.3'):
+        # The VM moves are only listed from the microversion 1.3, they are
+        # fetched by a later sync using it.
+        for _uuid in _ingest():
+            pass
+        archive.commit()
+        return stats
+
+    vmove_columns = [column for column in VMOVE_COLUMNS
+                     if column != 'notification_uuid']
+
+    def _vmoves(notification_uuid):
+        return list(masakariclient_rows.vmoves(manager, notification_uuid,
+                                               vmove_columns))
+
+    def _uuids():
+        pending = archive.pending_vmoves()
+        yield from pending
+        pending = set(pending)
+        for uuid in _ingest():
+            if uuid not in pending:
+                yield uuid
+
+    for uuid, vmoves, error in executor.map(_vmoves, _uuids()):
+        if error is not None:
+            LOG.warning('Failed to list the VM moves of notification '
+                        '%(uuid)s: %(error)s', {'uuid': uuid, 'error': error})
+            stats['vmove_errors'] += 1
+            continue
+        stats['vmoves'] += archive.set_vmoves(uuid, vmoves)
+        _written(len(vmoves) + 1)
+    archive.commit()
+    return stats
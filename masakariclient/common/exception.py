@@ -26,6 +26,14 @@ class CommandError(BaseException):
     """Invalid usage of CLI."""
 
 
+class CircuitOpen(BaseException):
+    """Too many consecutive API calls failed, the call was not made."""
+
+
+class DeadlineExceeded(BaseException):
+    """The deadline of the operation is exceeded, the call was not made."""
+
+
 class UnsupportedVersion(Exception):
     """User is trying to use an unsupported version of the API."""
     pass
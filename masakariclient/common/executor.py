@@ -0,0 +1,322 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Executor of the parallel API calls made by the bulk operations."""
+
+from concurrent import futures
+import email.utils
+import logging
+import random
+import threading
+import time
+
+from keystoneauth1 import exceptions as ks_exc
+
+from masakariclient.common import exception as exc
+from masakariclient.common.i18n import _
+
+LOG = logging.getLogger(__name__)
+
+# Default maximum number of API calls issued in parallel
+DEFAULT_CONCURRENCY = 10
+
+# HTTP status codes of the calls which are retried
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# HTTP status codes telling that the API is overloaded, the request not
+# being processed, so that the calls which are not idempotent are retried
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def _get_status_code(ex):
+    status_code = getattr(ex, 'status_code', None)
+    if status_code is None:
+        status_code = getattr(ex, 'http_status', None)
+    return status_code
+
+
+def _get_retry_after(ex):
+    """Return the delay in seconds requested by a Retry-After header."""
+    response = getattr(ex, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class BulkExecutor(object):
+    """Run API calls in parallel with adaptive concurrency and retries.
+
+    The number of calls in flight follows an AIMD scheme: it grows by one
+    after each window of successful calls and is halved when the API
+    answers that it is overloaded. Failed calls are retried with an
+    exponential backoff with full jitter, honouring Retry-After up to the
+    maximum backoff. The calls which are not idempotent, e.g. the creations,
+    are only retried when the API tells that it did not process them, since
+    a gateway timeout or a lost connection may hide a success. After
+    ``failure_threshold`` consecutive persistent failures the circuit opens
+    and the calls fail fast for ``reset_timeout`` seconds. Once the
+    deadline is exceeded, the remaining calls fail fast too.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, retries=3,
+                 backoff=0.5, max_backoff=30, retry_on=(),
+                 failure_threshold=5, reset_timeout=30, deadline=None,
+                 adaptive=True):
+        """Create an executor.
+
+        :param concurrency: Maximum number of calls in flight
+        :param retries: Maximum number of retries of a call
+        :param backoff: Initial backoff delay in seconds
+        :param max_backoff: Maximum backoff delay in seconds
+        :param retry_on: Additional HTTP status codes to retry, e.g. 409
+        :param failure_threshold: Number of consecutive persistent failures
+                                  opening the circuit, None to disable
+        :param reset_timeout: Seconds before calls are tried again once the
+                              circuit is open
+        :param deadline: Seconds after which the remaining calls fail,
+                         default no deadline
+        :param adaptive: Adapt the number of calls in flight, otherwise
+                         always use the maximum
+        """
+        self.max_concurrency = max(1, concurrency)
+        self.limit = self.max_concurrency
+        if adaptive:
+            self.limit = max(1, self.max_concurrency // 2)
+        self.adaptive = adaptive
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_status_codes = set(RETRY_STATUS_CODES) | set(retry_on)
+        self.unprocessed_status_codes = (set(THROTTLE_STATUS_CODES) |
+                                         set(retry_on))
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._started = time.monotonic()
+        self._deadline = None
+        if deadline is not None:
+            self._deadline = self._started + deadline
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._successes = 0
+        self._last_decrease = 0
+        self.stats = dict.fromkeys(
+            ('calls', 'succeeded', 'failed', 'retries', 'throttled'), 0)
+
+    @classmethod
+    def from_args(cls, parsed_args, **kwargs):
+        """Create an executor from the options added by add_arguments."""
+        return cls(concurrency=parsed_args.concurrency,
+                   deadline=parsed_args.deadline, **kwargs)
+
+    def _check_call_allowed(self):
+        now = time.monotonic()
+        if self._deadline is not None and now > self._deadline:
+            raise exc.DeadlineExceeded()
+        with self._lock:
+            if (self._opened_at is not None and
+                    now - self._opened_at < self.reset_timeout):
+                raise exc.CircuitOpen()
+
+    def _on_success(self):
+        with self._lock:
+            self.stats['succeeded'] += 1
+            self._consecutive_failures = 0
+            self._opened_at = None
+            if self.adaptive and self.limit < self.max_concurrency:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+
+    def _on_throttle(self):
+        with self._lock:
+            self.stats['throttled'] += 1
+            now = time.monotonic()
+            # The calls in flight all see the overload, only react once.
+            if self.adaptive and now - self._last_decrease > self.backoff:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+                self._last_decrease = now
+
+    def _on_failure(self, persistent):
+        with self._lock:
+            self.stats['failed'] += 1
+            if not persistent:
+                return
+            self._consecutive_failures += 1
+            if (self.failure_threshold is not None and
+                    self._consecutive_failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+
+    def _get_delay(self, ex, attempt):
+        delay = _get_retry_after(ex)
+        if delay is None:
+            delay = random.uniform(  # nosec: not used for security
+                0, self.backoff * 2 ** attempt)
+        return min(self.max_backoff, delay)
+
+    def call(self, func, *args, idempotent=True, **kwargs):
+        """Call a function, retrying it when the API fails temporarily.
+
+        :param idempotent: Whether the function can be called again after a
+                           gateway error or a lost connection, which may
+                           hide a success. Set it to False for the creations
+                           and the deletions failing on missing resources.
+        :raises: The last exception raised by the function,
+                 :class:`~masakariclient.common.exception.CircuitOpen` or
+                 :class:`~masakariclient.common.exception.DeadlineExceeded`
+        """
+        attempt = 0
+        while True:
+            self._check_call_allowed()
+            with self._lock:
+                self.stats['calls'] += 1
+            try:
+                result = func(*args, **kwargs)
+            except Exception as ex:
+                status_code = _get_status_code(ex)
+                if status_code in THROTTLE_STATUS_CODES:
+                    self._on_throttle()
+                transient = (status_code in self.retry_status_codes or
+                             isinstance(ex, ks_exc.ConnectionError))
+                retryable = transient
+                if not idempotent:
+                    retryable = status_code in self.unprocessed_status_codes
+                if not retryable or attempt >= self.retries:
+                    self._on_failure(transient)
+                    raise
+                delay = self._get_delay(ex, attempt)
+                if (self._deadline is not None and
+                        time.monotonic() + delay > self._deadline):
+                    self._on_failure(transient)
+                    raise
+                LOG.debug('Retrying in %.2fs after error: %s', delay, ex)
+                with self._lock:
+                    self.stats['retries'] += 1
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+    def _capture(self, func, item, retry, idempotent):
+        try:
+            if retry:
+                return self.call(func, item, idempotent=idempotent), None
+            return func(item), None
+        except Exception as ex:
+            return None, ex
+
+    def map(self, func, items, ordered=False, retry=True, idempotent=True):
+        """Call a function for each item in parallel.
+
+        The items are consumed lazily and at most the current concurrency
+        limit of calls are queued at any time, so arbitrarily long streams
+        of items are processed with constant memory.
+
+        :param func: A callable taking a single item as argument
+        :param items: An iterable of items to process
+        :param ordered: Yield the results in the order of the items instead
+                        of the completion order
+        :param retry: Retry the function on temporary failures. Disable it
+                      when the function makes several API calls, each of
+                      them going through :meth:`call`.
+        :param idempotent: Whether the function is idempotent, see
+                           :meth:`call`
+        :return: A generator of (item, result, error) tuples, error being
+                 the exception raised by the last call or None
+        """
+        items = iter(items)
+        pool = futures.ThreadPoolExecutor(max_workers=self.max_concurrency)
+        pending = {}
+
+        def _fill():
+            while len(pending) < self.limit:
+                for item in items:
+                    job = pool.submit(self._capture, func, item, retry,
+                                      idempotent)
+                    pending[job] = item
+                    break
+                else:
+                    return
+
+        try:
+            _fill()
+            while pending:
+                if ordered:
+                    done = [next(iter(pending))]
+                else:
+                    done, _not_done = futures.wait(
+                        pending, return_when=futures.FIRST_COMPLETED)
+                for job in done:
+                    item = pending.pop(job)
+                    result, error = job.result()
+                    _fill()
+                    yield item, result, error
+        finally:
+            # Drop the calls which have not started yet if the caller
+            # stopped consuming results.
+            pool.shutdown(wait=True, cancel_futures=True)
+            LOG.info(self.report())
+
+    def run(self, func, items, ordered=False):
+        """Call a function for each item in parallel, stopping on errors.
+
+        :return: A generator of (item, result) tuples
+        :raises: The first exception raised by the function
+        """
+        for item, result, error in self.map(func, items, ordered=ordered):
+            if error is not None:
+                raise error
+            yield item, result
+
+    def report(self):
+        """Return a summary of the calls made and the throughput."""
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            stats = dict(self.stats, elapsed=elapsed, limit=self.limit,
+                         throughput=self.stats['succeeded'] / elapsed
+                         if elapsed else 0.0)
+        return (_('%(succeeded)d of %(calls)d calls succeeded in '
+                  '%(elapsed).2fs (%(throughput).1f calls/s, %(retries)d '
+                  'retries, %(throttled)d throttled, concurrency '
+                  '%(limit)d)') % stats)
+
+
+def add_arguments(parser):
+    """Add the options of the bulk operations to a command parser."""
+    parser.add_argument(
+        '--concurrency',
+        metavar='<concurrency>',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=_('Maximum number of API calls made in parallel. The number '
+               'of calls in flight adapts to the load of the API '
+               '(default: %d)') % DEFAULT_CONCURRENCY
+    )
+    parser.add_argument(
+        '--deadline',
+        metavar='<seconds>',
+        type=float,
+        help=_('Fail the API calls which are not done after <seconds>.')
+    )
+    return parser
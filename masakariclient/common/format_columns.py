@@ -0,0 +1,160 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Formattable columns of the notification details.
+
+The columns only wrap the raw values: they are rendered when, and if, the
+output formatter asks for them. The human formats (table, value, csv)
+show a one-line summary or JSON, the machine formats (json, yaml) always
+get the raw values, serialized once by the formatter itself. The json
+format of a listing is written row by row, as the rows are listed.
+"""
+
+from cliff import columns
+from cliff.formatters import json_format
+from oslo_serialization import jsonutils
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PAYLOAD_MODES = ('summary', 'full')
+
+
+def dumps(value):
+    """Serialize a value to compact JSON, with orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode('utf-8')
+        except TypeError:
+            # e.g. non-string keys or types unknown to orjson
+            pass
+    return jsonutils.dumps(value, separators=(',', ':'))
+
+
+def summarize_payload(payload):
+    """Return a one-line summary of a notification payload.
+
+    The summary holds the event of the payload, the number of instances it
+    relates to and the host status, when present, followed by the other
+    scalar fields of the payload, e.g. the process name.
+    """
+    if not isinstance(payload, dict):
+        return '' if payload is None else str(payload)
+    parts = []
+    if 'event' in payload:
+        parts.append('event=%s' % payload['event'])
+    instances = payload.get('instances')
+    if isinstance(instances, list):
+        parts.append('instances=%d' % len(instances))
+    elif payload.get('instance_uuid'):
+        parts.append('instances=1')
+    if 'host_status' in payload:
+        parts.append('host_status=%s' % payload['host_status'])
+    for key in sorted(payload):
+        value = payload[key]
+        if key in ('event', 'host_status', 'instances', 'instance_uuid'):
+            continue
+        if value is None or isinstance(value, (str, int, float, bool)):
+            parts.append('%s=%s' % (key, value))
+    return ', '.join(parts)
+
+
+def summarize_recovery_workflow(details):
+    """Return a one-line summary of the recovery workflow of a notification.
+
+    Each task is summarized by its name, state and progress.
+    """
+    if not details:
+        return ''
+    parts = []
+    for task in details:
+        progress = task.get('progress')
+        if isinstance(progress, (int, float)):
+            parts.append('%s: %s (%d%%)' % (task.get('name'),
+                                            task.get('state'),
+                                            round(progress * 100)))
+        else:
+            parts.append('%s: %s' % (task.get('name'), task.get('state')))
+    return ', '.join(parts)
+
+
+class JSONColumn(columns.FormattableColumn):
+    """Column rendered as compact JSON in the human formats."""
+
+    def human_readable(self):
+        if self._value is None:
+            return ''
+        return dumps(self._value)
+
+
+class PayloadColumn(columns.FormattableColumn):
+    """Notification payload, summarized in the human formats."""
+
+    def human_readable(self):
+        return summarize_payload(self._value)
+
+
+class RecoveryWorkflowColumn(columns.FormattableColumn):
+    """Recovery workflow details, summarized in the human formats."""
+
+    def human_readable(self):
+        return summarize_recovery_workflow(self._value)
+
+
+class StreamingJSONFormatter(json_format.JSONFormatter):
+    """JSON formatter writing each row of a list as soon as it is produced.
+
+    The output is the same as the one of the cliff json formatter, which
+    first collects all the rows in memory.
+    """
+
+    def emit_list(self, column_names, data, stdout, parsed_args):
+        indent = None if parsed_args.noindent else 2
+        prefix = '' if indent is None else '\n' + ' ' * indent
+        separator = ', ' if indent is None else ','
+        stdout.write('[')
+        count = 0
+        for row in data:
+            item = dict(
+                (name, value.machine_readable()
+                 if isinstance(value, columns.FormattableColumn) else value)
+                for name, value in zip(column_names, row))
+            text = jsonutils.dumps(item, indent=indent)
+            if indent is not None:
+                text = text.replace('\n', prefix)
+            stdout.write((separator if count else '') + prefix + text)
+            count += 1
+        if indent is not None and count:
+            stdout.write('\n')
+        stdout.write(']\n')
+
+
+def streaming_formatter(formatter):
+    """Return the streaming version of a list formatter, if there is one."""
+    if isinstance(formatter, json_format.JSONFormatter):
+        return StreamingJSONFormatter()
+    return formatter
+
+
+def get_notification_formatters(mode):
+    """Return the formatters of the notification columns.
+
+    :param mode: "summary" or "full", the rendering of the payload and the
+                 recovery workflow details in the human formats
+    """
+    if mode == 'full':
+        return {'payload': JSONColumn,
+                'recovery_workflow_details': JSONColumn}
+    return {'payload': PayloadColumn,
+            'recovery_workflow_details': RecoveryWorkflowColumn}
@@ -0,0 +1,117 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from oslo_serialization import jsonutils
+
+from masakariclient.common import exception as exc
+from masakariclient.common.i18n import _
+
+
+class Journal(object):
+    """Append-only journal of the items completed by a bulk operation.
+
+    Each line of the journal is a JSON object holding the key of a completed
+    item and optional data about it. The entries of an existing journal are
+    loaded when it is opened, so that an interrupted operation can skip the
+    items it already completed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        try:
+            with open(path) as journal:
+                for line in journal:
+                    try:
+                        entry = jsonutils.loads(line)
+                        key = entry.pop('key')
+                    except (ValueError, KeyError):
+                        # The last line is truncated when the process was
+                        # killed while writing it.
+                        continue
+                    self._entries[key] = entry
+        except FileNotFoundError:
+            pass
+        try:
+            self._file = open(path, 'a')
+        except OSError as ex:
+            raise exc.CommandError(_('Unable to open journal %(path)s: '
+                                     '%(error)s')
+                                   % {'path': path, 'error': ex})
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, key, default=None):
+        """Return the data recorded for a completed item."""
+        return self._entries.get(key, default)
+
+    def pending(self, items, key):
+        """Return the items which are not recorded as completed.
+
+        :param items: An iterable of items
+        :param key: A callable returning the key of an item
+        """
+        return [item for item in items if key(item) not in self._entries]
+
+    def items(self):
+        """Return the (key, data) pairs of the completed items."""
+        with self._lock:
+            return list(self._entries.items())
+
+    def record(self, key, **data):
+        """Record an item as completed.
+
+        :param key: The key of the completed item
+        :param data: Data to keep about the item
+        """
+        line = jsonutils.dumps(dict(data, key=key))
+        with self._lock:
+            self._entries[key] = data
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def add_arguments(parser):
+    """Add the --resume option of the bulk operations to a command parser."""
+    parser.add_argument(
+        '--resume',
+        metavar='<journal>',
+        dest='resume',
+        help=_('Record the completed items in the append-only file '
+               '<journal>. When the command is run again with the same '
+               'journal, the completed items are skipped without querying '
+               'the API.')
+    )
+    return parser
+
+
+def open_journal(parsed_args):
+    """Open the journal given by the --resume option, if any."""
+    if not parsed_args.resume:
+        return None
+    return Journal(parsed_args.resume)
@@ -0,0 +1,253 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Client side metrics of the HTTP requests to the Masakari API.
+
+While a :class:`Metrics` collector is active, every response is recorded
+in the histogram of its endpoint, i.e. its method and URL path with the
+IDs replaced by ``{id}``, e.g. ``GET /segments/{id}/hosts``. The
+histograms have logarithmic buckets, so their memory does not grow with
+the number of requests and their percentiles are within
+:data:`BUCKET_GROWTH` of the exact ones.
+"""
+
+import collections
+import json
+import logging
+import math
+import os
+import threading
+import time
+from urllib import parse
+
+LOG = logging.getLogger(__name__)
+
+# Ratio between the upper bounds of two consecutive buckets, in ms
+BUCKET_GROWTH = 1.1
+PERCENTILES = (50, 95, 99)
+
+# Collections of the Masakari API and the resource type of their items
+RESOURCES = {
+    'segments': 'segment',
+    'hosts': 'host',
+    'notifications': 'notification',
+    'vmoves': 'vmove',
+}
+
+_active = None
+
+
+def get_metrics():
+    """Return the active metrics collector, or None."""
+    return _active
+
+
+class Histogram(object):
+    """Latency histogram with logarithmic buckets."""
+
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        ms = max(seconds * 1000.0, 0.0)
+        index = math.ceil(math.log(ms, BUCKET_GROWTH)) if ms > 1 else 0
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def merge(self, other):
+        """Add the latencies of another histogram to this one."""
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    @staticmethod
+    def _upper_bound(index):
+        return BUCKET_GROWTH ** index
+
+    def percentile(self, percent):
+        """Return the percentile of the latencies in ms, or None."""
+        if not self.count:
+            return None
+        rank = math.ceil(self.count * percent / 100.0)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def to_dict(self):
+        latency = {
+            'count': self.count,
+            'min_ms': self.min,
+            'max_ms': self.max,
+            'mean_ms': self.total / self.count if self.count else None,
+        }
+        for percent in PERCENTILES:
+            latency['p%d_ms' % percent] = self.percentile(percent)
+        latency['buckets'] = [
+            [round(self._upper_bound(index), 3), self.buckets[index]]
+            for index in sorted(self.buckets)]
+        return latency
+
+
+class _Endpoint(object):
+
+    def __init__(self, method, path, resource):
+        self.method = method
+        self.path = path
+        self.resource = resource
+        self.latency = Histogram()
+        self.statuses = collections.Counter()
+        self.bytes_received = 0
+
+    def to_dict(self):
+        return {
+            'method': self.method,
+            'path': self.path,
+            'resource': self.resource,
+            'statuses': {str(status): count
+                         for status, count in sorted(self.statuses.items())},
+            'bytes_received': self.bytes_received,
+            'latency': self.latency.to_dict(),
+        }
+
+
+def classify(url):
+    """Return the (path template, resource type) of a request URL.
+
+    The path starts at the first collection of the Masakari API, so that
+    the version and project prefixes of the endpoint are left out. The
+    resource type is the one of the last collection of the path, or
+    "other" for the requests to other services.
+    """
+    parts = [part for part in parse.urlparse(url or '').path.split('/')
+             if part]
+    for start, part in enumerate(parts):
+        if part in RESOURCES:
+            break
+    else:
+        return '/' + '/'.join(parts), 'other'
+
+    template = []
+    resource = 'other'
+    for part in parts[start:]:
+        if part in RESOURCES:
+            resource = RESOURCES[part]
+            template.append(part)
+        else:
+            template.append('{id}')
+    return '/' + '/'.join(template), resource
+
+
+class Metrics(object):
+    """Collect the per-endpoint metrics of the HTTP requests."""
+
+    def __init__(self, path=None, interval=None):
+        """Create a collector.
+
+        :param path: JSON file the metrics are written to when the
+                     collector exits, default none
+        :param interval: Seconds between two writes of the metrics while
+                         the collector is active, default no periodic write
+        """
+        self.path = path
+        self.interval = interval
+        self.endpoints = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer = None
+
+    def __enter__(self):
+        global _active
+        _active = self
+        self.started = time.time()
+        if self.path and self.interval:
+            self._writer = threading.Thread(target=self._write_periodically,
+                                            name='ha-metrics', daemon=True)
+            self._writer.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active
+        _active = None
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+        if self.path:
+            self.write(self.path)
+
+    def _write_periodically(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write(self.path)
+            except OSError as e:
+                LOG.warning('Failed to write the metrics to %s: %s',
+                            self.path, e)
+
+    def record_response(self, response):
+        """Record an HTTP response, as a requests response hook."""
+        request = response.request
+        path, resource = classify(request.url)
+        elapsed = response.elapsed.total_seconds()
+        size = len(response.content or b'')
+        LOG.debug('%s %s %s %.3fs %d bytes', request.method, request.url,
+                  response.status_code, elapsed, size)
+        key = (request.method, path)
+        with self._lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = _Endpoint(
+                    request.method, path, resource)
+            endpoint.latency.add(elapsed)
+            endpoint.statuses[response.status_code] += 1
+            endpoint.bytes_received += size
+
+    def to_dict(self):
+        with self._lock:
+            endpoints = [self.endpoints[key].to_dict()
+                         for key in sorted(self.endpoints)]
+        return {
+            'started_at': self.started,
+            'duration': time.time() - self.started,
+            'requests': sum(endpoint['latency']['count']
+                            for endpoint in endpoints),
+            'endpoints': endpoints,
+        }
+
+    def write(self, path):
+        """Write the metrics as JSON, replacing the file atomically."""
+        data = self.to_dict()
+        tmp_path = '%s.tmp' % path
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+def response_hook(response, *args, **kwargs):
+    """Requests response hook recording the responses in the collector."""
+    metrics = _active
+    if metrics is not None:
+        metrics.record_response(response)
+    return response
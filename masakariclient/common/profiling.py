@@ -0,0 +1,383 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-phase profiling of the ha commands.
+
+While a :class:`Profiler` is active, the time of a command is split into
+phases: ``auth`` for the authentication, ``resolve`` for the name
+resolution, ``format`` for the output, and ``other`` for the rest. The
+HTTP requests are counted apart in the phase they are issued in, e.g.
+``resolve/request`` for the listings of the name resolution. Each phase
+only counts its own time, the time of the phases and requests nested in it
+on the same thread being excluded. The requests made by the threads of the
+bulk operations are counted in ``other/request``, so the request times may
+add up to more than the wall time.
+
+The shell of osc_lib gets the token before the command runs, so the
+``auth`` phase starts with the command, see :class:`ProfiledCommand`.
+
+A :class:`MemoryProfiler` traces the memory allocated by a command with
+tracemalloc, which slows it down noticeably.
+"""
+
+import collections
+import contextlib
+import cProfile
+import functools
+import sys
+import threading
+import time
+import tracemalloc
+
+from cliff import lister
+from oslo_utils import strutils
+
+from masakariclient.common import metrics
+
+PHASES = ('auth', 'resolve', 'format', 'other')
+REQUEST = 'request'
+
+_active = None
+_local = threading.local()
+
+
+def get_profiler():
+    """Return the active profiler, or None."""
+    return _active
+
+
+class _Frame(object):
+    __slots__ = ('name', 'started', 'nested')
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.monotonic()
+        self.nested = 0.0
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class Profiler(object):
+    """Collect the time of each phase and the HTTP requests of a command."""
+
+    def __init__(self, dump_path=None):
+        """Create a profiler.
+
+        :param dump_path: File to dump the cProfile statistics of the
+                          command to, default no dump
+        """
+        self.dump_path = dump_path
+        # By phase, and by phase of the requests, e.g. resolve/request
+        self.times = collections.defaultdict(float)
+        self.counts = collections.Counter()
+        self.requests = collections.Counter()
+        self.requests_by_phase = collections.Counter()
+        self.bytes_sent = collections.Counter()
+        self.bytes_received = collections.Counter()
+        self.wall = 0.0
+        self._lock = threading.Lock()
+        self._cprofile = None
+
+    def __enter__(self):
+        global _active
+        _active = self
+        self._started = time.monotonic()
+        if self.dump_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        _stack().append(_Frame('other'))
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active
+        self._exit_frame(_stack().pop())
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.dump_path)
+        self.wall = time.monotonic() - self._started
+        _active = None
+
+    def _exit_frame(self, frame):
+        elapsed = time.monotonic() - frame.started
+        with self._lock:
+            self.times[frame.name] += elapsed - frame.nested
+            self.counts[frame.name] += 1
+        stack = _stack()
+        if stack:
+            stack[-1].nested += elapsed
+
+    def add_phase(self, name, started, ended):
+        """Count a phase that ended before the profiler was entered."""
+        with self._lock:
+            self.times[name] += ended - started
+            self.counts[name] += 1
+        self._started = min(self._started, started)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Count the time spent in the block in the given phase."""
+        frame = _Frame(name)
+        _stack().append(frame)
+        try:
+            yield
+        finally:
+            _stack().pop()
+            self._exit_frame(frame)
+
+    def record_response(self, response):
+        """Record an HTTP response, as a requests response hook."""
+        request = response.request
+        url = request.url or ''
+        stack = _stack()
+        if '/auth/tokens' in url:
+            # Keystone issues tokens on POST /v3/auth/tokens
+            phase = 'auth'
+        else:
+            phase = '%s/%s' % (stack[-1].name if stack else 'other',
+                               REQUEST)
+        elapsed = response.elapsed.total_seconds()
+        sent = len(request.body or b'')
+        received = len(response.content or b'')
+        with self._lock:
+            self.times[phase] += elapsed
+            self.counts[phase] += 1
+            key = '%s %s' % (request.method, response.status_code)
+            self.requests[key] += 1
+            self.requests_by_phase[phase] += 1
+            self.bytes_sent[phase] += sent
+            self.bytes_received[phase] += received
+        if stack:
+            stack[-1].nested += elapsed
+
+    def report(self, title, stream=None):
+        """Write the breakdown of the times and requests to a stream."""
+        stream = stream or sys.stderr
+        stream.write('Profile of "%s" (%.3fs):\n' % (title, self.wall))
+        for name in PHASES:
+            for key in (name, '%s/%s' % (name, REQUEST)):
+                if key == name or self.counts[key]:
+                    stream.write('  %-16s %8.3fs %6d\n'
+                                 % (key, self.times[key], self.counts[key]))
+        stream.write('  HTTP: %d requests, %d bytes sent, %d bytes '
+                     'received\n'
+                     % (sum(self.requests.values()),
+                        sum(self.bytes_sent.values()),
+                        sum(self.bytes_received.values())))
+        for key in sorted(self.bytes_sent):
+            stream.write('    %-16s %6d requests, %d bytes sent, %d bytes '
+                         'received\n'
+                         % (key, self.requests_by_phase[key],
+                            self.bytes_sent[key], self.bytes_received[key]))
+        for key, count in sorted(self.requests.items()):
+            stream.write('    %-16s %6d\n' % (key, count))
+        if self.dump_path:
+            stream.write('  cProfile statistics written to %s\n'
+                         % self.dump_path)
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Count the time spent in the block in a phase of the active profiler.
+
+    This is a no-op when no profiler is active.
+    """
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.phase(name):
+        yield
+
+
+def timed(name):
+    """Decorate a function to count its time in a phase."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def response_hook(response, *args, **kwargs):
+    """Requests response hook recording the responses in the profiler."""
+    profiler = _active
+    if profiler is not None:
+        profiler.record_response(response)
+    return response
+
+
+class MemoryProfiler(object):
+    """Trace the memory allocated by a command with tracemalloc.
+
+    The command is split into stages by :meth:`checkpoint`, each stage
+    having its own peak, e.g. ``take_action`` and ``output`` for the
+    display commands.
+    """
+
+    def __init__(self, frames=1, top=10):
+        """Create a memory profiler.
+
+        :param frames: Number of frames of the traced allocation sites
+        :param top: Number of allocation sites reported
+        """
+        self.frames = frames
+        self.top = top
+        self.stages = []
+        self.rows = None
+        self.rows_size = None
+        self.retained_stage = None
+        self.snapshot = None
+        self._stage = 'take_action'
+        self._baseline = 0
+        self._was_tracing = False
+
+    def __enter__(self):
+        self._was_tracing = tracemalloc.is_tracing()
+        if not self._was_tracing:
+            tracemalloc.start(self.frames)
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._stage is not None:
+            self.checkpoint(None)
+        if not self._was_tracing:
+            tracemalloc.stop()
+
+    def checkpoint(self, next_stage):
+        """End the current stage and start the next one."""
+        current, peak = tracemalloc.get_traced_memory()
+        self.stages.append((self._stage, current - self._baseline,
+                            peak - self._baseline))
+        if self.snapshot is None:
+            # The memory retained by the first stage is the one of its
+            # result, e.g. the rows of a listing.
+            self.retained_stage = self._stage
+            self.snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+        self._stage = next_stage
+        tracemalloc.reset_peak()
+
+    def materialize(self, rows):
+        """Return the list of the rows of a listing, measuring their memory.
+
+        The listers return generators building the rows while the output is
+        written, so the rows are built beforehand to measure their size.
+        """
+        before = tracemalloc.get_traced_memory()[0]
+        rows = list(rows)
+        self.rows = len(rows)
+        self.rows_size = tracemalloc.get_traced_memory()[0] - before
+        return rows
+
+    def report(self, title, stream=None):
+        """Write the peaks, allocation sites and bytes per row to a stream."""
+        stream = stream or sys.stderr
+        peak = max([stage_peak for _s, _c, stage_peak in self.stages] or [0])
+        stream.write('Memory profile of "%s" (peak %s):\n'
+                     % (title, _format_size(peak)))
+        for stage, current, stage_peak in self.stages:
+            stream.write('  %-12s peak %10s, retained %10s\n'
+                         % (stage, _format_size(stage_peak),
+                            _format_size(current)))
+        if self.rows:
+            stream.write('  %d rows, %s per row\n'
+                         % (self.rows,
+                            _format_size(self.rows_size / self.rows)))
+        if self.snapshot is not None:
+            stream.write('  Top allocation sites after %s:\n'
+                         % self.retained_stage)
+            for stat in self.snapshot.statistics('lineno')[:self.top]:
+                frame = stat.traceback[0]
+                stream.write('    %10s %8d  %s:%d\n'
+                             % (_format_size(stat.size), stat.count,
+                                frame.filename, frame.lineno))
+
+
+def _format_size(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return '%.1f %s' % (size, unit)
+        size /= 1024.0
+    return '%.1f GiB' % size
+
+
+class ProfiledCommand(object):
+    """Mixin of the commands profiled by the --ha-* global options.
+
+    cliff creates the command before the shell prepares it to run, which is
+    when osc_lib validates the cloud configuration and gets the token, then
+    gets its parser. The time in between is counted in the ``auth`` phase.
+    """
+
+    _memory_profiler = None
+    _created = None
+    _prepared = None
+
+    def __init__(self, app, app_args, cmd_name=None):
+        # cliff only passes cmd_name to the __init__ methods naming it
+        super(ProfiledCommand, self).__init__(app, app_args,
+                                              cmd_name=cmd_name)
+        self._created = time.monotonic()
+
+    def get_parser(self, prog_name):
+        if self._prepared is None:
+            self._prepared = time.monotonic()
+        return super(ProfiledCommand, self).get_parser(prog_name)
+
+    def run(self, parsed_args):
+        options = getattr(self.app, 'options', None)
+        title = self.cmd_name or self.__class__.__name__
+        with contextlib.ExitStack() as stack:
+            metrics_path = getattr(options, 'ha_metrics', None)
+            if metrics_path:
+                stack.enter_context(metrics.Metrics(
+                    metrics_path,
+                    interval=getattr(options, 'ha_metrics_interval', None)))
+            # The reports are registered before the profilers, so that they
+            # are written once the profilers have exited.
+            if strutils.bool_from_string(getattr(options, 'ha_profile',
+                                                 None)):
+                profiler = Profiler(
+                    dump_path=getattr(options, 'ha_profile_dump', None))
+                stack.callback(profiler.report, title, self.app.stderr)
+                stack.enter_context(profiler)
+                if self._created is not None and self._prepared is not None:
+                    profiler.add_phase('auth', self._created, self._prepared)
+            if strutils.bool_from_string(getattr(options, 'ha_memprofile',
+                                                 None)):
+                memory_profiler = MemoryProfiler()
+                stack.callback(memory_profiler.report, title,
+                               self.app.stderr)
+                stack.enter_context(memory_profiler)
+                self._memory_profiler = memory_profiler
+            return super(ProfiledCommand, self).run(parsed_args)
+
+    def produce_output(self, parsed_args, column_names, data):
+        memory_profiler = self._memory_profiler
+        if memory_profiler is not None:
+            if isinstance(self, lister.Lister):
+                data = memory_profiler.materialize(data)
+            memory_profiler.checkpoint('output')
+        with phase('format'):
+            return super(ProfiledCommand, self).produce_output(
+                parsed_args, column_names, data)
@@ -0,0 +1,227 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compact rows of the listings.
+
+The proxy of openstacksdk builds a Resource for each record of a listing,
+which costs far more time and memory than the request itself on large
+listings, while the listers only display a few of its attributes.
+:func:`list_rows` pages through the listing like the proxy does, but turns
+each raw record into a tuple of the requested columns as soon as it is
+read, so that neither the Resource nor the record is kept.
+
+This relies on private methods of the Resource class. When they are
+missing or do not take the expected arguments, e.g. with a later
+openstacksdk release, the rows are built from the Resources of the proxy
+instead.
+"""
+
+import inspect
+import re
+
+from openstack import exceptions as sdk_exc
+from openstack.instance_ha.v1 import host as _host
+from openstack.instance_ha.v1 import notification as _notification
+from openstack.instance_ha.v1 import segment as _segment
+from openstack.instance_ha.v1 import vmove as _vmove
+from osc_lib import utils
+
+# Attributes of the Resource instances holding their body and URI
+# components, which identify the type of a field across SDK releases
+_BODY = '_body'
+_URI = '_uri'
+
+
+def _location(field):
+    return getattr(field, 'key', None)
+
+
+def _uri_names(resource_type):
+    return re.findall(r'%\((\w+)\)s', resource_type.base_path)
+
+
+def _accepts(func, *args, **kwargs):
+    try:
+        inspect.signature(func).bind(*args, **kwargs)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _supports_raw_listing(resource_type):
+    """Return whether the internals used by the raw listing are as expected.
+
+    The methods must take the arguments passed by :func:`list_rows`, and
+    the attributes of the body and of the URI be identified as such.
+    """
+    try:
+        query_mapping = resource_type._query_mapping
+        get_microversion = resource_type._get_microversion
+        return (
+            _accepts(query_mapping._validate, {}, resource_type.base_path) and
+            _accepts(query_mapping._transpose, {}, resource_type) and
+            (_accepts(get_microversion, None) or
+             _accepts(get_microversion, None, action='list')) and
+            _accepts(resource_type._get_next_link, '', None, {}, None, None,
+                     0) and
+            isinstance(resource_type.resources_key, str) and
+            _location(resource_type.id) == _BODY and
+            all(_location(getattr(resource_type, name, None)) == _URI
+                for name in _uri_names(resource_type)))
+    except AttributeError:
+        return False
+
+
+def _get_microversion(resource_type, manager):
+    """Return the microversion of the listing, as the proxy would."""
+    method = resource_type._get_microversion
+    # The action is a required argument up to openstacksdk 4.4.0
+    if 'action' in inspect.signature(method).parameters:
+        return method(manager, action='list')
+    return method(manager)
+
+
+def _projector(resource_type, columns, uri_params, formatters):
+    """Return a function projecting a raw record on columns.
+
+    The columns are attributes of the resource type, read from the record
+    under their name in the API, e.g. ``instance_uuid`` for the
+    ``server_id`` of a VM move. The URI attributes are taken from the
+    parameters of the listing, and unknown columns are empty, as with
+    :func:`osc_lib.utils.get_item_properties`.
+    """
+    fields = []
+    for column in columns:
+        field = getattr(resource_type, column, None)
+        location = _location(field)
+        if location == _URI:
+            key, default = None, uri_params.get(field.name, field.default)
+        elif location == _BODY:
+            key, default = field.name, field.default
+        else:
+            key, default = None, ''
+        fields.append((key, default, formatters.get(column)))
+
+    def _project(record):
+        row = []
+        for key, value, formatter in fields:
+            if key is not None:
+                value = record.get(key, value)
+            row.append(value if formatter is None else formatter(value))
+        return tuple(row)
+    return _project
+
+
+def _list_resource_rows(manager, resource_type, columns, formatters,
+                        **params):
+    """List the resources with the proxy and turn them into rows.
+
+    The listing methods of the proxy are named after the resources key and
+    take the URI attributes positionally, e.g. ``hosts(segment_id)``.
+    """
+    args = [params.pop(name) for name in _uri_names(resource_type)]
+    for resource in getattr(manager, resource_type.resources_key)(*args,
+                                                                  **params):
+        yield utils.get_item_properties(resource, columns,
+                                        formatters=formatters)
+
+
+def list_rows(manager, resource_type, columns, formatters=None, **params):
+    """List resources as tuples of columns, without building Resources.
+
+    :param manager: The instance_ha proxy
+    :param resource_type: The Resource class of the listing, e.g.
+                          :class:`openstack.instance_ha.v1.host.Host`
+    :param columns: The attributes of the resource type in each row
+    :param formatters: A dict mapping columns to the
+                       :class:`cliff.columns.FormattableColumn` classes
+                       wrapping their values
+    :param params: The URI attributes, e.g. ``segment_id``, and the query
+                   parameters of the listing, as for the proxy
+    :return: A generator of tuples
+    :raises: :class:`openstack.exceptions.InvalidResourceQuery` for unknown
+             query parameters, the exceptions of the proxy for failed
+             requests
+    """
+    if not _supports_raw_listing(resource_type):
+        return _list_resource_rows(manager, resource_type, columns,
+                                   formatters or {}, **params)
+    return _list_raw_rows(manager, resource_type, columns, formatters or {},
+                          **params)
+
+
+def _list_raw_rows(manager, resource_type, columns, formatters, **params):
+    # The query is validated and mapped to the API names like the proxy
+    # does in Resource.list.
+    query_mapping = resource_type._query_mapping
+    query_mapping._validate(params, resource_type.base_path)
+    uri_params = {key: value for key, value in params.items()
+                  if _location(getattr(resource_type, key, None)) == _URI}
+    query = query_mapping._transpose(params, resource_type)
+    limit = query.get('limit')
+    microversion = _get_microversion(resource_type, manager)
+    project = _projector(resource_type, columns, uri_params, formatters)
+
+    uri = resource_type.base_path % uri_params
+    total = 0
+    while uri:
+        response = manager.get(uri, headers={'Accept': 'application/json'},
+                               params=query.copy(),
+                               microversion=microversion)
+        sdk_exc.raise_from_response(response)
+        data = response.json()
+        records = data.pop(resource_type.resources_key)
+        last_marker = query.pop('marker', None)
+        query.pop('limit', None)
+
+        marker = None
+        for record in records:
+            marker = record.get('id')
+            yield project(record)
+        count = len(records)
+        total += count
+        del records
+
+        if not count:
+            return
+        # The rest of the page only holds its links
+        uri, next_params = resource_type._get_next_link(
+            uri, response, data, marker, limit, total)
+        if ('marker' in next_params and
+                next_params['marker'] == last_marker):
+            raise sdk_exc.SDKException(
+                'Endless pagination loop detected, aborting')
+        query.update(next_params)
+
+
+def segments(manager, columns, formatters=None, **query):
+    """Return a generator of the segment rows."""
+    return list_rows(manager, _segment.Segment, columns,
+                     formatters=formatters, **query)
+
+
+def hosts(manager, segment_id, columns, formatters=None, **query):
+    """Return a generator of the host rows of a segment."""
+    return list_rows(manager, _host.Host, columns, formatters=formatters,
+                     segment_id=segment_id, **query)
+
+
+def notifications(manager, columns, formatters=None, **query):
+    """Return a generator of the notification rows."""
+    return list_rows(manager, _notification.Notification, columns,
+                     formatters=formatters, **query)
+
+
+def vmoves(manager, notification_id, columns, formatters=None, **query):
+    """Return a generator of the VM move rows of a notification."""
+    return list_rows(manager, _vmove.VMove, columns, formatters=formatters,
+                     notification_id=notification_id, **query)
@@ -0,0 +1,120 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Recovery SLA statistics of the notifications.
+
+The recovery time of a notification is the time from its generated time to
+its last update, once it reached a final status. The evacuation time of a
+VM move is the time from its start to its end. Both are added to
+:class:`~masakariclient.common.metrics.Histogram` instances as the
+notifications are read, so the memory used does not grow with their
+number.
+"""
+
+import collections
+
+from oslo_utils import timeutils
+
+from masakariclient.common import metrics
+
+NOTIFICATION_COLUMNS = ('notification_uuid', 'type', 'status',
+                        'source_host_uuid', 'generated_time', 'updated_at')
+VMOVE_COLUMNS = ('status', 'start_time', 'end_time')
+
+# Attributes of the notifications the statistics can be broken down by
+GROUP_BY = {
+    'type': 'type',
+    'host': 'source_host_uuid',
+}
+
+# Measured durations, by the final status of the notifications or VM moves
+RECOVERY_METRICS = {'finished': 'recovery', 'failed': 'failed_recovery'}
+EVACUATION_METRICS = {'succeeded': 'evacuation',
+                      'failed': 'failed_evacuation'}
+
+STATS_COLUMNS = ['Group', 'Metric', 'Count', 'Min (s)', 'Mean (s)',
+                 'P50 (s)', 'P95 (s)', 'P99 (s)', 'Max (s)']
+
+
+def _duration(start, end):
+    """Return the seconds between two timestamps, or None."""
+    if not start or not end:
+        return None
+    try:
+        return (timeutils.parse_isotime(end) -
+                timeutils.parse_isotime(start)).total_seconds()
+    except ValueError:
+        return None
+
+
+class RecoveryStats(object):
+    """Histograms of the recovery and evacuation times."""
+
+    def __init__(self, group_by=()):
+        """Create the statistics.
+
+        :param group_by: Keys of :data:`GROUP_BY` the statistics are broken
+                         down by, in addition to the overall ones
+        """
+        self.group_by = list(group_by)
+        self.histograms = collections.defaultdict(metrics.Histogram)
+        self.notifications = 0
+
+    def _groups(self, notification):
+        yield 'all'
+        for key in self.group_by:
+            yield '%s=%s' % (key, notification.get(GROUP_BY[key]))
+
+    def _add(self, notification, metric, seconds):
+        if seconds is None:
+            return
+        for group in self._groups(notification):
+            self.histograms[(group, metric)].add(seconds)
+
+    def add(self, notification, vmoves=()):
+        """Add a notification and its VM moves.
+
+        :param notification: A dict of the :data:`NOTIFICATION_COLUMNS`
+        :param vmoves: Dicts of the :data:`VMOVE_COLUMNS` of its VM moves
+        """
+        self.notifications += 1
+        metric = RECOVERY_METRICS.get(notification.get('status'))
+        if metric is not None:
+            self._add(notification, metric,
+                      _duration(notification.get('generated_time'),
+                                notification.get('updated_at')))
+        for vmove in vmoves:
+            metric = EVACUATION_METRICS.get(vmove.get('status'))
+            if metric is not None:
+                self._add(notification, metric,
+                          _duration(vmove.get('start_time'),
+                                    vmove.get('end_time')))
+
+    def rows(self):
+        """Return the rows of the :data:`STATS_COLUMNS`.
+
+        The overall statistics come first, followed by the groups in
+        alphabetical order.
+        """
+        def _key(item):
+            group, metric = item[0]
+            return group != 'all', group, metric
+
+        def _s(ms):
+            return round(ms / 1000.0, 3) if ms is not None else None
+
+        for (group, metric), histogram in sorted(self.histograms.items(),
+                                                 key=_key):
+            yield (group, metric, histogram.count, _s(histogram.min),
+                   _s(histogram.total / histogram.count),
+                   _s(histogram.percentile(50)), _s(histogram.percentile(95)),
+                   _s(histogram.percentile(99)), _s(histogram.max))
@@ -0,0 +1,405 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helpers to read the topology of segments and hosts.
+
+A topology snapshot is a line-delimited JSON file. Each line holds one
+segment with the list of its hosts under the ``hosts`` key, so a snapshot
+can be read and written one segment at a time.
+"""
+
+import bisect
+import collections
+import fnmatch
+import os
+import re
+import time
+
+from oslo_serialization import jsonutils
+from oslo_utils import strutils
+import yaml
+
+from masakariclient.common import exception as exc
+from masakariclient.common import executor as masakariclient_executor
+from masakariclient.common.i18n import _
+
+SEGMENT_FIELDS = ('uuid', 'name', 'description', 'service_type',
+                  'recovery_method', 'is_enabled')
+HOST_FIELDS = ('uuid', 'name', 'type', 'control_attributes', 'reserved',
+               'on_maintenance')
+
+# Attributes compared when converging the topology to a desired state
+SEGMENT_APPLY_FIELDS = ('description', 'recovery_method', 'service_type',
+                        'is_enabled')
+HOST_APPLY_FIELDS = ('type', 'control_attributes', 'reserved',
+                     'on_maintenance')
+_BOOLEAN_FIELDS = ('is_enabled', 'reserved', 'on_maintenance')
+
+#: A change of the plan computed by compute_plan. ``segment`` is the name of
+#: the segment the change applies to, ``uuid`` the uuid of the existing
+#: resource, ``attrs`` the attributes to set and ``previous`` their current
+#: values.
+Change = collections.namedtuple(
+    'Change', ['action', 'resource', 'segment', 'name', 'uuid', 'attrs',
+               'previous'])
+
+
+def _to_dict(item, fields):
+    return {field: getattr(item, field, None) for field in fields}
+
+
+def fetch_topology(manager, segments=None, executor=None):
+    """Fetch segments along with their hosts.
+
+    :param manager: A client manager class
+    :param segments: The segments to fetch the hosts of, default all
+    :param executor: The BulkExecutor querying the segments in parallel
+    :return: A generator of segment dicts, in the order of the segments
+    """
+    if segments is None:
+        segments = manager.segments()
+    if executor is None:
+        executor = masakariclient_executor.BulkExecutor()
+
+    def _hosts(segment):
+        return [_to_dict(host, HOST_FIELDS)
+                for host in manager.hosts(segment.uuid)]
+
+    for segment, hosts in executor.run(_hosts, segments, ordered=True):
+        item = _to_dict(segment, SEGMENT_FIELDS)
+        item['hosts'] = hosts
+        yield item
+
+
+def write_snapshot(segments, stream):
+    """Write segments to a topology snapshot, one segment per line.
+
+    :param segments: An iterable of segment dicts
+    :param stream: A file-like object to write the snapshot to
+    :return: The number of segments and hosts written
+    """
+    segment_count = host_count = 0
+    for segment in segments:
+        stream.write(jsonutils.dumps(segment) + '\n')
+        segment_count += 1
+        host_count += len(segment['hosts'])
+    return segment_count, host_count
+
+
+def read_snapshot(path):
+    """Read the segments of a topology snapshot.
+
+    :param path: Path of the snapshot file
+    :return: A generator of segment dicts
+    """
+    try:
+        with open(path) as snapshot:
+            for lineno, line in enumerate(snapshot, 1):
+                if not line.strip():
+                    continue
+                try:
+                    segment = jsonutils.loads(line)
+                except ValueError:
+                    raise exc.CommandError(_(
+                        'Malformed topology snapshot %(path)s at line '
+                        '%(lineno)d.') % {'path': path, 'lineno': lineno})
+                segment.setdefault('hosts', [])
+                yield segment
+    except OSError as ex:
+        raise exc.CommandError(_('Unable to read topology snapshot '
+                                 '%(path)s: %(error)s')
+                               % {'path': path, 'error': ex})
+
+
+def read_desired_topology(path):
+    """Read a desired topology from a YAML or JSON file.
+
+    The file holds a list of segments, or a mapping with the list of
+    segments under the ``segments`` key. The hosts of each segment are
+    listed under its ``hosts`` key.
+
+    :param path: Path of the file
+    :return: A list of segment dicts
+    """
+    try:
+        with open(path) as desired:
+            data = yaml.safe_load(desired)
+    except (OSError, yaml.YAMLError) as ex:
+        raise exc.CommandError(_('Unable to read desired topology '
+                                 '%(path)s: %(error)s')
+                               % {'path': path, 'error': ex})
+    if isinstance(data, dict):
+        data = data.get('segments')
+    if not isinstance(data, list) or not all(
+            isinstance(segment, dict) for segment in data):
+        raise exc.CommandError(_('Desired topology %s must be a list of '
+                                 'segments.') % path)
+    return data
+
+
+class HostStatsCache(object):
+    """File cache of the host counts of the segments.
+
+    The counts of each segment are cached with the time they were computed
+    at, so that each segment expires on its own.
+    """
+
+    def __init__(self, entries=None):
+        """Create a cache.
+
+        :param entries: A dict mapping segment uuids to dicts of their
+                        ``created_at`` time and host ``stats``
+        """
+        self._entries = dict(entries or {})
+
+    @classmethod
+    def load(cls, path):
+        """Load a cache saved to a file.
+
+        :return: The cache, empty if the file is missing or unreadable
+        """
+        try:
+            with open(path) as cache:
+                data = jsonutils.loads(cache.read())
+        except (OSError, ValueError):
+            return cls()
+        return cls(data.get('segments') if isinstance(data, dict) else None)
+
+    def get(self, segment_id, max_age=None):
+        """Return the cached host counts of a segment, or None.
+
+        :param segment_id: The uuid of the segment
+        :param max_age: Maximum age of the counts in seconds, default no
+                        limit
+        """
+        entry = self._entries.get(str(segment_id))
+        if entry is None:
+            return None
+        if max_age is not None and (
+                time.time() - entry.get('created_at', 0) > max_age):
+            return None
+        return entry.get('stats')
+
+    def set(self, segment_id, stats):
+        """Cache the host counts of a segment."""
+        self._entries[str(segment_id)] = {'created_at': time.time(),
+                                          'stats': stats}
+
+    def save(self, path):
+        """Save the cache to a file, replacing it atomically."""
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w') as cache:
+            jsonutils.dump({'segments': self._entries}, cache)
+        os.replace(tmp_path, path)
+
+
+class HostIndex(object):
+    """Index of the hosts of all segments by host name.
+
+    Exact lookups are served by a dict and prefix lookups by a bisection of
+    the sorted host names. Glob patterns are narrowed down to the names
+    sharing their literal prefix before being matched.
+    """
+
+    def __init__(self, entries):
+        """Build the index.
+
+        :param entries: An iterable of (host name, host uuid, segment name,
+                        segment uuid) tuples
+        """
+        self._entries = sorted(tuple(str(value) for value in entry)
+                               for entry in entries)
+        self._names = [entry[0] for entry in self._entries]
+        self._by_name = {}
+        for entry in self._entries:
+            self._by_name.setdefault(entry[0], []).append(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def from_topology(cls, segments):
+        """Build the index from segment dicts as returned by fetch_topology.
+
+        :param segments: An iterable of segment dicts
+        """
+        return cls((host['name'], host['uuid'],
+                    segment['name'], segment['uuid'])
+                   for segment in segments for host in segment['hosts'])
+
+    @classmethod
+    def load(cls, path, max_age=None):
+        """Load an index saved to a file.
+
+        :param path: Path of the index file
+        :param max_age: Maximum age of the index in seconds, default no limit
+        :return: The index, or None if the file is missing, unreadable or
+                 older than max_age
+        """
+        try:
+            with open(path) as cache:
+                data = jsonutils.loads(cache.read())
+        except (OSError, ValueError):
+            return None
+        if max_age is not None and (
+                time.time() - data.get('created_at', 0) > max_age):
+            return None
+        return cls(data.get('hosts', []))
+
+    def save(self, path):
+        """Save the index to a file, replacing it atomically."""
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w') as cache:
+            jsonutils.dump({'created_at': time.time(),
+                            'hosts': self._entries}, cache)
+        os.replace(tmp_path, path)
+
+    def exact(self, name):
+        """Return the entries of the hosts named name."""
+        return list(self._by_name.get(name, []))
+
+    def prefix(self, prefix):
+        """Return the entries of the hosts whose name starts with prefix."""
+        start = bisect.bisect_left(self._names, prefix)
+        # No character sorts after the highest code point, so every name
+        # starting with prefix sorts before this bound.
+        end = bisect.bisect_left(self._names, prefix + chr(0x10ffff), start)
+        return self._entries[start:end]
+
+    def glob(self, pattern):
+        """Return the entries of the hosts whose name matches pattern."""
+        literal = re.split(r'[*?[]', pattern, maxsplit=1)[0]
+        return [entry for entry in self.prefix(literal)
+                if fnmatch.fnmatchcase(entry[0], pattern)]
+
+
+def _normalize(field, value):
+    if value is None:
+        return None
+    if field in _BOOLEAN_FIELDS:
+        return strutils.bool_from_string(value)
+    return str(value)
+
+
+def _diff(current, desired, fields):
+    attrs = {}
+    previous = {}
+    for field in fields:
+        if field not in desired:
+            continue
+        if (_normalize(field, desired[field]) !=
+                _normalize(field, current.get(field))):
+            attrs[field] = desired[field]
+            previous[field] = current.get(field)
+    return attrs, previous
+
+
+def _check_unique(names, resource):
+    seen = set()
+    for name in names:
+        if name in seen:
+            raise exc.CommandError(_('Duplicate %(resource)s name: %(name)s')
+                                   % {'resource': resource, 'name': name})
+        seen.add(name)
+
+
+def compute_plan(current, desired, prune=False):
+    """Compute the changes converging the current topology to a desired one.
+
+    Segments and hosts are matched by name. Only the attributes given in
+    the desired topology are compared. The hosts of a desired segment are
+    only reconciled when it has a ``hosts`` list, the existing hosts
+    missing from that list being deleted, so ``hosts: []`` deletes all of
+    them while a segment without ``hosts`` keeps its hosts.
+
+    :param current: An iterable of the current segment dicts, with their
+                    hosts, as returned by fetch_topology
+    :param desired: A list of the desired segment dicts
+    :param prune: Delete the segments missing from the desired topology
+    :return: A list of Change tuples in execution order: segment creations
+             and updates, host deletions, host creations and updates, then
+             segment deletions
+    """
+    for segment in desired:
+        if not segment.get('name'):
+            raise exc.CommandError(_('Every segment must have a name.'))
+        for host in segment.get('hosts') or []:
+            if not host.get('name'):
+                raise exc.CommandError(_('Every host of segment %s must have '
+                                         'a name.') % segment['name'])
+    _check_unique((segment['name'] for segment in desired), 'segment')
+    _check_unique((host['name'] for segment in desired
+                   for host in segment.get('hosts') or []), 'host')
+
+    current = {segment['name']: segment for segment in current}
+    segment_changes = []
+    host_deletions = []
+    host_changes = []
+    segment_deletions = []
+
+    for segment in desired:
+        name = segment['name']
+        existing = current.get(name)
+        if existing is None:
+            attrs = {field: segment[field] for field in SEGMENT_APPLY_FIELDS
+                     if field in segment}
+            attrs['name'] = name
+            segment_changes.append(
+                Change('create', 'segment', name, name, None, attrs, {}))
+            existing_hosts = {}
+        else:
+            attrs, previous = _diff(existing, segment, SEGMENT_APPLY_FIELDS)
+            if attrs:
+                segment_changes.append(
+                    Change('update', 'segment', name, name, existing['uuid'],
+                           attrs, previous))
+            existing_hosts = {host['name']: host
+                              for host in existing['hosts']}
+
+        if segment.get('hosts') is None:
+            continue
+
+        for host in segment['hosts']:
+            existing_host = existing_hosts.pop(host['name'], None)
+            if existing_host is None:
+                attrs = {field: host[field] for field in HOST_APPLY_FIELDS
+                         if field in host}
+                attrs['name'] = host['name']
+                host_changes.append(
+                    Change('create', 'host', name, host['name'], None,
+                           attrs, {}))
+                continue
+            attrs, previous = _diff(existing_host, host, HOST_APPLY_FIELDS)
+            if attrs:
+                host_changes.append(
+                    Change('update', 'host', name, host['name'],
+                           existing_host['uuid'], attrs, previous))
+
+        for host in existing_hosts.values():
+            host_deletions.append(
+                Change('delete', 'host', name, host['name'], host['uuid'],
+                       {}, {}))
+
+    if prune:
+        desired_names = {segment['name'] for segment in desired}
+        for name, existing in current.items():
+            if name in desired_names:
+                continue
+            for host in existing['hosts']:
+                host_deletions.append(
+                    Change('delete', 'host', name, host['name'],
+                           host['uuid'], {}, {}))
+            segment_deletions.append(
+                Change('delete', 'segment', name, name, existing['uuid'],
+                       {}, {}))
+
+    return segment_changes + host_deletions + host_changes + segment_deletions
@@ -12,10 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
+
+from oslo_utils import strutils
 from oslo_utils import uuidutils
 
+from masakariclient import api_versions
 from masakariclient.common import exception as exc
 from masakariclient.common.i18n import _
+from masakariclient.common import profiling
+
+HOST_STATS_KEYS = ('hosts', 'reserved_hosts', 'maintenance_hosts',
+                   'available_reserved_hosts')
+
+# Statuses of the notifications whose recovery is not over yet
+IN_FLIGHT_NOTIFICATION_STATUSES = ('new', 'running', 'error')
 
 
 def _format_parameters(params, parse_semicolon=True):
@@ -56,10 +67,22 @@ def remove_unspecified_items(attrs):
 
 
 def format_sort_filter_params(parsed_args):
+    return format_queries(limit=parsed_args.limit, marker=parsed_args.marker,
+                          sort=parsed_args.sort, filters=parsed_args.filters)
+
+
+def format_queries(limit=None, marker=None, sort=None, filters=None):
+    """Build the query parameters of a listing.
+
+    :param limit: Maximum number of items returned
+    :param marker: ID of the item after which the listing starts
+    :param sort: Comma-separated list of keys, each optionally followed by
+                 a sort direction, e.g. "name:asc,created_at"
+    :param filters: A list of "key=value" strings, or of a single string of
+                    pairs separated by a semicolon
+    :return: A dict of query parameters
+    """
     queries = {}
-    limit = parsed_args.limit
-    marker = parsed_args.marker
-    sort = parsed_args.sort
     if limit:
         queries['limit'] = limit
     if marker:
@@ -81,12 +104,59 @@ def format_sort_filter_params(parsed_args):
         queries['sort_key'] = sort_keys
         queries['sort_dir'] = sort_dirs
 
-    if parsed_args.filters:
-        queries.update(_format_parameters(parsed_args.filters))
+    if filters:
+        queries.update(_format_parameters(filters))
 
     return queries
 
 
+def add_fields_argument(parser):
+    """Add the --fields option selecting the columns of a command."""
+    parser.add_argument(
+        '--fields',
+        metavar='<field>[,<field>...]',
+        action='append',
+        help=_('Comma-separated list of the fields to fetch and display, '
+               'in that order, default all. Can be repeated.')
+    )
+
+
+def select_fields(columns, fields):
+    """Return the columns selected by --fields options.
+
+    :param columns: All the columns of the command
+    :param fields: The values of the --fields options, or None
+    :return: The selected columns, in the order of the fields
+    """
+    if not fields:
+        return list(columns)
+    selected = []
+    for field in itertools.chain.from_iterable(f.split(',') for f in fields):
+        field = field.strip()
+        if field and field not in selected:
+            selected.append(field)
+    unknown = [field for field in selected if field not in columns]
+    if unknown or not selected:
+        raise exc.CommandError(
+            _('Unknown field(s): %(unknown)s. The valid fields are: '
+              '%(valid)s.') % {'unknown': ', '.join(unknown) or "''",
+                               'valid': ', '.join(columns)})
+    return selected
+
+
+def supports_microversion(manager, version):
+    """Return whether a client manager uses at least a microversion.
+
+    :param manager: A client manager class
+    :param version: The microversion, e.g. "1.2"
+    """
+    if not manager.default_microversion:
+        return False
+    return (api_versions.APIVersion(manager.default_microversion) >=
+            api_versions.APIVersion(version))
+
+
+@profiling.timed('resolve')
 def get_uuid_by_name(manager, name, segment=None):
     """Helper methods for getting uuid of segment or host by name.
 
@@ -110,3 +180,58 @@ def get_uuid_by_name(manager, name, segment=None):
                 uuid = getattr(item, 'uuid')
                 break
     return uuid
+
+
+@profiling.timed('resolve')
+def get_uuids_by_name(manager, names, segment=None):
+    """Helper method for getting the uuids of segments or hosts by name.
+
+    Unlike get_uuid_by_name, the segments or hosts are listed at most once
+    whatever the number of names.
+
+    :param manager: A client manager class
+    :param names: The resources we are trying to find the uuids of
+    :param segment: segment id, default None
+    :return: A dict mapping each name to the uuid of the found resource,
+             or to the name itself if it cannot be found
+    """
+    uuids = {name: name for name in names}
+    pending = {name for name in uuids if not uuidutils.is_uuid_like(name)}
+    if pending:
+        if segment:
+            items = manager.hosts(segment)
+        else:
+            items = manager.segments()
+
+        for item in items:
+            item_name = getattr(item, 'name')
+            if item_name in pending:
+                uuids[item_name] = getattr(item, 'uuid')
+                pending.discard(item_name)
+                if not pending:
+                    break
+    return uuids
+
+
+def get_host_stats(hosts):
+    """Count the hosts of a segment by state in a single pass.
+
+    :param hosts: An iterable of hosts, either resources or dicts
+    :return: A dict with the number of hosts, reserved hosts, hosts on
+             maintenance and reserved hosts available for recovery
+    """
+    stats = dict.fromkeys(HOST_STATS_KEYS, 0)
+    for host in hosts:
+        if isinstance(host, dict):
+            reserved = host.get('reserved')
+            on_maintenance = host.get('on_maintenance')
+        else:
+            reserved = host.reserved
+            on_maintenance = host.on_maintenance
+        reserved = strutils.bool_from_string(reserved)
+        on_maintenance = strutils.bool_from_string(on_maintenance)
+        stats['hosts'] += 1
+        stats['reserved_hosts'] += reserved
+        stats['maintenance_hosts'] += on_maintenance
+        stats['available_reserved_hosts'] += reserved and not on_maintenance
+    return stats
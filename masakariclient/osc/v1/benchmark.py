@@ -0,0 +1,250 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import collections
+from concurrent import futures
+import itertools
+import logging
+import threading
+import time
+import uuid
+
+from osc_lib.command import command
+from osc_lib import exceptions
+from oslo_utils import timeutils
+
+from masakariclient.common import executor as masakariclient_executor
+from masakariclient.common.i18n import _
+from masakariclient.common import metrics
+from masakariclient.common import profiling
+import masakariclient.common.utils as masakariclient_utils
+
+# Get the logger of this module
+LOG = logging.getLogger(__name__)
+
+SCENARIOS = ('list-segments', 'show-host', 'create-notification')
+
+# Suffixes of the --duration option
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+BENCHMARK_COLUMNS = ['Scenario', 'Concurrency', 'Duration (s)', 'Requests',
+                     'Errors', 'Error Rate (%)', 'Throughput (req/s)',
+                     'Min (ms)', 'P50 (ms)', 'P95 (ms)', 'P99 (ms)',
+                     'Max (ms)', 'Error Details']
+
+
+def _parse_duration(value):
+    """Parse a duration in seconds, optionally suffixed by s, m or h."""
+    multiplier = DURATION_UNITS.get(value[-1:].lower())
+    number = value[:-1] if multiplier else value
+    try:
+        seconds = float(number) * (multiplier or 1)
+    except ValueError:
+        seconds = 0
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(
+            _('Invalid duration: %s, expected e.g. 30, 60s, 5m or 1h')
+            % value)
+    return seconds
+
+
+def _error_key(error):
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return 'HTTP %s' % status_code
+    return error.__class__.__name__
+
+
+class _Result(object):
+    """Requests made by a worker of a benchmark."""
+
+    def __init__(self):
+        self.latency = metrics.Histogram()
+        self.errors = collections.Counter()
+
+    def merge(self, other):
+        self.latency.merge(other.latency)
+        self.errors.update(other.errors)
+
+
+class Benchmark(profiling.ProfiledCommand, command.Lister):
+    """Measure the latency and throughput of Masakari API calls."""
+
+    def get_parser(self, prog_name):
+        parser = super(Benchmark, self).get_parser(prog_name)
+        parser.add_argument(
+            '--scenario',
+            metavar='<scenario>',
+            choices=SCENARIOS,
+            action='append',
+            required=True,
+            help=_('API call to benchmark, repeat to benchmark several '
+                   'calls one after the other. The supported options are: '
+                   '%s. create-notification creates real COMPUTE_HOST '
+                   'notifications of STARTED events for --host, which do '
+                   'not trigger any recovery.') % ', '.join(SCENARIOS)
+        )
+        parser.add_argument(
+            '--concurrency',
+            metavar='<concurrency>',
+            type=int,
+            default=masakariclient_executor.DEFAULT_CONCURRENCY,
+            help=_('Number of calls made in parallel, default %d.')
+            % masakariclient_executor.DEFAULT_CONCURRENCY
+        )
+        parser.add_argument(
+            '--duration',
+            metavar='<duration>',
+            type=_parse_duration,
+            default=60,
+            help=_('Duration of each scenario in seconds, or suffixed by s, '
+                   'm or h, default 60s.')
+        )
+        parser.add_argument(
+            '--requests',
+            metavar='<count>',
+            type=int,
+            help=_('Stop each scenario after this number of calls, even '
+                   'before the end of its duration.')
+        )
+        parser.add_argument(
+            '--segment',
+            metavar='<segment>',
+            help=_('Name or ID of the segment of --host, required by the '
+                   'show-host scenario.')
+        )
+        parser.add_argument(
+            '--host',
+            metavar='<host>',
+            help=_('Name or ID of the host shown by the show-host scenario, '
+                   'name of the host of the notifications of the '
+                   'create-notification scenario.')
+        )
+        parser.add_argument(
+            '--endpoint',
+            metavar='<url>',
+            help=_('Send the calls to this Masakari endpoint, e.g. a local '
+                   'fake server, instead of the one of the service '
+                   'catalog.')
+        )
+        return parser
+
+    def take_action(self, parsed_args):
+        masakari_client = self.app.client_manager.ha
+        if parsed_args.concurrency < 1:
+            raise exceptions.CommandError(
+                _('--concurrency must be at least 1.'))
+        if parsed_args.endpoint:
+            masakari_client.endpoint_override = parsed_args.endpoint
+
+        calls = [(scenario, self._prepare(masakari_client, scenario,
+                                          parsed_args))
+                 for scenario in parsed_args.scenario]
+        rows = []
+        for scenario, call in calls:
+            LOG.debug('Running the %s scenario', scenario)
+            started = time.monotonic()
+            result = _run(call, parsed_args.concurrency,
+                          parsed_args.duration, parsed_args.requests)
+            rows.append(_format_row(scenario, parsed_args.concurrency,
+                                    time.monotonic() - started, result))
+        return BENCHMARK_COLUMNS, rows
+
+    def _prepare(self, masakari_client, scenario, parsed_args):
+        """Return the call of a scenario, resolving its names beforehand."""
+        if scenario == 'list-segments':
+            return lambda: list(masakari_client.segments())
+
+        if not parsed_args.host:
+            raise exceptions.CommandError(
+                _('The %s scenario requires --host.') % scenario)
+
+        if scenario == 'show-host':
+            if not parsed_args.segment:
+                raise exceptions.CommandError(
+                    _('The show-host scenario requires --segment.'))
+            segment_id = masakariclient_utils.get_uuid_by_name(
+                masakari_client, parsed_args.segment)
+            host_id = masakariclient_utils.get_uuid_by_name(
+                masakari_client, parsed_args.host, segment=segment_id)
+            return lambda: masakari_client.get_host(host_id,
+                                                    segment_id=segment_id)
+
+        def _create_notification():
+            # Masakari rejects the notifications duplicating a recent one,
+            # so each payload is made unique.
+            return masakari_client.create_notification(
+                type='COMPUTE_HOST',
+                hostname=parsed_args.host,
+                generated_time=timeutils.utcnow().isoformat(),
+                payload={'event': 'STARTED',
+                         'host_status': 'NORMAL',
+                         'cluster_status': 'ONLINE',
+                         'benchmark_id': str(uuid.uuid4())})
+        return _create_notification
+
+
+def _run(call, concurrency, duration, max_requests=None):
+    """Call a function from concurrent workers until the duration ends."""
+    deadline = time.monotonic() + duration
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def _worker():
+        result = _Result()
+        while time.monotonic() < deadline:
+            if max_requests is not None:
+                with lock:
+                    if next(counter) >= max_requests:
+                        break
+            started = time.monotonic()
+            try:
+                call()
+            except Exception as e:
+                LOG.debug('Benchmark call failed: %s', e)
+                result.errors[_error_key(e)] += 1
+            else:
+                result.latency.add(time.monotonic() - started)
+        return result
+
+    total = _Result()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for result in pool.map(lambda _i: _worker(), range(concurrency)):
+            total.merge(result)
+    return total
+
+
+def _format_row(scenario, concurrency, elapsed, result):
+    latency = result.latency
+    errors = sum(result.errors.values())
+    requests = latency.count + errors
+
+    def _ms(value):
+        return round(value, 3) if value is not None else None
+
+    return (
+        scenario,
+        concurrency,
+        round(elapsed, 3),
+        requests,
+        errors,
+        round(100.0 * errors / requests, 2) if requests else 0.0,
+        round(requests / elapsed, 3) if elapsed else 0.0,
+        _ms(latency.min),
+        _ms(latency.percentile(50)),
+        _ms(latency.percentile(95)),
+        _ms(latency.percentile(99)),
+        _ms(latency.max),
+        ', '.join('%s: %d' % (key, count)
+                  for key, count in sorted(result.errors.items())),
+    )
@@ -13,20 +13,46 @@
 # limitations under the License.
 
 import logging
+import shlex
+# The --exec command of the operator runs without a shell
+import subprocess  # nosec B404
+import time
 
 from openstack import exceptions as sdk_exc
 from osc_lib.command import command
 from osc_lib import exceptions
 from osc_lib import utils
+from oslo_utils import timeutils
 
+from masakariclient.common import executor as masakariclient_executor
 from masakariclient.common.i18n import _
+from masakariclient.common import journal as masakariclient_journal
+from masakariclient.common import profiling
+from masakariclient.common import rows as masakariclient_rows
+from masakariclient.common import topology
 import masakariclient.common.utils as masakariclient_utils
 
 # Get the logger of this module
 LOG = logging.getLogger(__name__)
 
+# Attributes preserved when a host is moved to another segment
+MOVE_HOST_FIELDS = ('name', 'type', 'control_attributes', 'reserved',
+                    'on_maintenance')
 
-class ListHost(command.Lister):
+HOST_COLUMNS = [
+    'created_at',
+    'updated_at',
+    'uuid',
+    'name',
+    'type',
+    'control_attributes',
+    'reserved',
+    'on_maintenance',
+    'failover_segment_id',
+]
+
+
+class ListHost(profiling.ProfiledCommand, command.Lister):
     """List Hosts."""
 
     def get_parser(self, prog_name):
@@ -34,8 +60,18 @@ class ListHost(command.Lister):
         parser.add_argument(
             'segment_id',
             metavar='<segment_id>',
+            nargs='?',
             help=_('Name or ID of segment.')
         )
+        parser.add_argument(
+            '--all-segments',
+            action='store_true',
+            default=False,
+            help=_('List the hosts of all segments. The hosts of each '
+                   'segment are fetched in parallel, so --limit, --marker '
+                   'and --sort cannot be used.')
+        )
+        masakariclient_executor.add_arguments(parser)
         parser.add_argument(
             '--limit',
             metavar='<limit>',
@@ -65,27 +101,116 @@ class ListHost(command.Lister):
                    "'on_maintenance', 'reserved']"),
             action='append'
         )
+        masakariclient_utils.add_fields_argument(parser)
         return parser
 
     def take_action(self, parsed_args):
         masakari_client = self.app.client_manager.ha
-        segment_id = masakariclient_utils.get_uuid_by_name(
-            masakari_client, parsed_args.segment_id)
-
         columns = ['uuid', 'name', 'type', 'control_attributes', 'reserved',
                    'on_maintenance', 'failover_segment_id']
+        columns = masakariclient_utils.select_fields(columns,
+                                                     parsed_args.fields)
+
+        if parsed_args.all_segments:
+            if parsed_args.segment_id:
+                raise exceptions.CommandError(_(
+                    '<segment_id> and --all-segments are mutually '
+                    'exclusive.'))
+            # The hosts of the segments are merged in the completion order,
+            # so the paging and the sort of the API would only apply to
+            # each segment.
+            for option in ('marker', 'limit', 'sort'):
+                if getattr(parsed_args, option):
+                    raise exceptions.CommandError(_(
+                        '--%s cannot be used with --all-segments, use '
+                        '--sort-column to sort the hosts.') % option)
+            queries = masakariclient_utils.format_sort_filter_params(
+                parsed_args)
+            return (
+                ['segment_name'] + columns,
+                _list_all_segment_hosts(
+                    masakari_client, columns, queries,
+                    masakariclient_executor.BulkExecutor.from_args(
+                        parsed_args))
+            )
+
+        if not parsed_args.segment_id:
+            raise exceptions.CommandError(_(
+                'Either <segment_id> or --all-segments must be specified.'))
+
+        segment_id = masakariclient_utils.get_uuid_by_name(
+            masakari_client, parsed_args.segment_id)
 
         queries = masakariclient_utils.format_sort_filter_params(parsed_args)
-        hosts = masakari_client.hosts(segment_id, **queries)
         formatters = {}
         return (
             columns,
-            (utils.get_item_properties(p, columns, formatters=formatters)
-             for p in hosts)
+            masakariclient_rows.hosts(masakari_client, segment_id, columns,
+                                      formatters=formatters, **queries)
         )
 
 
-class ShowHost(command.ShowOne):
+class FindHost(profiling.ProfiledCommand, command.Lister):
+    """Find hosts by name across all segments."""
+
+    def get_parser(self, prog_name):
+        parser = super(FindHost, self).get_parser(prog_name)
+        parser.add_argument(
+            'host',
+            metavar='<name-or-pattern>',
+            help=_('Name of the host to find. Glob patterns such as '
+                   '"compute-1*" are supported.')
+        )
+        parser.add_argument(
+            '--prefix',
+            action='store_true',
+            default=False,
+            help=_('Find the hosts whose name starts with <name-or-pattern>.')
+        )
+        parser.add_argument(
+            '--cache-file',
+            metavar='<file>',
+            help=_('File caching the host index. The index is rebuilt when '
+                   'the file is missing or older than --cache-max-age.')
+        )
+        parser.add_argument(
+            '--cache-max-age',
+            metavar='<seconds>',
+            type=int,
+            default=300,
+            help=_('Maximum age in seconds of the cached host index '
+                   '(default: 300)')
+        )
+        masakariclient_executor.add_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        index = None
+        if parsed_args.cache_file:
+            index = topology.HostIndex.load(parsed_args.cache_file,
+                                            parsed_args.cache_max_age)
+        if index is None:
+            masakari_client = self.app.client_manager.ha
+            index = topology.HostIndex.from_topology(
+                topology.fetch_topology(
+                    masakari_client,
+                    executor=masakariclient_executor.BulkExecutor.from_args(
+                        parsed_args)))
+            if parsed_args.cache_file:
+                index.save(parsed_args.cache_file)
+
+        if parsed_args.prefix:
+            entries = index.prefix(parsed_args.host)
+        elif any(char in parsed_args.host for char in '*?['):
+            entries = index.glob(parsed_args.host)
+        else:
+            entries = index.exact(parsed_args.host)
+
+        columns = ['name', 'uuid', 'segment_name', 'failover_segment_id']
+        return columns, entries
+
+
+class ShowHost(profiling.ProfiledCommand, command.ShowOne):
     """Show host details."""
 
     def get_parser(self, prog_name):
@@ -98,22 +223,65 @@ class ShowHost(command.ShowOne):
         parser.add_argument(
             'host',
             metavar='<host>',
-            help='Name or ID of the Host',
+            nargs='+',
+            help=_('Name or ID of the Host(s). Several hosts are displayed '
+                   'as a table with host and status columns.'),
         )
+        masakariclient_utils.add_fields_argument(parser)
+        masakariclient_executor.add_arguments(parser)
         return parser
 
     def take_action(self, parsed_args):
         masakari_client = self.app.client_manager.ha
         segment_id = masakariclient_utils.get_uuid_by_name(
             masakari_client, parsed_args.segment_id)
-        uuid = masakariclient_utils.get_uuid_by_name(
+        uuids = masakariclient_utils.get_uuids_by_name(
             masakari_client,
             parsed_args.host,
             segment=segment_id)
-        return _show_host(masakari_client, segment_id, uuid)
-
-
-class CreateHost(command.ShowOne):
+        columns = masakariclient_utils.select_fields(HOST_COLUMNS,
+                                                     parsed_args.fields)
+        if len(parsed_args.host) == 1:
+            return _show_host(masakari_client, segment_id,
+                              uuids[parsed_args.host[0]], columns=columns)
+
+        def _get_host(host):
+            return _show_host(masakari_client, segment_id, uuids[host],
+                              columns=columns)[1]
+
+        executor = masakariclient_executor.BulkExecutor.from_args(parsed_args)
+        rows = _HostRows()
+        for host, row, error in executor.map(_get_host, parsed_args.host,
+                                             ordered=True):
+            # The host column identifies the rows whatever the fields
+            if error is not None:
+                row = (None,) * len(columns)
+                rows.failed += 1
+            rows.append(row + (host, 'ok' if error is None else str(error)))
+        return columns + ['host', 'status'], rows
+
+    def produce_output(self, parsed_args, column_names, data):
+        if not isinstance(data, _HostRows):
+            return super(ShowHost, self).produce_output(
+                parsed_args, column_names, data)
+
+        if not hasattr(self.formatter, 'emit_list'):
+            raise exceptions.CommandError(_(
+                'The %s format cannot display several hosts.')
+                % parsed_args.formatter)
+        with profiling.phase('format'):
+            columns, rows = _select_columns(column_names, data,
+                                            parsed_args.columns)
+            self.formatter.emit_list(columns, rows, self.app.stdout,
+                                     parsed_args)
+        if data.failed:
+            raise exceptions.CommandError(
+                _('%(failed)d of %(total)d hosts failed to show.')
+                % {'failed': data.failed, 'total': len(data)})
+        return 0
+
+
+class CreateHost(profiling.ProfiledCommand, command.ShowOne):
     """Create a Host."""
 
     def get_parser(self, prog_name):
@@ -180,7 +348,7 @@ class CreateHost(command.ShowOne):
                           host.uuid)
 
 
-class UpdateHost(command.ShowOne):
+class UpdateHost(profiling.ProfiledCommand, command.ShowOne):
     """Update a Host."""
 
     def get_parser(self, prog_name):
@@ -259,7 +427,7 @@ class UpdateHost(command.ShowOne):
         return _show_host(masakari_client, segment_id, uuid)
 
 
-class DeleteHost(command.Command):
+class DeleteHost(profiling.ProfiledCommand, command.Command):
     """Delete a host."""
 
     def get_parser(self, prog_name):
@@ -272,24 +440,519 @@ class DeleteHost(command.Command):
         parser.add_argument(
             'host',
             metavar='<host>',
-            help='Name or ID of the Host',
+            nargs='+',
+            help=_('Name or ID of the Host(s) to delete'),
         )
+        masakariclient_executor.add_arguments(parser)
+        masakariclient_journal.add_arguments(parser)
         return parser
 
     def take_action(self, parsed_args):
+        journal = masakariclient_journal.open_journal(parsed_args)
+        try:
+            return self._delete_hosts(parsed_args, journal)
+        finally:
+            if journal is not None:
+                journal.close()
+
+    def _delete_hosts(self, parsed_args, journal):
         masakari_client = self.app.client_manager.ha
+
+        def _host_key(host):
+            return 'host:%s:%s' % (parsed_args.segment_id, host)
+
+        hosts = parsed_args.host
+        if journal is not None:
+            hosts = journal.pending(hosts, _host_key)
+            if len(hosts) < len(parsed_args.host):
+                print('Skipping %d host(s) recorded in %s'
+                      % (len(parsed_args.host) - len(hosts),
+                         parsed_args.resume))
+            if not hosts:
+                return
+
         segment_id = masakariclient_utils.get_uuid_by_name(
             masakari_client, parsed_args.segment_id)
-        uuid = masakariclient_utils.get_uuid_by_name(
+        uuids = masakariclient_utils.get_uuids_by_name(
             masakari_client,
-            parsed_args.host,
+            hosts,
             segment=segment_id)
-        masakari_client.delete_host(
-            uuid, segment_id=segment_id, ignore_missing=False)
-        print('Host deleted: %s' % parsed_args.host)
+
+        def _delete_host(host):
+            masakari_client.delete_host(
+                uuids[host], segment_id=segment_id, ignore_missing=False)
+
+        executor = masakariclient_executor.BulkExecutor.from_args(parsed_args)
+        errors = []
+        for host, _result, error in executor.map(
+                _delete_host, hosts, ordered=True, idempotent=False):
+            if error is None:
+                if journal is not None:
+                    journal.record(_host_key(host), uuid=uuids[host])
+                print('Host deleted: %s' % host)
+            else:
+                LOG.error(_('Failed to delete host %(host)s: %(error)s'),
+                          {'host': host, 'error': error})
+                errors.append(error)
+
+        if len(parsed_args.host) == 1 and errors:
+            raise errors[0]
+        if errors:
+            raise exceptions.CommandError(
+                _('%(failed)d of %(total)d hosts failed to delete.')
+                % {'failed': len(errors), 'total': len(parsed_args.host)})
+
+
+def _list_all_segment_hosts(masakari_client, columns, queries, executor):
+    """Yield the host rows of every segment, prefixed by the segment name.
+
+    The segments are listed once, then the hosts of each segment are fetched
+    in parallel and streamed as soon as a segment has been fully read.
+    """
+    formatters = {}
+
+    def _segment_hosts(segment):
+        uuid, name = segment
+        return [(name,) + row for row in masakariclient_rows.hosts(
+            masakari_client, uuid, columns, formatters=formatters,
+            **queries)]
+
+    segments = masakariclient_rows.segments(masakari_client,
+                                            ['uuid', 'name'])
+    for _segment, rows in executor.run(_segment_hosts, segments):
+        yield from rows
+
+
+class MoveHost(profiling.ProfiledCommand, command.Lister):
+    """Move hosts from a segment to another."""
+
+    def get_parser(self, prog_name):
+        parser = super(MoveHost, self).get_parser(prog_name)
+        parser.add_argument(
+            'source_segment',
+            metavar='<source_segment>',
+            help=_('Name or ID of the segment to move the hosts from.')
+        )
+        parser.add_argument(
+            'destination_segment',
+            metavar='<destination_segment>',
+            help=_('Name or ID of the segment to move the hosts to.')
+        )
+        parser.add_argument(
+            'host',
+            metavar='<host>',
+            nargs='*',
+            help=_('Name or ID of the Host(s) to move.')
+        )
+        parser.add_argument(
+            '--filters',
+            metavar='<"key1=value1;key2=value2...">',
+            help=_("Move the hosts of the source segment matching these "
+                   "filters. This can be specified multiple times, or once "
+                   "with parameters separated by a semicolon. The valid "
+                   "filter keys are: ['type', 'on_maintenance', "
+                   "'reserved']"),
+            action='append'
+        )
+        masakariclient_journal.add_arguments(parser)
+        parser.add_argument(
+            '--rollback',
+            action='store_true',
+            default=False,
+            help=_('Recreate in their source segment the hosts of the '
+                   '--resume journal which were deleted but not created in '
+                   'the destination segment.')
+        )
+        masakariclient_executor.add_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        masakari_client = self.app.client_manager.ha
+        executor = masakariclient_executor.BulkExecutor.from_args(parsed_args)
+        columns = ['name', 'status']
+        if parsed_args.rollback:
+            if not parsed_args.resume:
+                raise exceptions.CommandError(_(
+                    '--rollback requires --resume.'))
+            journal = masakariclient_journal.open_journal(parsed_args)
+            return columns, _rollback_moves(masakari_client, journal,
+                                            executor)
+
+        if not parsed_args.host and not parsed_args.filters:
+            raise exceptions.CommandError(_(
+                'Either <host> or --filters must be specified.'))
+
+        uuids = masakariclient_utils.get_uuids_by_name(
+            masakari_client, [parsed_args.source_segment,
+                              parsed_args.destination_segment])
+        source_id = uuids[parsed_args.source_segment]
+        destination_id = uuids[parsed_args.destination_segment]
+
+        queries = masakariclient_utils._format_parameters(
+            parsed_args.filters)
+        hosts = _select_hosts(
+            masakari_client.hosts(source_id, **queries), parsed_args.host,
+            parsed_args.source_segment)
+
+        journal = masakariclient_journal.open_journal(parsed_args)
+
+        def _move(host):
+            return _move_host(masakari_client, host, source_id,
+                              destination_id, journal, executor)
+
+        # The API calls of a move are retried one by one, as a move is not
+        # idempotent.
+        return columns, _journaled_rows(
+            executor.map(_move, hosts, ordered=True, retry=False), journal)
+
+
+class RollingMaintenanceHost(profiling.ProfiledCommand, command.Command):
+    """Put the hosts of a segment on maintenance wave by wave."""
+
+    def get_parser(self, prog_name):
+        parser = super(RollingMaintenanceHost, self).get_parser(prog_name)
+        parser.add_argument(
+            'segment_id',
+            metavar='<segment_id>',
+            help=_('Name or ID of segment.')
+        )
+        parser.add_argument(
+            'host',
+            metavar='<host>',
+            nargs='*',
+            help=_('Name or ID of the Host(s) to put on maintenance, default '
+                   'all the hosts of the segment.')
+        )
+        parser.add_argument(
+            '--wave-size',
+            metavar='<size>',
+            type=int,
+            default=1,
+            help=_('Number of hosts put on maintenance at the same time '
+                   '(default: 1)')
+        )
+        parser.add_argument(
+            '--exec',
+            metavar='<command>',
+            dest='exec_command',
+            help=_('Command run for each wave once its hosts are on '
+                   'maintenance and their recoveries are over. The names of '
+                   'the hosts are appended to its arguments. The rollout '
+                   'stops if it fails.')
+        )
+        parser.add_argument(
+            '--keep-maintenance',
+            action='store_true',
+            default=False,
+            help=_('Leave the hosts on maintenance after their wave.')
+        )
+        masakariclient_journal.add_arguments(parser)
+        parser.add_argument(
+            '--poll-interval',
+            metavar='<seconds>',
+            type=float,
+            default=10,
+            help=_('Interval between two checks of the recovery '
+                   'notifications (default: 10)')
+        )
+        parser.add_argument(
+            '--timeout',
+            metavar='<seconds>',
+            type=float,
+            default=1800,
+            help=_('Maximum time to wait for the recoveries of a wave '
+                   '(default: 1800)')
+        )
+        masakariclient_executor.add_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        if parsed_args.wave_size < 1:
+            raise exceptions.CommandError(_(
+                '--wave-size must be a positive number.'))
+
+        masakari_client = self.app.client_manager.ha
+        executor = masakariclient_executor.BulkExecutor.from_args(parsed_args)
+        segment_id = masakariclient_utils.get_uuid_by_name(
+            masakari_client, parsed_args.segment_id)
+        hosts = _select_hosts(masakari_client.hosts(segment_id),
+                              parsed_args.host, parsed_args.segment_id)
+
+        state = masakariclient_journal.open_journal(parsed_args)
+        try:
+            if state is not None:
+                pending = state.pending(
+                    hosts, lambda host: 'host:%s' % host.name)
+                if len(pending) < len(hosts):
+                    print('Skipping %d host(s) recorded in %s'
+                          % (len(hosts) - len(pending), parsed_args.resume))
+                hosts = pending
+
+            # Hosts the operator put on maintenance, e.g. broken ones, are
+            # left alone. Those put on maintenance by an interrupted rollout
+            # are recorded in its journal and resumed.
+            on_maintenance = [
+                host for host in hosts if host.on_maintenance and (
+                    state is None or
+                    'maintenance:%s' % host.name not in state)]
+            if on_maintenance:
+                print('Skipping %d host(s) already on maintenance: %s'
+                      % (len(on_maintenance),
+                         ', '.join(host.name for host in on_maintenance)))
+                hosts = [host for host in hosts
+                         if host not in on_maintenance]
+
+            size = parsed_args.wave_size
+            waves = [hosts[i:i + size] for i in range(0, len(hosts), size)]
+            for number, wave in enumerate(waves, 1):
+                label = 'Wave %d/%d' % (number, len(waves))
+                self._run_wave(masakari_client, executor, segment_id, wave,
+                               label, parsed_args, state)
+                if state is not None:
+                    for host in wave:
+                        state.record('host:%s' % host.name, uuid=host.uuid)
+        finally:
+            if state is not None:
+                state.close()
+
+    def _run_wave(self, masakari_client, executor, segment_id, wave, label,
+                  parsed_args, state=None):
+        names = [host.name for host in wave]
+        since = timeutils.utcnow().strftime('%Y-%m-%dT%H:%M:%S')
+
+        if state is not None:
+            for host in wave:
+                state.record('maintenance:%s' % host.name, uuid=host.uuid)
+        _set_maintenance(masakari_client, executor, segment_id, wave, True,
+                         label)
+        print('%s: %s on maintenance' % (label, ', '.join(names)))
+
+        _wait_for_recoveries(masakari_client, executor, wave, since, label,
+                             parsed_args.poll_interval, parsed_args.timeout)
+
+        if parsed_args.exec_command:
+            print('%s: running %s' % (label, parsed_args.exec_command))
+            # The command is given by the operator and runs without a shell
+            result = subprocess.run(  # nosec B603
+                shlex.split(parsed_args.exec_command) + names)
+            if result.returncode:
+                raise exceptions.CommandError(
+                    _('%(label)s: %(command)s failed with exit code '
+                      '%(code)d. Fix the hosts, then restart with the same '
+                      '--resume journal.')
+                    % {'label': label, 'command': parsed_args.exec_command,
+                       'code': result.returncode})
+
+        if not parsed_args.keep_maintenance:
+            _set_maintenance(masakari_client, executor, segment_id, wave,
+                             False, label)
+        print('%s: done' % label)
+
+
+def _set_maintenance(masakari_client, executor, segment_id, hosts,
+                     on_maintenance, label):
+    def _update_host(host):
+        masakari_client.update_host(host.uuid, segment_id=segment_id,
+                                    on_maintenance=on_maintenance)
+
+    errors = ['%s: %s' % (host.name, error)
+              for host, _result, error in executor.map(_update_host, hosts,
+                                                       ordered=True)
+              if error is not None]
+    if errors:
+        raise exceptions.CommandError(
+            _('%(label)s: failed to update the hosts: %(errors)s')
+            % {'label': label, 'errors': '; '.join(errors)})
+
+
+def _wait_for_recoveries(masakari_client, executor, hosts, since, label,
+                         interval, timeout):
+    """Wait until no recovery notification of the hosts is in flight.
+
+    The notifications already in flight are listed once, then each poll
+    only lists the notifications generated since the previous poll and
+    gets the notifications still in flight.
+    """
+    def _list_notifications(**queries):
+        return executor.call(
+            lambda: list(masakari_client.notifications(**queries)))
+
+    host_ids = {host.uuid for host in hosts}
+    in_flight = set()
+    in_flight_statuses = masakariclient_utils.IN_FLIGHT_NOTIFICATION_STATUSES
+    for status in in_flight_statuses:
+        for notification in _list_notifications(status=status):
+            if notification.source_host_uuid in host_ids:
+                in_flight.add(notification.notification_uuid)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        for notification in _list_notifications(generated_since=since):
+            if (notification.source_host_uuid in host_ids and
+                    notification.status in in_flight_statuses):
+                in_flight.add(notification.notification_uuid)
+            if notification.generated_time and (
+                    notification.generated_time > since):
+                since = notification.generated_time
+
+        for uuid in sorted(in_flight):
+            notification = executor.call(masakari_client.get_notification,
+                                         uuid)
+            if notification.status == 'failed':
+                raise exceptions.CommandError(
+                    _('%(label)s: the recovery of notification %(uuid)s '
+                      'failed. Fix the hosts, then restart with the same '
+                      '--resume journal.') % {'label': label, 'uuid': uuid})
+            if notification.status not in in_flight_statuses:
+                in_flight.discard(uuid)
+
+        if not in_flight:
+            return
+        if time.monotonic() > deadline:
+            raise exceptions.CommandError(
+                _('%(label)s: timed out waiting for the recovery '
+                  'notifications %(uuids)s.')
+                % {'label': label, 'uuids': ', '.join(sorted(in_flight))})
+        print('%s: waiting for %d recovery notification(s)'
+              % (label, len(in_flight)))
+        time.sleep(interval)
+
+
+def _select_hosts(hosts, wanted, segment):
+    """Select hosts by name or ID.
+
+    :param hosts: An iterable of the hosts of the segment
+    :param wanted: Names or IDs of the hosts to select, default all
+    :param segment: Name or ID of the segment, for error messages
+    :return: The list of the selected hosts
+    """
+    hosts = list(hosts)
+    if not wanted:
+        return hosts
+
+    wanted = set(wanted)
+    hosts = [host for host in hosts
+             if host.name in wanted or host.uuid in wanted]
+    missing = wanted - {host.name for host in hosts} - {
+        host.uuid for host in hosts}
+    if missing:
+        raise exceptions.CommandError(
+            _('Hosts not found in segment %(segment)s: %(hosts)s')
+            % {'segment': segment, 'hosts': ', '.join(sorted(missing))})
+    return hosts
+
+
+def _journaled_rows(results, journal):
+    try:
+        for host, status, error in results:
+            if error is not None:
+                status = _('error: %s') % error
+            yield host.name, status
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+def _move_host(masakari_client, host, source_id, destination_id, journal,
+               executor):
+    """Move a host by deleting and recreating it, recording each step.
+
+    Host names are unique, so the host is deleted from the source segment
+    before being created in the destination one. When the creation fails,
+    the host is recreated in the source segment. The host stays in the
+    'deleting' state of the journal if that fails too, so that it can be
+    restored later with --rollback.
+
+    :return: The status of the move
+    """
+    key = 'host:%s' % host.name
+    if journal is not None and (
+            journal.get(key, {}).get('state') == 'moved'):
+        return 'moved'
+
+    attrs = masakariclient_utils.remove_unspecified_items(
+        {field: getattr(host, field) for field in MOVE_HOST_FIELDS})
+
+    def _record(state):
+        if journal is not None:
+            journal.record(key, state=state, source=source_id,
+                           destination=destination_id, attrs=attrs)
+
+    _record('deleting')
+    try:
+        executor.call(masakari_client.delete_host, host.uuid,
+                      segment_id=source_id, ignore_missing=False,
+                      idempotent=False)
+    except Exception as ex:
+        _record('in_source')
+        return _('error: %s') % ex
+
+    try:
+        executor.call(masakari_client.create_host,
+                      segment_id=destination_id, idempotent=False, **attrs)
+    except Exception as ex:
+        LOG.debug(_("Failed to create host %s in the destination segment"),
+                  host.name)
+        try:
+            executor.call(masakari_client.create_host, segment_id=source_id,
+                          idempotent=False, **attrs)
+        except Exception:
+            LOG.error(_('Host %s is neither in the source nor in the '
+                        'destination segment.'), host.name)
+            return _('error: %s (not restored)') % ex
+        _record('in_source')
+        return _('error: %s (restored in source)') % ex
+
+    _record('moved')
+    return 'moved'
+
+
+def _rollback_moves(masakari_client, journal, executor):
+    """Recreate the hosts deleted but not created by a failed move."""
+    orphans = [(key, data) for key, data in journal.items()
+               if data.get('state') == 'deleting']
+
+    def _restore(orphan):
+        key, data = orphan
+        masakari_client.create_host(segment_id=data['source'],
+                                    **data['attrs'])
+        journal.record(key, **dict(data, state='in_source'))
+
+    try:
+        for (key, data), _result, error in executor.map(
+                _restore, orphans, ordered=True, idempotent=False):
+            status = 'restored' if error is None else _('error: %s') % error
+            yield data['attrs']['name'], status
+    finally:
+        journal.close()
+
+
+class _HostRows(list):
+    """Rows of several hosts, displayed as a table by ShowHost."""
+
+    failed = 0
+
+
+def _select_columns(column_names, rows, requested):
+    """Return the columns and rows restricted to the -c columns, if any.
+
+    Like cliff, the columns keep their order and unknown ones are ignored,
+    unless none of them is known.
+    """
+    if not requested:
+        return list(column_names), rows
+    indexes = [index for index, column in enumerate(column_names)
+               if column in requested]
+    if not indexes:
+        raise exceptions.CommandError(
+            _('No recognized column names in %(requested)s. Recognized '
+              'columns are %(columns)s.')
+            % {'requested': requested, 'columns': list(column_names)})
+    return ([column_names[index] for index in indexes],
+            [[row[index] for index in indexes] for row in rows])
 
 
-def _show_host(masakari_client, segment_id, uuid):
+def _show_host(masakari_client, segment_id, uuid, columns=None):
     try:
         host = masakari_client.get_host(uuid, segment_id=segment_id)
     except sdk_exc.ResourceNotFound:
@@ -297,16 +960,6 @@ def _show_host(masakari_client, segment_id, uuid):
                                         ) % uuid)
 
     formatters = {}
-    columns = [
-        'created_at',
-        'updated_at',
-        'uuid',
-        'name',
-        'type',
-        'control_attributes',
-        'reserved',
-        'on_maintenance',
-        'failover_segment_id',
-    ]
+    columns = list(columns or HOST_COLUMNS)
     return columns, utils.get_dict_properties(host.to_dict(), columns,
                                               formatters=formatters)
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+import os
+
 from openstack import exceptions as sdk_exc
 from osc_lib.command import command
 from osc_lib import exceptions
@@ -19,11 +22,20 @@ from osc_lib import utils
 from oslo_serialization import jsonutils
 
 from masakariclient import api_versions
+from masakariclient.common import archive as masakariclient_archive
+from masakariclient.common import executor as masakariclient_executor
+from masakariclient.common import format_columns
 from masakariclient.common.i18n import _
+from masakariclient.common import profiling
+from masakariclient.common import rows as masakariclient_rows
+from masakariclient.common import stats as masakariclient_stats
 import masakariclient.common.utils as masakariclient_utils
 
+# Get the logger of this module
+LOG = logging.getLogger(__name__)
+
 
-class ListNotification(command.Lister):
+class ListNotification(profiling.ProfiledCommand, command.Lister):
     """List notifications."""
 
     def get_parser(self, prog_name):
@@ -57,6 +69,8 @@ class ListNotification(command.Lister):
                    "generated-since]"),
             action='append'
         )
+        masakariclient_utils.add_fields_argument(parser)
+        _add_payload_argument(parser)
         return parser
 
     def take_action(self, parsed_args):
@@ -64,17 +78,24 @@ class ListNotification(command.Lister):
         columns = ['notification_uuid', 'generated_time', 'status',
                    'type', 'source_host_uuid', 'payload']
 
+        columns = masakariclient_utils.select_fields(columns,
+                                                     parsed_args.fields)
         queries = masakariclient_utils.format_sort_filter_params(parsed_args)
-        notifications = masakari_client.notifications(**queries)
-        formatters = {}
+        formatters = format_columns.get_notification_formatters(
+            parsed_args.payload)
         return (
             columns,
-            (utils.get_item_properties(p, columns, formatters=formatters)
-             for p in notifications)
+            masakariclient_rows.notifications(
+                masakari_client, columns, formatters=formatters, **queries)
         )
 
+    def produce_output(self, parsed_args, column_names, data):
+        self.formatter = format_columns.streaming_formatter(self.formatter)
+        return super(ListNotification, self).produce_output(
+            parsed_args, column_names, data)
+
 
-class ShowNotification(command.ShowOne):
+class ShowNotification(profiling.ProfiledCommand, command.ShowOne):
     """Show notification details."""
 
     def get_parser(self, prog_name):
@@ -84,15 +105,19 @@ class ShowNotification(command.ShowOne):
             metavar='<notification>',
             help='UUID of notification to display',
         )
+        masakariclient_utils.add_fields_argument(parser)
+        _add_payload_argument(parser)
         return parser
 
     def take_action(self, parsed_args):
         masakari_client = self.app.client_manager.ha
         return _show_notification(masakari_client,
-                                  notification_uuid=parsed_args.notification)
+                                  notification_uuid=parsed_args.notification,
+                                  fields=parsed_args.fields,
+                                  payload=parsed_args.payload)
 
 
-class CreateNotification(command.ShowOne):
+class CreateNotification(profiling.ProfiledCommand, command.ShowOne):
     """Create notification."""
 
     def get_parser(self, prog_name):
@@ -136,14 +161,233 @@ class CreateNotification(command.ShowOne):
                                   notification.notification_uuid)
 
 
-def _show_notification(masakari_client, notification_uuid):
+class StatsNotification(profiling.ProfiledCommand, command.Lister):
+    """Report the recovery and evacuation times of notifications."""
+
+    def get_parser(self, prog_name):
+        parser = super(StatsNotification, self).get_parser(prog_name)
+        parser.add_argument(
+            '--filters',
+            metavar='<"key1=value1;key2=value2...">',
+            help=_("Filter parameters to apply on the notifications. "
+                   "This can be specified multiple times, or once with "
+                   "parameters separated by a semicolon. The valid filter "
+                   "keys are: ['source_host_uuid', 'type', 'status', "
+                   "generated-since]"),
+            action='append'
+        )
+        parser.add_argument(
+            '--group-by',
+            metavar='<key>',
+            choices=sorted(masakariclient_stats.GROUP_BY),
+            action='append',
+            default=[],
+            help=_('Also break the statistics down by this key, can be '
+                   'repeated. The supported options are: %s.')
+            % ', '.join(sorted(masakariclient_stats.GROUP_BY))
+        )
+        masakariclient_executor.add_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        masakari_client = self.app.client_manager.ha
+        queries = masakariclient_utils.format_queries(
+            filters=parsed_args.filters)
+        columns = masakariclient_stats.NOTIFICATION_COLUMNS
+        notifications = (
+            dict(zip(columns, row)) for row in
+            masakariclient_rows.notifications(masakari_client, columns,
+                                              **queries))
+        with_vmoves = masakariclient_utils.supports_microversion(
+            masakari_client, '1.3')
+
+        def _vmoves(notification):
+            if not with_vmoves or notification['type'] != 'COMPUTE_HOST':
+                return []
+            return [dict(zip(masakariclient_stats.VMOVE_COLUMNS, row))
+                    for row in masakariclient_rows.vmoves(
+                        masakari_client, notification['notification_uuid'],
+                        masakariclient_stats.VMOVE_COLUMNS)]
+
+        stats = masakariclient_stats.RecoveryStats(parsed_args.group_by)
+        executor = masakariclient_executor.BulkExecutor.from_args(parsed_args)
+        for notification, vmoves in executor.run(_vmoves, notifications):
+            stats.add(notification, vmoves)
+        LOG.debug('Computed the statistics of %d notifications',
+                  stats.notifications)
+        return masakariclient_stats.STATS_COLUMNS, stats.rows()
+
+
+class SyncNotificationArchive(profiling.ProfiledCommand, command.ShowOne):
+    """Copy the new notifications and their VM moves to a local archive."""
+
+    def get_parser(self, prog_name):
+        parser = super(SyncNotificationArchive, self).get_parser(prog_name)
+        _add_db_argument(parser)
+        masakariclient_executor.add_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        masakari_client = self.app.client_manager.ha
+        with masakariclient_archive.Archive(parsed_args.db) as archive:
+            stats = masakariclient_archive.sync(
+                masakari_client, archive,
+                executor=masakariclient_executor.BulkExecutor.from_args(
+                    parsed_args))
+            notifications, vmoves = archive.counts()
+        columns = ['db', 'generated_since', 'synced_notifications',
+                   'synced_vmoves', 'vmove_errors', 'notifications',
+                   'vmoves']
+        return columns, (parsed_args.db, stats['generated_since'],
+                         stats['notifications'], stats['vmoves'],
+                         stats['vmove_errors'], notifications, vmoves)
+
+
+class QueryNotificationArchive(profiling.ProfiledCommand, command.Lister):
+    """List the notifications or VM moves of a local archive."""
+
+    def get_parser(self, prog_name):
+        parser = super(QueryNotificationArchive, self).get_parser(prog_name)
+        _add_db_argument(parser)
+        parser.add_argument(
+            '--vmoves',
+            action='store_true',
+            default=False,
+            help=_('List the VM moves of the matching notifications instead '
+                   'of the notifications.')
+        )
+        parser.add_argument(
+            '--type',
+            metavar='<type>',
+            action='append',
+            help=_('Only list the notifications of this type. Can be '
+                   'repeated.')
+        )
+        parser.add_argument(
+            '--status',
+            metavar='<status>',
+            action='append',
+            help=_('Only list the notifications in this status. Can be '
+                   'repeated.')
+        )
+        parser.add_argument(
+            '--source-host-uuid',
+            metavar='<uuid>',
+            action='append',
+            help=_('Only list the notifications of this host. Can be '
+                   'repeated.')
+        )
+        parser.add_argument(
+            '--generated-since',
+            metavar='<time>',
+            help=_('Only list the notifications generated at or after this '
+                   'time, e.g. 2016-01-01T01:00:00')
+        )
+        parser.add_argument(
+            '--generated-until',
+            metavar='<time>',
+            help=_('Only list the notifications generated before this time, '
+                   'e.g. 2016-01-02')
+        )
+        parser.add_argument(
+            '--limit',
+            metavar='<limit>',
+            type=int,
+            help=_('Limit the number of rows returned')
+        )
+        parser.add_argument(
+            '--sort',
+            metavar='<key>[:<direction>]',
+            help=_('Sorting option which is a string containing a list of '
+                   'fields separated by commas. Each field can be optionally '
+                   'appended by a sort direction (:asc or :desc). Default '
+                   'the newest notifications first.')
+        )
+        masakariclient_utils.add_fields_argument(parser)
+        _add_payload_argument(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        filters = {
+            'type': parsed_args.type,
+            'status': parsed_args.status,
+            'source_host_uuid': parsed_args.source_host_uuid,
+            'generated_since': parsed_args.generated_since,
+            'generated_until': parsed_args.generated_until,
+        }
+        queries = masakariclient_utils.format_queries(sort=parsed_args.sort)
+        sort = list(zip(queries.get('sort_key', []),
+                        queries.get('sort_dir', [])))
+
+        if not os.path.exists(parsed_args.db):
+            raise exceptions.CommandError(
+                _('Archive not found: %s') % parsed_args.db)
+        archive = masakariclient_archive.Archive(parsed_args.db,
+                                                 readonly=True)
+        if parsed_args.vmoves:
+            columns = ['notification_uuid', 'uuid', 'server_id',
+                       'server_name', 'source_host', 'dest_host',
+                       'start_time', 'end_time', 'type', 'status']
+            if parsed_args.fields:
+                columns = masakariclient_utils.select_fields(
+                    list(masakariclient_archive.VMOVE_COLUMNS),
+                    parsed_args.fields)
+            rows = archive.query_vmoves(columns, filters=filters, sort=sort,
+                                        limit=parsed_args.limit)
+        else:
+            columns = ['notification_uuid', 'generated_time', 'status',
+                       'type', 'source_host_uuid', 'payload']
+            if parsed_args.fields:
+                columns = masakariclient_utils.select_fields(
+                    list(masakariclient_archive.NOTIFICATION_COLUMNS),
+                    parsed_args.fields)
+            rows = archive.query_notifications(
+                columns, filters=filters, sort=sort, limit=parsed_args.limit,
+                formatters=format_columns.get_notification_formatters(
+                    parsed_args.payload))
+        return columns, _closing(rows, archive)
+
+
+def _closing(rows, archive):
+    """Yield rows, closing the archive once they are consumed."""
+    try:
+        yield from rows
+    finally:
+        archive.close()
+
+
+def _add_db_argument(parser):
+    parser.add_argument(
+        '--db',
+        metavar='<file>',
+        required=True,
+        help=_('SQLite database of the archive. "archive sync" creates it '
+               'if needed.')
+    )
+
+
+def _add_payload_argument(parser):
+    parser.add_argument(
+        '--payload',
+        metavar='<mode>',
+        choices=format_columns.PAYLOAD_MODES,
+        default='summary',
+        help=_('Rendering of the payload and recovery workflow details in '
+               'the table, value and csv formats: summary (default) for a '
+               'one-line summary, full for the whole JSON. The json and '
+               'yaml formats always show them in full.')
+    )
+
+
+def _show_notification(masakari_client, notification_uuid, fields=None,
+                       payload='summary'):
     try:
         notification = masakari_client.get_notification(notification_uuid)
     except sdk_exc.ResourceNotFound:
         raise exceptions.CommandError(_('Notification not found: %s'
                                         ) % notification_uuid)
 
-    formatters = {}
+    formatters = format_columns.get_notification_formatters(payload)
     columns = [
         'created_at',
         'updated_at',
@@ -161,5 +405,6 @@ def _show_notification(masakari_client, notification_uuid):
         if api_version >= api_versions.APIVersion("1.1"):
             columns.append('recovery_workflow_details')
 
+    columns = masakariclient_utils.select_fields(columns, fields)
     return columns, utils.get_dict_properties(notification.to_dict(), columns,
                                               formatters=formatters)
@@ -12,23 +12,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
 import logging
+import sys
+import time
 
 from openstack import exceptions as sdk_exc
 from osc_lib.command import command
 from osc_lib import exceptions
 from osc_lib import utils
 from oslo_utils import strutils
+from oslo_utils import uuidutils
 
 from masakariclient import api_versions
+from masakariclient.common import executor as masakariclient_executor
 from masakariclient.common.i18n import _
+from masakariclient.common import journal as masakariclient_journal
+from masakariclient.common import profiling
+from masakariclient.common import rows as masakariclient_rows
+from masakariclient.common import topology
 import masakariclient.common.utils as masakariclient_utils
 
 # Get the logger of this module
 LOG = logging.getLogger(__name__)
 
+# Recovery methods relying on reserved hosts to evacuate the instances
+RESERVED_HOST_RECOVERY_METHODS = ('reserved_host', 'rh_priority')
 
-class ListSegment(command.Lister):
+
+class ListSegment(profiling.ProfiledCommand, command.Lister):
     """List segments."""
 
     def get_parser(self, prog_name):
@@ -62,6 +74,32 @@ class ListSegment(command.Lister):
                    "keys are: ['recovery_method', 'service_type']"),
             action='append'
         )
+        parser.add_argument(
+            '--with-host-stats',
+            action='store_true',
+            default=False,
+            help=_('Add the number of hosts, reserved hosts, hosts on '
+                   'maintenance and available reserved hosts of each '
+                   'segment. The hosts of the segments are fetched in '
+                   'parallel.')
+        )
+        parser.add_argument(
+            '--cache-file',
+            metavar='<file>',
+            help=_('File caching the host counts of --with-host-stats per '
+                   'segment. The hosts of a segment are fetched again when '
+                   'its counts are missing or older than --cache-max-age.')
+        )
+        parser.add_argument(
+            '--cache-max-age',
+            metavar='<seconds>',
+            type=int,
+            default=300,
+            help=_('Maximum age in seconds of the cached host counts '
+                   '(default: 300)')
+        )
+        masakariclient_utils.add_fields_argument(parser)
+        masakariclient_executor.add_arguments(parser)
         return parser
 
     def take_action(self, parsed_args):
@@ -76,16 +114,32 @@ class ListSegment(command.Lister):
                 columns.append('is_enabled')
 
         queries = masakariclient_utils.format_sort_filter_params(parsed_args)
-        segments = masakari_client.segments(**queries)
         formatters = {}
+        if parsed_args.with_host_stats:
+            all_columns = columns + list(masakariclient_utils.HOST_STATS_KEYS)
+            selected = masakariclient_utils.select_fields(all_columns,
+                                                          parsed_args.fields)
+            rows = _list_segments_with_host_stats(
+                masakari_client, masakari_client.segments(**queries),
+                columns,
+                masakariclient_executor.BulkExecutor.from_args(parsed_args),
+                cache_file=parsed_args.cache_file,
+                cache_max_age=parsed_args.cache_max_age)
+            if selected != all_columns:
+                indexes = [all_columns.index(column) for column in selected]
+                rows = (tuple(row[i] for i in indexes) for row in rows)
+            return selected, rows
+
+        columns = masakariclient_utils.select_fields(columns,
+                                                     parsed_args.fields)
         return (
             columns,
-            (utils.get_item_properties(p, columns, formatters=formatters)
-             for p in segments)
+            masakariclient_rows.segments(masakari_client, columns,
+                                         formatters=formatters, **queries)
         )
 
 
-class ShowSegment(command.ShowOne):
+class ShowSegment(profiling.ProfiledCommand, command.ShowOne):
     """Show segment details."""
 
     def get_parser(self, prog_name):
@@ -95,16 +149,18 @@ class ShowSegment(command.ShowOne):
             metavar='<segment>',
             help='Segment to display (name or ID)',
         )
+        masakariclient_utils.add_fields_argument(parser)
         return parser
 
     def take_action(self, parsed_args):
         masakari_client = self.app.client_manager.ha
         uuid = masakariclient_utils.get_uuid_by_name(
             masakari_client, parsed_args.segment)
-        return _show_segment(masakari_client, segment_uuid=uuid)
+        return _show_segment(masakari_client, segment_uuid=uuid,
+                             fields=parsed_args.fields)
 
 
-class CreateSegment(command.ShowOne):
+class CreateSegment(profiling.ProfiledCommand, command.ShowOne):
     """Create segment."""
 
     def get_parser(self, prog_name):
@@ -169,7 +225,7 @@ class CreateSegment(command.ShowOne):
                              segment.uuid)
 
 
-class UpdateSegment(command.ShowOne):
+class UpdateSegment(profiling.ProfiledCommand, command.ShowOne):
     """Update a segment."""
 
     def get_parser(self, prog_name):
@@ -247,7 +303,7 @@ class UpdateSegment(command.ShowOne):
         return _show_segment(masakari_client, uuid)
 
 
-class DeleteSegment(command.Command):
+class DeleteSegment(profiling.ProfiledCommand, command.Command):
     """Delete a segment(s)."""
 
     def get_parser(self, prog_name):
@@ -258,21 +314,582 @@ class DeleteSegment(command.Command):
             nargs='+',
             help=_('Name or ID of segment(s) to delete')
         )
+        parser.add_argument(
+            '--cascade',
+            action='store_true',
+            default=False,
+            help=_('Delete the hosts of the segment(s) first. The hosts are '
+                   'deleted in parallel.')
+        )
+        masakariclient_executor.add_arguments(parser)
+        masakariclient_journal.add_arguments(parser)
         return parser
 
     def take_action(self, parsed_args):
         masakari_client = self.app.client_manager.ha
-        for sid in parsed_args.segment:
+        journal = masakariclient_journal.open_journal(parsed_args)
+        segments = parsed_args.segment
+        try:
+            if journal is not None:
+                segments = journal.pending(
+                    segments, lambda sid: 'segment:%s' % sid)
+                if len(segments) < len(parsed_args.segment):
+                    print('Skipping %d segment(s) recorded in %s'
+                          % (len(parsed_args.segment) - len(segments),
+                             parsed_args.resume))
+            if parsed_args.cascade:
+                # Masakari refuses to delete a host while a recovery is
+                # using it, which is reported as a conflict.
+                executor = masakariclient_executor.BulkExecutor.from_args(
+                    parsed_args, retry_on=(409,), backoff=1)
+                return _delete_segments_cascade(masakari_client, segments,
+                                                executor, journal)
+            for sid in segments:
+                try:
+                    uuid = masakariclient_utils.get_uuid_by_name(
+                        masakari_client, sid)
+                    masakari_client.delete_segment(uuid, False)
+                    print('Segment deleted: %s' % sid)
+                except Exception as ex:
+                    print(ex)
+                    continue
+                if journal is not None:
+                    journal.record('segment:%s' % sid, uuid=uuid)
+        finally:
+            if journal is not None:
+                journal.close()
+
+
+class ListSegmentCapacity(profiling.ProfiledCommand, command.Lister):
+    """Report the failover capacity of reserved host segments."""
+
+    def get_parser(self, prog_name):
+        parser = super(ListSegmentCapacity, self).get_parser(prog_name)
+        parser.add_argument(
+            '--failures',
+            metavar='<failures>',
+            type=int,
+            default=1,
+            help=_('Number of simultaneous host failures each segment must '
+                   'be able to absorb (default: 1)')
+        )
+        parser.add_argument(
+            '--at-risk',
+            action='store_true',
+            default=False,
+            help=_('Only report the segments which cannot absorb the '
+                   'given number of failures.')
+        )
+        parser.add_argument(
+            '--from-snapshot',
+            metavar='<file>',
+            help=_('Compute the capacity from a topology snapshot exported '
+                   'by "segment export" instead of querying the API.')
+        )
+        masakariclient_executor.add_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        if parsed_args.failures < 0:
+            raise exceptions.CommandError(_(
+                '--failures must not be negative.'))
+
+        columns = ['uuid', 'name', 'recovery_method'] + list(
+            masakariclient_utils.HOST_STATS_KEYS) + ['headroom', 'at_risk']
+
+        if parsed_args.from_snapshot:
+            segments = (
+                segment for segment in
+                topology.read_snapshot(parsed_args.from_snapshot)
+                if segment.get('recovery_method') in
+                RESERVED_HOST_RECOVERY_METHODS)
+        else:
+            masakari_client = self.app.client_manager.ha
+            segments = topology.fetch_topology(
+                masakari_client,
+                segments=[
+                    segment for segment in masakari_client.segments()
+                    if segment.recovery_method in
+                    RESERVED_HOST_RECOVERY_METHODS],
+                executor=masakariclient_executor.BulkExecutor.from_args(
+                    parsed_args))
+
+        return (
+            columns,
+            _get_segment_capacity(segments, parsed_args.failures,
+                                  parsed_args.at_risk)
+        )
+
+
+class ExportSegment(profiling.ProfiledCommand, command.Command):
+    """Export segments and their hosts to a topology snapshot."""
+
+    def get_parser(self, prog_name):
+        parser = super(ExportSegment, self).get_parser(prog_name)
+        parser.add_argument(
+            'file',
+            metavar='<file>',
+            help=_('File to write the line-delimited JSON snapshot to, or '
+                   '"-" for the standard output.')
+        )
+        masakariclient_executor.add_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        masakari_client = self.app.client_manager.ha
+        segments = topology.fetch_topology(
+            masakari_client,
+            executor=masakariclient_executor.BulkExecutor.from_args(
+                parsed_args))
+        if parsed_args.file == '-':
+            counts = topology.write_snapshot(segments, sys.stdout)
+            out = sys.stderr
+        else:
+            with open(parsed_args.file, 'w') as snapshot:
+                counts = topology.write_snapshot(segments, snapshot)
+            out = sys.stdout
+        print('Exported %d segment(s) and %d host(s)' % counts, file=out)
+
+
+class ImportSegment(profiling.ProfiledCommand, command.Lister):
+    """Import segments and their hosts from a topology snapshot."""
+
+    def get_parser(self, prog_name):
+        parser = super(ImportSegment, self).get_parser(prog_name)
+        parser.add_argument(
+            'file',
+            metavar='<file>',
+            help=_('Topology snapshot written by "segment export".')
+        )
+        masakariclient_executor.add_arguments(parser)
+        masakariclient_journal.add_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        masakari_client = self.app.client_manager.ha
+        with_enabled = masakariclient_utils.supports_microversion(
+            masakari_client, '1.2')
+        journal = masakariclient_journal.open_journal(parsed_args)
+        executor = masakariclient_executor.BulkExecutor.from_args(parsed_args)
+
+        def _import(segment):
+            return _import_segment(masakari_client, segment, journal,
+                                   with_enabled, executor)
+
+        def _rows():
             try:
-                uuid = masakariclient_utils.get_uuid_by_name(
-                    masakari_client, sid)
-                masakari_client.delete_segment(uuid, False)
-                print('Segment deleted: %s' % sid)
-            except Exception as ex:
-                print(ex)
+                # The API calls of a segment are retried one by one, so a
+                # failure does not import the segment again.
+                for segment, result, error in executor.map(
+                        _import, topology.read_snapshot(parsed_args.file),
+                        retry=False):
+                    if error is not None:
+                        LOG.debug(_("Failed to import segment: %s"),
+                                  segment['name'])
+                        yield (segment['name'], None, 0,
+                               _('error: %s') % error)
+                        continue
+                    yield (segment['name'],) + result + ('imported',)
+            finally:
+                if journal is not None:
+                    journal.close()
+
+        return ['name', 'uuid', 'hosts', 'status'], _rows()
+
+
+def _import_segment(masakari_client, segment, journal, with_enabled,
+                    executor):
+    """Create a segment and its hosts, skipping those already journaled.
+
+    :return: The uuid of the segment and the number of hosts created
+    """
+    key = 'segment:%s' % segment['name']
+    done = journal.get(key) if journal is not None else None
+    if done:
+        uuid = done['uuid']
+    else:
+        attrs = {
+            'name': segment['name'],
+            'description': segment.get('description'),
+            'recovery_method': segment.get('recovery_method'),
+            'service_type': segment.get('service_type'),
+        }
+        if with_enabled:
+            attrs['is_enabled'] = segment.get('is_enabled')
+        attrs = masakariclient_utils.remove_unspecified_items(attrs)
+        uuid = executor.call(masakari_client.create_segment,
+                             idempotent=False, **attrs).uuid
+        if journal is not None:
+            journal.record(key, uuid=uuid)
+
+    created = 0
+    for host in segment['hosts']:
+        host_key = 'host:%s:%s' % (segment['name'], host['name'])
+        if journal is not None and host_key in journal:
+            continue
+        attrs = masakariclient_utils.remove_unspecified_items(
+            {field: host.get(field) for field in
+             ('name', 'type', 'control_attributes', 'reserved',
+              'on_maintenance')})
+        executor.call(masakari_client.create_host, segment_id=uuid,
+                      idempotent=False, **attrs)
+        if journal is not None:
+            journal.record(host_key)
+        created += 1
+    return uuid, created
+
+
+class CloneSegment(profiling.ProfiledCommand, command.Lister):
+    """Clone a segment along with its hosts."""
+
+    def get_parser(self, prog_name):
+        parser = super(CloneSegment, self).get_parser(prog_name)
+        parser.add_argument(
+            'segment',
+            metavar='<segment>',
+            help=_('Name or ID of the segment to clone.')
+        )
+        parser.add_argument(
+            'name',
+            metavar='<new-name>',
+            help=_('Name of the new segment.')
+        )
+        parser.add_argument(
+            '--host-name-map',
+            metavar='<old-name>=<new-name>',
+            action='append',
+            help=_('Name of the copy of a host in the new segment. This can '
+                   'be specified multiple times, or once with mappings '
+                   'separated by a semicolon. Host names are unique, so the '
+                   'hosts without a new name are not cloned.')
+        )
+        masakariclient_executor.add_arguments(parser)
+        masakariclient_journal.add_arguments(parser)
+        return parser
+
+    def take_action(self, parsed_args):
+        started = time.time()
+        masakari_client = self.app.client_manager.ha
+        host_names = masakariclient_utils._format_parameters(
+            parsed_args.host_name_map)
+        # The segment is listed to resolve a name
+        requests = 0 if uuidutils.is_uuid_like(parsed_args.segment) else 1
+
+        uuid = masakariclient_utils.get_uuid_by_name(
+            masakari_client, parsed_args.segment)
+        try:
+            segment = masakari_client.get_segment(uuid)
+        except sdk_exc.ResourceNotFound:
+            raise exceptions.CommandError(_('Segment is not found: %s'
+                                            ) % uuid)
+        hosts = list(masakari_client.hosts(uuid))
+        requests += 2
 
+        attrs = {
+            'name': parsed_args.name,
+            'description': segment.description,
+            'recovery_method': segment.recovery_method,
+            'service_type': segment.service_type,
+        }
+        if masakariclient_utils.supports_microversion(masakari_client, '1.2'):
+            attrs['is_enabled'] = segment.is_enabled
+        attrs = masakariclient_utils.remove_unspecified_items(attrs)
+        journal = masakariclient_journal.open_journal(parsed_args)
+        try:
+            rows, new_uuid, calls = self._clone(
+                masakari_client, parsed_args, attrs, hosts, host_names,
+                journal)
+        finally:
+            if journal is not None:
+                journal.close()
+        requests += calls
+
+        print('Segment %(segment)s cloned to %(name)s (%(uuid)s) in '
+              '%(elapsed).2fs with %(requests)d requests'
+              % {'segment': parsed_args.segment, 'name': parsed_args.name,
+                 'uuid': new_uuid,
+                 'elapsed': time.time() - started, 'requests': requests},
+              file=sys.stderr)
+        return ['source_host', 'name', 'status'], rows
+
+    def _clone(self, masakari_client, parsed_args, attrs, hosts, host_names,
+               journal):
+        """Create the new segment and the copies of the hosts.
+
+        :return: The rows of the hosts, the uuid of the new segment and the
+                 number of API calls made
+        """
+        calls = 0
+        key = 'segment:%s' % parsed_args.name
+        done = journal.get(key) if journal is not None else None
+        if done:
+            new_uuid = done['uuid']
+        else:
+            new_uuid = masakari_client.create_segment(**attrs).uuid
+            calls += 1
+            if journal is not None:
+                journal.record(key, uuid=new_uuid)
+
+        def _clone_host(host):
+            attrs = masakariclient_utils.remove_unspecified_items({
+                'name': host_names[host.name],
+                'type': host.type,
+                'control_attributes': host.control_attributes,
+                'reserved': host.reserved,
+                'on_maintenance': host.on_maintenance,
+            })
+            masakari_client.create_host(segment_id=new_uuid, **attrs)
+
+        def _host_key(host):
+            return 'host:%s' % host_names[host.name]
+
+        rows = [(host.name, None, 'skipped') for host in hosts
+                if host.name not in host_names]
+        cloned = [host for host in hosts if host.name in host_names]
+        if journal is not None:
+            rows.extend((host.name, host_names[host.name], 'recorded')
+                        for host in cloned if _host_key(host) in journal)
+            cloned = journal.pending(cloned, _host_key)
+        executor = masakariclient_executor.BulkExecutor.from_args(parsed_args)
+        for host, _result, error in executor.map(_clone_host, cloned,
+                                                 ordered=True,
+                                                 idempotent=False):
+            if error is not None:
+                rows.append((host.name, host_names[host.name],
+                             _('error: %s') % error))
+                continue
+            if journal is not None:
+                journal.record(_host_key(host))
+            rows.append((host.name, host_names[host.name], 'created'))
+        return rows, new_uuid, calls + executor.stats['calls']
+
+
+class ApplySegment(profiling.ProfiledCommand, command.Lister):
+    """Converge segments and hosts to a desired topology."""
+
+    def get_parser(self, prog_name):
+        parser = super(ApplySegment, self).get_parser(prog_name)
+        parser.add_argument(
+            'file',
+            metavar='<file>',
+            help=_('YAML file describing the desired segments and their '
+                   'hosts.')
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            default=False,
+            help=_('Only show the changes which would be made.')
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            default=False,
+            help=_('Delete the segments, and their hosts, which are not '
+                   'described in <file>.')
+        )
+        masakariclient_executor.add_arguments(parser)
+        return parser
 
-def _show_segment(masakari_client, segment_uuid):
+    def take_action(self, parsed_args):
+        masakari_client = self.app.client_manager.ha
+        desired = topology.read_desired_topology(parsed_args.file)
+
+        if not masakariclient_utils.supports_microversion(masakari_client,
+                                                          '1.2'):
+            for segment in desired:
+                segment.pop('is_enabled', None)
+
+        desired_names = {segment.get('name') for segment in desired}
+        segments = [segment for segment in masakari_client.segments()
+                    if parsed_args.prune or segment.name in desired_names]
+        executor = masakariclient_executor.BulkExecutor.from_args(parsed_args)
+        current = list(topology.fetch_topology(
+            masakari_client, segments=segments, executor=executor))
+        plan = topology.compute_plan(current, desired,
+                                     prune=parsed_args.prune)
+
+        columns = ['action', 'resource', 'segment', 'name', 'changes',
+                   'status']
+        if parsed_args.dry_run:
+            return columns, [_format_change(change, 'planned')
+                             for change in plan]
+
+        segment_ids = {segment['name']: segment['uuid']
+                       for segment in current}
+
+        def _apply(change):
+            _apply_change(masakari_client, change, segment_ids)
+
+        rows = []
+        # The changes of a phase only depend on the changes of the previous
+        # phases, so each phase runs in parallel.
+        for _phase, changes in itertools.groupby(plan, _change_phase):
+            changes = list(changes)
+            # The creations and deletions are not retried on gateway errors
+            idempotent = all(change.action == 'update' for change in changes)
+            for change, _result, error in executor.map(
+                    _apply, changes, ordered=True, idempotent=idempotent):
+                status = 'done'
+                if error is not None:
+                    LOG.debug(_("Failed to %(action)s %(resource)s: "
+                                "%(name)s"), change._asdict())
+                    status = _('error: %s') % error
+                rows.append(_format_change(change, status))
+        return columns, rows
+
+
+def _change_phase(change):
+    if change.resource == 'segment':
+        return 3 if change.action == 'delete' else 0
+    return 1 if change.action == 'delete' else 2
+
+
+def _format_change(change, status):
+    if change.action == 'update':
+        changes = ', '.join('%s: %s -> %s' % (key, change.previous[key],
+                                              value)
+                            for key, value in sorted(change.attrs.items()))
+    else:
+        changes = ', '.join('%s=%s' % (key, value)
+                            for key, value in sorted(change.attrs.items())
+                            if key != 'name')
+    return (change.action, change.resource, change.segment, change.name,
+            changes, status)
+
+
+def _apply_change(masakari_client, change, segment_ids):
+    """Apply a change computed by topology.compute_plan."""
+    if change.resource == 'segment':
+        if change.action == 'create':
+            segment = masakari_client.create_segment(**change.attrs)
+            segment_ids[change.segment] = segment.uuid
+        elif change.action == 'update':
+            masakari_client.update_segment(segment=change.uuid,
+                                           **change.attrs)
+        else:
+            masakari_client.delete_segment(change.uuid, False)
+        return
+
+    segment_id = segment_ids.get(change.segment)
+    if segment_id is None:
+        raise exceptions.CommandError(_('Segment %s was not created.')
+                                      % change.segment)
+    if change.action == 'create':
+        masakari_client.create_host(segment_id=segment_id, **change.attrs)
+    elif change.action == 'update':
+        masakari_client.update_host(change.uuid, segment_id=segment_id,
+                                    **change.attrs)
+    else:
+        masakari_client.delete_host(change.uuid, segment_id=segment_id,
+                                    ignore_missing=False)
+
+
+def _get_segment_capacity(segments, failures, at_risk_only):
+    """Yield the capacity rows of the given segment dicts."""
+    for segment in segments:
+        stats = masakariclient_utils.get_host_stats(segment['hosts'])
+        headroom = stats['available_reserved_hosts'] - failures
+        at_risk = headroom < 0
+        if at_risk_only and not at_risk:
+            continue
+        yield (
+            (segment.get('uuid'), segment.get('name'),
+             segment.get('recovery_method')) +
+            tuple(stats[key]
+                  for key in masakariclient_utils.HOST_STATS_KEYS) +
+            (headroom, at_risk)
+        )
+
+
+def _list_segments_with_host_stats(masakari_client, segments, columns,
+                                   executor, cache_file=None,
+                                   cache_max_age=None):
+    """Yield the segment rows followed by the host counts of each segment.
+
+    With a cache file, the hosts are only fetched for the segments whose
+    cached counts are missing or older than cache_max_age seconds.
+    """
+    cache = None
+    if cache_file:
+        cache = topology.HostStatsCache.load(cache_file)
+
+    def _host_stats(segment):
+        if cache is not None:
+            stats = cache.get(segment.uuid, cache_max_age)
+            if stats is not None:
+                return stats
+        stats = masakariclient_utils.get_host_stats(
+            masakari_client.hosts(segment.uuid))
+        if cache is not None:
+            cache.set(segment.uuid, stats)
+        return stats
+
+    formatters = {}
+    try:
+        for segment, stats in executor.run(_host_stats, segments,
+                                           ordered=True):
+            yield utils.get_item_properties(
+                segment, columns, formatters=formatters) + tuple(
+                stats[key] for key in masakariclient_utils.HOST_STATS_KEYS)
+    finally:
+        if cache is not None:
+            cache.save(cache_file)
+
+
+def _delete_segments_cascade(masakari_client, segments, executor, journal):
+    """Delete segments along with their hosts.
+
+    The names of the segments are resolved in one pass, their hosts are
+    listed and deleted in parallel, then the segments whose hosts are all
+    deleted are deleted in parallel. The deleted hosts and segments are
+    recorded in the journal, if any.
+    """
+    uuids = masakariclient_utils.get_uuids_by_name(masakari_client, segments)
+
+    def _list_hosts(sid):
+        return list(masakari_client.hosts(uuids[sid]))
+
+    failed = set()
+    deletions = []
+    for sid, hosts, error in executor.map(_list_hosts, segments,
+                                          ordered=True):
+        if error is not None:
+            print(error)
+            failed.add(sid)
+            continue
+        deletions.extend((sid, host) for host in hosts)
+
+    def _delete_host(deletion):
+        sid, host = deletion
+        masakari_client.delete_host(host.uuid, segment_id=uuids[sid],
+                                    ignore_missing=True)
+
+    for (sid, host), _result, error in executor.map(_delete_host,
+                                                    deletions):
+        if error is not None:
+            print(error)
+            failed.add(sid)
+            continue
+        if journal is not None:
+            journal.record('host:%s:%s' % (sid, host.name), uuid=host.uuid)
+        print('Host deleted: %s (segment %s)' % (host.name, sid))
+
+    def _delete_segment(sid):
+        masakari_client.delete_segment(uuids[sid], False)
+
+    for sid, _result, error in executor.map(
+            _delete_segment, [sid for sid in segments if sid not in failed],
+            idempotent=False):
+        if error is not None:
+            print(error)
+            continue
+        if journal is not None:
+            journal.record('segment:%s' % sid, uuid=uuids[sid])
+        print('Segment deleted: %s' % sid)
+
+
+def _show_segment(masakari_client, segment_uuid, fields=None):
     try:
         segment = masakari_client.get_segment(segment_uuid)
     except sdk_exc.ResourceNotFound:
@@ -297,5 +914,6 @@ def _show_segment(masakari_client, segment_uuid):
         if api_version >= api_versions.APIVersion("1.2"):
             columns.append('is_enabled')
 
+    columns = masakariclient_utils.select_fields(columns, fields)
     return columns, utils.get_dict_properties(segment.to_dict(), columns,
                                               formatters=formatters)
@@ -12,21 +12,33 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import logging
+import sys
+import time
 
 from openstack import exceptions as sdk_exc
 from osc_lib.command import command
 from osc_lib import exceptions
 from osc_lib import utils
 
+from masakariclient.common import executor as masakariclient_executor
 from masakariclient.common.i18n import _
+from masakariclient.common import profiling
+from masakariclient.common import rows as masakariclient_rows
 import masakariclient.common.utils as masakariclient_utils
 
 # Get the logger of this module
 LOG = logging.getLogger(__name__)
 
+VMOVE_COLUMNS = ['uuid', 'server_id', 'server_name', 'source_host',
+                 'dest_host', 'start_time', 'end_time', 'type', 'status']
 
-class ListVMove(command.Lister):
+# Statuses of the VM moves which are not over yet
+IN_FLIGHT_VMOVE_STATUSES = ('pending', 'ongoing')
+
+
+class ListVMove(profiling.ProfiledCommand, command.Lister):
     """List VMoves."""
 
     def get_parser(self, prog_name):
@@ -64,28 +76,62 @@ class ListVMove(command.Lister):
                    "keys are: ['type', 'status'"),
             action='append'
         )
+        masakariclient_utils.add_fields_argument(parser)
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            default=False,
+            help=_('Poll the vmoves and report their progress until the '
+                   'notification reaches a final status, then list them by '
+                   'start and end time.')
+        )
+        parser.add_argument(
+            '--poll-interval',
+            metavar='<seconds>',
+            type=float,
+            default=10,
+            help=_('Interval between two polls of --watch (default: 10)')
+        )
+        parser.add_argument(
+            '--timeout',
+            metavar='<seconds>',
+            type=float,
+            default=1800,
+            help=_('Maximum time to watch the vmoves (default: 1800)')
+        )
+        masakariclient_executor.add_arguments(parser)
         return parser
 
     def take_action(self, parsed_args):
         masakari_client = self.app.client_manager.ha
 
-        columns = ['uuid', 'server_id', 'server_name',
-                   'source_host', 'dest_host',
-                   'start_time', 'end_time',
-                   'type', 'status']
+        columns = masakariclient_utils.select_fields(
+            list(VMOVE_COLUMNS), parsed_args.fields)
+        if parsed_args.watch:
+            if (parsed_args.limit or parsed_args.marker or
+                    parsed_args.sort or parsed_args.filters):
+                raise exceptions.CommandError(_(
+                    '--watch cannot be used with --limit, --marker, --sort '
+                    'or --filters.'))
+            vmoves = _watch_vmoves(
+                masakari_client,
+                masakariclient_executor.BulkExecutor.from_args(parsed_args),
+                parsed_args.notification_id, parsed_args.poll_interval,
+                parsed_args.timeout)
+            return columns, ([vmove[column] for column in columns]
+                             for vmove in vmoves)
 
         queries = masakariclient_utils.format_sort_filter_params(parsed_args)
-        vmoves = masakari_client.vmoves(parsed_args.notification_id,
-                                        **queries)
         formatters = {}
         return (
             columns,
-            (utils.get_item_properties(p, columns, formatters=formatters)
-             for p in vmoves)
+            masakariclient_rows.vmoves(masakari_client,
+                                       parsed_args.notification_id, columns,
+                                       formatters=formatters, **queries)
         )
 
 
-class ShowVMove(command.ShowOne):
+class ShowVMove(profiling.ProfiledCommand, command.ShowOne):
     """Show vmove details."""
 
     def get_parser(self, prog_name):
@@ -100,15 +146,16 @@ class ShowVMove(command.ShowOne):
             metavar='<vmove_id>',
             help='UUID of the VMove',
         )
+        masakariclient_utils.add_fields_argument(parser)
         return parser
 
     def take_action(self, parsed_args):
         masakari_client = self.app.client_manager.ha
         return _show_vmove(masakari_client, parsed_args.notification_id,
-                           parsed_args.vmove_id)
+                           parsed_args.vmove_id, fields=parsed_args.fields)
 
 
-def _show_vmove(masakari_client, notification_id, vmove_id):
+def _show_vmove(masakari_client, notification_id, vmove_id, fields=None):
     try:
         vmove = masakari_client.get_vmove(vmove_id, notification_id)
     except sdk_exc.ResourceNotFound:
@@ -130,5 +177,119 @@ def _show_vmove(masakari_client, notification_id, vmove_id):
         'status',
         'message'
     ]
+    columns = masakariclient_utils.select_fields(columns, fields)
     return columns, utils.get_dict_properties(vmove.to_dict(), columns,
                                               formatters=formatters)
+
+
+def _format_eta(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return '%dh%02dm' % (hours, minutes)
+    if minutes:
+        return '%dm%02ds' % (minutes, seconds)
+    return '%ds' % seconds
+
+
+def _format_progress(notification, vmoves, done_rate):
+    """Return a line summarizing the progress of the vmoves."""
+    statuses = collections.Counter(vmove['status'] for vmove in vmoves)
+    in_flight = sum(statuses[status] for status in IN_FLIGHT_VMOVE_STATUSES)
+    done = len(vmoves) - in_flight
+    line = (_('Notification %(uuid)s %(status)s: %(done)d/%(total)d vmoves '
+              'done') % {'uuid': notification.notification_uuid,
+                         'status': notification.status, 'done': done,
+                         'total': len(vmoves)})
+    details = ['%d %s' % (statuses[status], status)
+               for status in sorted(statuses)]
+    if details:
+        line += ' (%s)' % ', '.join(details)
+    if in_flight:
+        if done_rate:
+            line += _(', ETA %s') % _format_eta(in_flight / done_rate)
+        else:
+            line += _(', ETA unknown')
+    return line
+
+
+def _watch_vmoves(masakari_client, executor, notification_id, interval,
+                  timeout, stream=None):
+    """Poll the vmoves of a notification until its recovery is over.
+
+    The vmoves are listed once, then each poll only lists the vmoves still
+    in flight, and gets the ones which are no longer listed as such to read
+    their final status. A last full listing reconciles the vmoves once the
+    notification reached a final status.
+
+    :param stream: The stream the progress is written to, default the
+                   standard error
+    :return: The vmoves as dicts of :data:`VMOVE_COLUMNS`, sorted by start
+             and end time
+    """
+    stream = stream or sys.stderr
+
+    def _list(**queries):
+        return executor.call(lambda: {
+            row[0]: dict(zip(VMOVE_COLUMNS, row))
+            for row in masakariclient_rows.vmoves(
+                masakari_client, notification_id, VMOVE_COLUMNS, **queries)})
+
+    def _get(uuid):
+        vmove = masakari_client.get_vmove(uuid, notification_id)
+        return {column: getattr(vmove, column, None)
+                for column in VMOVE_COLUMNS}
+
+    def _done(vmoves):
+        return sum(1 for vmove in vmoves.values()
+                   if vmove['status'] not in IN_FLIGHT_VMOVE_STATUSES)
+
+    try:
+        notification = executor.call(masakari_client.get_notification,
+                                     notification_id)
+    except sdk_exc.ResourceNotFound:
+        raise exceptions.CommandError(_('Notification not found: %s')
+                                      % notification_id)
+    vmoves = _list()
+    started = time.monotonic()
+    deadline = started + timeout
+    done_at_start = _done(vmoves)
+    in_flight_statuses = masakariclient_utils.IN_FLIGHT_NOTIFICATION_STATUSES
+
+    while True:
+        elapsed = time.monotonic() - started
+        done_rate = ((_done(vmoves) - done_at_start) / elapsed
+                     if elapsed > 0 else 0)
+        print(_format_progress(notification, list(vmoves.values()),
+                               done_rate), file=stream)
+        if notification.status not in in_flight_statuses:
+            break
+        if time.monotonic() + interval > deadline:
+            raise exceptions.CommandError(
+                _('Timed out watching the vmoves of notification %s.')
+                % notification_id)
+        time.sleep(interval)
+
+        notification = executor.call(masakari_client.get_notification,
+                                     notification_id)
+        if notification.status not in in_flight_statuses:
+            vmoves = _list()
+            continue
+        in_flight = [uuid for uuid, vmove in vmoves.items()
+                     if vmove['status'] in IN_FLIGHT_VMOVE_STATUSES]
+        listed = {}
+        for status in IN_FLIGHT_VMOVE_STATUSES:
+            listed.update(_list(status=status))
+        vmoves.update(listed)
+        for uuid, vmove, error in executor.map(
+                _get, [uuid for uuid in in_flight if uuid not in listed]):
+            if error is not None:
+                LOG.debug('Failed to get vmove %(uuid)s: %(error)s',
+                          {'uuid': uuid, 'error': error})
+                continue
+            vmoves[uuid] = vmove
+
+    def _key(vmove):
+        return (vmove['start_time'] is None, vmove['start_time'] or '',
+                vmove['end_time'] is None, vmove['end_time'] or '')
+    return sorted(vmoves.values(), key=_key)
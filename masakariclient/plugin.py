@@ -17,6 +17,9 @@ import logging
 from openstack.connection import Connection
 from osc_lib import utils
 
+from masakariclient.common import metrics
+from masakariclient.common import profiling
+
 LOG = logging.getLogger(__name__)
 
 DEFAULT_HA_API_VERSION = '1.3'
@@ -42,6 +45,12 @@ def make_client(instance):
                      interface=instance.interface,
                      region_name=instance.region_name,
                      ha_api_version=instance._api_version[API_NAME])
+    # The hooks only record the responses while --ha-profile or
+    # --ha-metrics is active
+    hooks = instance.session.session.hooks['response']
+    for hook in (profiling.response_hook, metrics.response_hook):
+        if hook not in hooks:
+            hooks.append(hook)
     return con.instance_ha
 
 
@@ -56,4 +65,40 @@ def build_option_parser(parser):
         help='ha API version, default=' +
              DEFAULT_HA_API_VERSION +
              ' (Env: OS_HA_API_VERSION)')
+    parser.add_argument(
+        '--ha-profile',
+        action='store_true',
+        default=utils.env('OS_HA_PROFILE'),
+        help='Print to stderr the time spent by ha commands in auth, name '
+             'resolution and formatting, and the time, number and bytes of '
+             'the HTTP requests of each (Env: OS_HA_PROFILE)')
+    parser.add_argument(
+        '--ha-profile-dump',
+        metavar='<file>',
+        default=utils.env('OS_HA_PROFILE_DUMP'),
+        help='With --ha-profile, dump the cProfile statistics of ha '
+             'commands to <file>, readable with pstats '
+             '(Env: OS_HA_PROFILE_DUMP)')
+    parser.add_argument(
+        '--ha-memprofile',
+        action='store_true',
+        default=utils.env('OS_HA_MEMPROFILE'),
+        help='Trace the memory allocations of ha commands with tracemalloc '
+             'and print to stderr their peak memory, top allocation sites '
+             'and memory retained per row (Env: OS_HA_MEMPROFILE)')
+    parser.add_argument(
+        '--ha-metrics',
+        metavar='<file>',
+        default=utils.env('OS_HA_METRICS'),
+        help='Write to <file> the JSON metrics of the API requests of ha '
+             'commands: per-endpoint latency histograms and percentiles, '
+             'status codes and response sizes (Env: OS_HA_METRICS)')
+    parser.add_argument(
+        '--ha-metrics-interval',
+        metavar='<seconds>',
+        type=float,
+        default=utils.env('OS_HA_METRICS_INTERVAL'),
+        help='With --ha-metrics, also write the metrics every <seconds> '
+             'during long-running commands, default only at the end '
+             '(Env: OS_HA_METRICS_INTERVAL)')
     return parser
@@ -13,9 +13,23 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from unittest import mock
+
 from oslotest import base
 
 
 class TestCase(base.BaseTestCase):
 
     """Test case base class for all unit tests."""
+
+
+def fake_list_response(resources_key, records, links=None):
+    """Return a fake response of a listing of the Masakari API."""
+    def _json():
+        body = {resources_key: [dict(record) for record in records]}
+        if links is not None:
+            body['%s_links' % resources_key] = links
+        return body
+
+    return mock.Mock(status_code=200, headers={}, links={},
+                     json=mock.Mock(side_effect=_json))
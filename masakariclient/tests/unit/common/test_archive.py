@@ -0,0 +1,216 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sqlite3
+from unittest import mock
+
+import fixtures
+
+from masakariclient.common import archive
+from masakariclient.common import exception as exc
+from masakariclient.common import executor
+from masakariclient.tests import base
+
+
+def _notification(uuid, generated_time, status='finished',
+                  type='COMPUTE_HOST', host='host-uuid-1'):
+    return {'notification_uuid': uuid, 'generated_time': generated_time,
+            'status': status, 'type': type, 'source_host_uuid': host,
+            'payload': {'event': 'STOPPED'}}
+
+
+def _vmove(uuid, server):
+    return {'uuid': uuid, 'instance_uuid': server, 'instance_name': server,
+            'source_host': 'host-1', 'dest_host': 'host-2',
+            'start_time': '2024-01-01T00:01:00.000000',
+            'end_time': '2024-01-01T00:02:00.000000',
+            'status': 'succeeded', 'type': 'evacuation'}
+
+
+class FakeAPI(object):
+    """Answer the listings of notifications and VM moves."""
+
+    def __init__(self, notifications, vmoves, failing=()):
+        self.notifications = notifications
+        self.vmoves = vmoves
+        self.failing = set(failing)
+        self.calls = []
+
+    def get(self, uri, params=None, **kwargs):
+        self.calls.append((uri, params))
+        if uri == '/notifications':
+            since = params.get('generated-since', '')
+            return base.fake_list_response('notifications', [
+                n for n in self.notifications
+                if n['generated_time'] >= since])
+        notification_uuid = uri.split('/')[2]
+        if notification_uuid in self.failing:
+            return mock.Mock(status_code=500, headers={},
+                             json=mock.Mock(return_value={}))
+        return base.fake_list_response(
+            'vmoves', self.vmoves.get(notification_uuid, []))
+
+
+class TestArchive(base.TestCase):
+
+    def setUp(self):
+        super(TestArchive, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'archive.sqlite')
+        self.api = FakeAPI(
+            [_notification('n1', '2024-01-01T00:00:00.000000'),
+             _notification('n2', '2024-01-02T00:00:00.000000', type='VM',
+                           host='host-uuid-2'),
+             _notification('n3', '2024-01-03T00:00:00.000000',
+                           status='running')],
+            {'n1': [_vmove('v1', 'vm-1'), _vmove('v2', 'vm-2')],
+             'n3': [_vmove('v3', 'vm-3')]})
+        self.manager = mock.Mock(default_microversion='1.3',
+                                 get=mock.Mock(side_effect=self.api.get))
+
+    def _sync(self):
+        with archive.Archive(self.path) as db:
+            return archive.sync(self.manager, db,
+                                executor=executor.BulkExecutor(retries=0))
+
+    def test_sync(self):
+        stats = self._sync()
+
+        self.assertEqual({'generated_since': None, 'notifications': 3,
+                          'vmoves': 3, 'vmove_errors': 0}, stats)
+        self.assertEqual(
+            ('/notifications',
+             {'sort_key': ['generated_time'], 'sort_dir': ['asc']}),
+            self.api.calls[0])
+        self.assertEqual(
+            ['/notifications/n1/vmoves', '/notifications/n3/vmoves'],
+            sorted(uri for uri, _params in self.api.calls[1:]))
+
+        with archive.Archive(self.path) as db:
+            self.assertEqual((3, 3), db.counts())
+            self.assertEqual(
+                [('n3', 'running', {'event': 'STOPPED'}),
+                 ('n2', 'finished', {'event': 'STOPPED'}),
+                 ('n1', 'finished', {'event': 'STOPPED'})],
+                list(db.query_notifications(
+                    ['notification_uuid', 'status', 'payload'])))
+            self.assertEqual(
+                [('n3', 'vm-3'), ('n1', 'vm-1'), ('n1', 'vm-2')],
+                list(db.query_vmoves(['notification_uuid', 'server_id'])))
+
+    def test_sync_incremental(self):
+        self._sync()
+        self.api.notifications[2]['status'] = 'finished'
+        self.api.notifications.append(
+            _notification('n4', '2024-01-04T00:00:00.000000', type='VM'))
+        del self.api.calls[:]
+
+        stats = self._sync()
+
+        # The running notification is fetched again along with the new one
+        self.assertEqual({'generated_since': '2024-01-03T00:00:00.000000',
+                          'notifications': 2, 'vmoves': 1,
+                          'vmove_errors': 0}, stats)
+        self.assertEqual('2024-01-03T00:00:00.000000',
+                         self.api.calls[0][1]['generated-since'])
+        with archive.Archive(self.path) as db:
+            self.assertEqual('2024-01-04T00:00:00.000000',
+                             db.high_water_mark())
+            self.assertEqual(
+                [('n3', 'finished')],
+                list(db.query_notifications(['notification_uuid', 'status'],
+                                            filters={'type': ['COMPUTE_HOST'],
+                                                     'generated_since':
+                                                     '2024-01-02'})))
+
+    def test_sync_keeps_vmoves_of_final_notifications(self):
+        self.api.notifications.append(
+            _notification('n4', '2024-01-04T00:00:00.000000'))
+        self.api.vmoves['n4'] = [_vmove('v4', 'vm-4')]
+        self._sync()
+        del self.api.calls[:]
+
+        stats = self._sync()
+
+        # n4 is fetched again after the running n3, but not its VM moves
+        self.assertEqual(2, stats['notifications'])
+        self.assertEqual(['/notifications/n3/vmoves'],
+                         [uri for uri, _params in self.api.calls[1:]])
+
+        self.api.notifications[2]['status'] = 'finished'
+        del self.api.calls[:]
+        self._sync()
+
+        # The VM moves of n3 are fetched once more once it is finished
+        self.assertEqual(['/notifications/n3/vmoves'],
+                         [uri for uri, _params in self.api.calls[1:]])
+        with archive.Archive(self.path) as db:
+            self.assertEqual([], db.pending_vmoves())
+            self.assertEqual((4, 4), db.counts())
+
+    def test_open_readonly(self):
+        self._sync()
+
+        with archive.Archive(self.path, readonly=True) as db:
+            self.assertEqual((3, 3), db.counts())
+            self.assertRaises(sqlite3.OperationalError, db.add_notification,
+                              ('n5', None, None, None, None, None, None,
+                               None))
+
+    def test_open_readonly_not_archive(self):
+        self.assertRaises(exc.CommandError, archive.Archive, self.path,
+                          readonly=True)
+        self.assertFalse(os.path.exists(self.path))
+
+        open(self.path, 'w').close()
+        self.assertRaises(exc.CommandError, archive.Archive, self.path,
+                          readonly=True)
+        self.assertEqual(0, os.path.getsize(self.path))
+
+    def test_sync_retries_failed_vmoves(self):
+        self.api.failing.add('n1')
+
+        stats = self._sync()
+
+        self.assertEqual(1, stats['vmove_errors'])
+        self.api.failing.clear()
+        del self.api.calls[:]
+        stats = self._sync()
+
+        # n1 is fetched again although it is older than the high-water mark
+        self.assertEqual(0, stats['vmove_errors'])
+        self.assertIn(('/notifications/n1/vmoves', {}), self.api.calls)
+        with archive.Archive(self.path) as db:
+            self.assertEqual(
+                [('v1',), ('v2',)],
+                list(db.query_vmoves(['uuid'], sort=[('uuid', 'asc')],
+                                     filters={'source_host_uuid':
+                                              ['host-uuid-1'],
+                                              'generated_until':
+                                              '2024-01-02'})))
+
+    def test_sync_without_vmoves_microversion(self):
+        self.manager.default_microversion = '1.2'
+
+        stats = self._sync()
+
+        self.assertEqual(3, stats['notifications'])
+        self.assertEqual(0, stats['vmoves'])
+        self.assertEqual(1, len(self.api.calls))
+
+    def test_query_unknown_field(self):
+        with archive.Archive(self.path) as db:
+            self.assertRaises(exc.CommandError, db.query_notifications,
+                              ['notification_uuid; DROP TABLE vmoves'])
+            self.assertRaises(exc.CommandError, db.query_vmoves, ['uuid'],
+                              sort=[('unknown', 'asc')])
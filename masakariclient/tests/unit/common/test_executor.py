@@ -0,0 +1,189 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import fixtures
+from keystoneauth1 import exceptions as ks_exc
+from openstack import exceptions as sdk_exc
+from oslotest import base
+
+from masakariclient.common import exception as exc
+from masakariclient.common import executor
+
+
+def _http_error(status_code, retry_after=None):
+    response = mock.Mock(status_code=status_code, headers={})
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return sdk_exc.HttpException(response=response, http_status=status_code)
+
+
+class TestBulkExecutor(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestBulkExecutor, self).setUp()
+        self.sleep = self.useFixture(
+            fixtures.MockPatch('time.sleep')).mock
+
+    def test_call_retries_temporary_failures(self):
+        func = mock.Mock(side_effect=[_http_error(503),
+                                      ks_exc.ConnectFailure(), 'result'])
+        bulk = executor.BulkExecutor()
+
+        self.assertEqual('result', bulk.call(func, 'item'))
+        self.assertEqual(3, func.call_count)
+        self.assertEqual(2, bulk.stats['retries'])
+        self.assertEqual(2, self.sleep.call_count)
+
+    def test_call_does_not_retry_other_failures(self):
+        func = mock.Mock(side_effect=_http_error(409))
+        bulk = executor.BulkExecutor()
+
+        self.assertRaises(sdk_exc.HttpException, bulk.call, func)
+        self.assertEqual(1, func.call_count)
+
+    def test_call_retries_additional_status_codes(self):
+        func = mock.Mock(side_effect=[_http_error(409), None])
+        bulk = executor.BulkExecutor(retry_on=(409,))
+
+        bulk.call(func)
+        self.assertEqual(2, func.call_count)
+
+    def test_call_gives_up_after_retries(self):
+        func = mock.Mock(side_effect=_http_error(502))
+        bulk = executor.BulkExecutor(retries=2)
+
+        self.assertRaises(sdk_exc.HttpException, bulk.call, func)
+        self.assertEqual(3, func.call_count)
+        self.assertEqual(1, bulk.stats['failed'])
+
+    def test_call_honours_retry_after(self):
+        func = mock.Mock(side_effect=[_http_error(429, retry_after='7'),
+                                      None])
+        bulk = executor.BulkExecutor()
+
+        bulk.call(func)
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_call_caps_retry_after(self):
+        func = mock.Mock(side_effect=[_http_error(503, retry_after='3600'),
+                                      None])
+        bulk = executor.BulkExecutor(max_backoff=30)
+
+        bulk.call(func)
+        self.sleep.assert_called_once_with(30)
+
+    def test_call_not_idempotent(self):
+        # A gateway error or a lost connection may hide a creation
+        for error in (_http_error(502), _http_error(504),
+                      ks_exc.ConnectFailure()):
+            func = mock.Mock(side_effect=[error, None])
+            bulk = executor.BulkExecutor()
+
+            self.assertRaises(type(error), bulk.call, func, 'item',
+                              idempotent=False)
+            func.assert_called_once_with('item')
+
+    def test_call_not_idempotent_retries_unprocessed(self):
+        func = mock.Mock(side_effect=[_http_error(429), _http_error(503),
+                                      _http_error(409), 'result'])
+        bulk = executor.BulkExecutor(retry_on=(409,))
+
+        self.assertEqual('result', bulk.call(func, idempotent=False))
+        self.assertEqual(4, func.call_count)
+
+    def test_map_not_idempotent(self):
+        func = mock.Mock(side_effect=_http_error(504))
+        bulk = executor.BulkExecutor()
+
+        (item, result, error), = bulk.map(func, ['item'], idempotent=False)
+
+        self.assertIsInstance(error, sdk_exc.HttpException)
+        func.assert_called_once_with('item')
+
+    def test_backoff_is_bounded(self):
+        bulk = executor.BulkExecutor(backoff=1, max_backoff=4)
+        for attempt in range(10):
+            delay = bulk._get_delay(_http_error(503), attempt)
+            self.assertTrue(0 <= delay <= 4)
+
+    def test_throttling_halves_concurrency(self):
+        bulk = executor.BulkExecutor(concurrency=16, backoff=0)
+        self.assertEqual(8, bulk.limit)
+
+        bulk._on_throttle()
+        self.assertEqual(4, bulk.limit)
+        self.assertEqual(1, bulk.stats['throttled'])
+
+    def test_successes_increase_concurrency(self):
+        bulk = executor.BulkExecutor(concurrency=4)
+        self.assertEqual(2, bulk.limit)
+
+        for _i in range(10):
+            bulk.call(mock.Mock())
+        self.assertEqual(4, bulk.limit)
+
+    def test_circuit_opens_after_persistent_failures(self):
+        func = mock.Mock(side_effect=_http_error(503))
+        bulk = executor.BulkExecutor(retries=0, failure_threshold=2)
+
+        for _i in range(2):
+            self.assertRaises(sdk_exc.HttpException, bulk.call, func)
+        self.assertRaises(exc.CircuitOpen, bulk.call, func)
+        self.assertEqual(2, func.call_count)
+
+    def test_deadline_exceeded(self):
+        monotonic = self.useFixture(
+            fixtures.MockPatch('time.monotonic', return_value=100)).mock
+        func = mock.Mock()
+        bulk = executor.BulkExecutor(deadline=10)
+
+        bulk.call(func)
+        monotonic.return_value = 111
+        self.assertRaises(exc.DeadlineExceeded, bulk.call, func)
+        self.assertEqual(1, func.call_count)
+
+    def test_map(self):
+        def _double(item):
+            if item == 3:
+                raise ValueError(item)
+            return item * 2
+
+        bulk = executor.BulkExecutor(concurrency=2)
+        results = list(bulk.map(_double, iter(range(5)), ordered=True))
+
+        self.assertEqual([0, 1, 2, 3, 4], [item for item, _r, _e in results])
+        self.assertEqual([0, 2, 4, None, 8],
+                         [result for _i, result, _e in results])
+        self.assertIsInstance(results[3][2], ValueError)
+
+    def test_map_without_retry(self):
+        func = mock.Mock(side_effect=_http_error(503))
+        bulk = executor.BulkExecutor()
+
+        results = list(bulk.map(func, ['item'], retry=False))
+        self.assertEqual(1, func.call_count)
+        self.assertIsInstance(results[0][2], sdk_exc.HttpException)
+        self.assertEqual(0, bulk.stats['calls'])
+
+    def test_run_raises_first_error(self):
+        bulk = executor.BulkExecutor()
+
+        self.assertRaises(ValueError, list,
+                          bulk.run(mock.Mock(side_effect=ValueError), [1]))
+
+    def test_report(self):
+        bulk = executor.BulkExecutor(concurrency=4)
+        bulk.call(mock.Mock())
+
+        self.assertIn('1 of 1 calls succeeded', bulk.report())
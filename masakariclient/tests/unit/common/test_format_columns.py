@@ -0,0 +1,107 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import io
+
+from cliff.formatters import json_format
+from cliff.formatters import table
+from oslotest import base
+
+from masakariclient.common import format_columns
+
+RECOVERY_WORKFLOW_DETAILS = [
+    {'name': 'DisableComputeNodeTask', 'state': 'SUCCESS', 'progress': 1.0,
+     'progress_details': []},
+    {'name': 'PrepareHAEnabledInstancesTask', 'state': 'RUNNING',
+     'progress': 0.5, 'progress_details': []},
+]
+
+
+class TestFormatColumns(base.BaseTestCase):
+
+    def test_summarize_payload(self):
+        self.assertEqual(
+            'event=STOPPED, host_status=NORMAL, cluster_status=OFFLINE',
+            format_columns.summarize_payload(
+                {'event': 'STOPPED', 'host_status': 'NORMAL',
+                 'cluster_status': 'OFFLINE'}))
+        self.assertEqual(
+            'event=STOPPED, instances=2',
+            format_columns.summarize_payload(
+                {'event': 'STOPPED', 'instances': ['vm-1', 'vm-2'],
+                 'details': {'nested': True}}))
+        self.assertEqual('', format_columns.summarize_payload(None))
+
+    def test_recovery_workflow_column(self):
+        column = format_columns.RecoveryWorkflowColumn(
+            RECOVERY_WORKFLOW_DETAILS)
+
+        self.assertEqual('DisableComputeNodeTask: SUCCESS (100%), '
+                         'PrepareHAEnabledInstancesTask: RUNNING (50%)',
+                         column.human_readable())
+        self.assertEqual(RECOVERY_WORKFLOW_DETAILS, column.machine_readable())
+
+    def test_json_column(self):
+        column = format_columns.JSONColumn({'event': 'STOPPED'})
+
+        self.assertEqual('{"event":"STOPPED"}', column.human_readable())
+        self.assertEqual('', format_columns.JSONColumn(None).human_readable())
+
+    def test_dumps_without_orjson(self):
+        self.patch(format_columns, 'orjson', None)
+        self.assertEqual('{"a":[1,2]}', format_columns.dumps({'a': [1, 2]}))
+
+    def test_dumps_falls_back_on_unsupported_values(self):
+        self.assertEqual('{"1":"x"}', format_columns.dumps({1: 'x'}))
+
+    def _emit_list(self, formatter, rows, noindent=False):
+        stdout = io.StringIO()
+        formatter.emit_list(['id', 'payload'], rows, stdout,
+                            argparse.Namespace(noindent=noindent))
+        return stdout.getvalue()
+
+    def test_streaming_json_formatter(self):
+        rows = [('n1', format_columns.PayloadColumn({'event': 'STOPPED'})),
+                ('n2', format_columns.PayloadColumn({'a': 'x\ny'})),
+                ('n3', None)]
+        for noindent in (False, True):
+            for data in ([], rows[:1], rows):
+                self.assertEqual(
+                    self._emit_list(json_format.JSONFormatter(), data,
+                                    noindent),
+                    self._emit_list(format_columns.StreamingJSONFormatter(),
+                                    data, noindent))
+
+    def test_streaming_json_formatter_streams(self):
+        stdout = io.StringIO()
+
+        def rows():
+            yield ('n1', {})
+            # the first row is written before the next one is listed
+            self.assertIn('"n1"', stdout.getvalue())
+            yield ('n2', {})
+
+        format_columns.StreamingJSONFormatter().emit_list(
+            ['id', 'payload'], rows(), stdout,
+            argparse.Namespace(noindent=True))
+        self.assertEqual(
+            '[{"id": "n1", "payload": {}}, {"id": "n2", "payload": {}}]\n',
+            stdout.getvalue())
+
+    def test_streaming_formatter(self):
+        self.assertIsInstance(
+            format_columns.streaming_formatter(json_format.JSONFormatter()),
+            format_columns.StreamingJSONFormatter)
+        formatter = table.TableFormatter()
+        self.assertIs(formatter,
+                      format_columns.streaming_formatter(formatter))
@@ -0,0 +1,106 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import json
+import os
+from unittest import mock
+
+import fixtures
+from oslotest import base
+
+from masakariclient.common import metrics
+
+SEGMENT_ID = 'b8b0d7ca-1088-49db-a1e2-be004522f3d1'
+HOST_ID = '0951e72c-49e1-4a4d-9b48-1b6ef4cbc8bb'
+
+
+def _response(url, method='GET', status_code=200, elapsed=0.1,
+              content=b'{}'):
+    request = mock.Mock(url=url, method=method)
+    return mock.Mock(request=request, status_code=status_code,
+                     elapsed=datetime.timedelta(seconds=elapsed),
+                     content=content)
+
+
+class TestClassify(base.BaseTestCase):
+
+    def test_classify(self):
+        self.assertEqual(
+            ('/segments/{id}/hosts/{id}', 'host'),
+            metrics.classify('http://masakari:15868/v1/segments/%s/hosts/%s'
+                             % (SEGMENT_ID, HOST_ID)))
+        self.assertEqual(
+            ('/notifications', 'notification'),
+            metrics.classify('http://masakari/v1/project/notifications'
+                             '?limit=10'))
+        self.assertEqual(
+            ('/v3/auth/tokens', 'other'),
+            metrics.classify('http://keystone/v3/auth/tokens'))
+
+
+class TestHistogram(base.BaseTestCase):
+
+    def test_percentiles(self):
+        histogram = metrics.Histogram()
+        for ms in range(1, 1001):
+            histogram.add(ms / 1000.0)
+
+        for percent in metrics.PERCENTILES:
+            value = histogram.percentile(percent)
+            exact = percent * 10
+            self.assertTrue(exact <= value <= exact * metrics.BUCKET_GROWTH,
+                            (percent, value))
+        self.assertEqual(1000, histogram.percentile(100))
+        self.assertLess(len(histogram.buckets), 100)
+
+    def test_empty(self):
+        self.assertIsNone(metrics.Histogram().percentile(50))
+
+
+class TestMetrics(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestMetrics, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'metrics.json')
+
+    def test_collect(self):
+        url = 'http://masakari/v1/segments/%s/hosts' % SEGMENT_ID
+        with metrics.Metrics(self.path):
+            metrics.response_hook(_response(url, elapsed=0.2))
+            metrics.response_hook(_response(url, status_code=503,
+                                            content=b''))
+        # Ignored once the collector is over
+        metrics.response_hook(_response(url))
+
+        with open(self.path) as f:
+            data = json.load(f)
+        self.assertEqual(2, data['requests'])
+        endpoint, = data['endpoints']
+        self.assertEqual('GET', endpoint['method'])
+        self.assertEqual('/segments/{id}/hosts', endpoint['path'])
+        self.assertEqual('host', endpoint['resource'])
+        self.assertEqual({'200': 1, '503': 1}, endpoint['statuses'])
+        self.assertEqual(2, endpoint['bytes_received'])
+        self.assertEqual(200, endpoint['latency']['max_ms'])
+        self.assertIsNone(metrics.get_metrics())
+
+    def test_periodic_write(self):
+        collector = metrics.Metrics(self.path, interval=0.01)
+        with collector:
+            metrics.response_hook(_response('http://masakari/v1/segments'))
+            for _i in range(500):
+                if os.path.exists(self.path):
+                    break
+                collector._stop.wait(0.01)
+            self.assertTrue(os.path.exists(self.path))
@@ -0,0 +1,227 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import io
+import os
+import pstats
+from unittest import mock
+
+import fixtures
+from oslotest import base
+from requests_mock.contrib import fixture as requests_fixture
+
+from cliff import commandmanager
+from cliff import lister
+from osc_lib.api import auth
+from osc_lib.command import command
+from osc_lib import shell
+
+from masakariclient.common import profiling
+from masakariclient.common import utils
+from masakariclient import plugin
+
+AUTH_URL = 'http://keystone/v3'
+HA_URL = 'http://masakari/v1'
+TOKEN = {'token': {
+    'methods': ['password'],
+    'expires_at': '2100-01-01T00:00:00Z',
+    'catalog': [{'type': 'instance-ha', 'name': 'masakari', 'endpoints': [
+        {'interface': 'public', 'region': 'RegionOne', 'url': HA_URL}]}],
+    'user': {'id': 'user', 'name': 'user',
+             'domain': {'id': 'default', 'name': 'Default'}},
+    'project': {'id': 'project', 'name': 'project',
+                'domain': {'id': 'default', 'name': 'Default'}},
+}}
+
+
+def _response(url, method='GET', status_code=200, elapsed=0.5,
+              body=None, content=b'{}'):
+    request = mock.Mock(url=url, method=method, body=body)
+    return mock.Mock(request=request, status_code=status_code,
+                     elapsed=datetime.timedelta(seconds=elapsed),
+                     content=content)
+
+
+class FakeCommand(object):
+    """Stand-in for a cliff command, below the mixin in the MRO."""
+
+    def run(self, parsed_args):
+        with profiling.phase('resolve'):
+            profiling.response_hook(
+                _response('http://keystone/v3/auth/tokens', method='POST',
+                          status_code=201, body=b'{"auth": {}}'))
+        profiling.response_hook(_response('http://masakari/v1/segments'))
+        self.produce_output(parsed_args, [], [])
+        return 0
+
+    def produce_output(self, parsed_args, column_names, data):
+        pass
+
+
+class ProfiledFakeCommand(profiling.ProfiledCommand, FakeCommand):
+    cmd_name = 'segment list'
+
+    def __init__(self, **options):
+        self.app = mock.Mock(stderr=io.StringIO())
+        self.app.options = mock.Mock(ha_profile=False, ha_profile_dump=None,
+                                     ha_memprofile=False, ha_metrics=None)
+        for key, value in options.items():
+            setattr(self.app.options, key, value)
+
+
+class FakeLister(profiling.ProfiledCommand, lister.Lister):
+    """Lister of rows of a kilobyte."""
+
+    def take_action(self, parsed_args):
+        # Like the listers of the client, the rows are built lazily
+        return ('name',), (('%04d' % i * 256,) for i in range(100))
+
+
+class ShowSegment(profiling.ProfiledCommand, command.Command):
+    """Resolve a segment name, then get the segment."""
+
+    def take_action(self, parsed_args):
+        client = plugin.make_client(self.app.client_manager)
+        client.get_segment(utils.get_uuid_by_name(client, 'segment-1'))
+        return 0
+
+
+class FakeShell(shell.OpenStackShell):
+    """osc_lib shell with the auth and the ha options of the plugin."""
+
+    def __init__(self):
+        super(FakeShell, self).__init__(
+            description='fake', version='1',
+            command_manager=commandmanager.CommandManager('fake'))
+        self.command_manager.add_command('segment show', ShowSegment)
+        self.api_version = {plugin.API_NAME: '1.0'}
+        self.stderr = io.StringIO()
+
+    def build_option_parser(self, description, version):
+        parser = super(FakeShell, self).build_option_parser(description,
+                                                            version)
+        auth.build_auth_plugins_option_parser(parser)
+        return plugin.build_option_parser(parser)
+
+
+class TestProfiler(base.BaseTestCase):
+
+    def test_phases_exclude_nested_time(self):
+        clock = self.useFixture(
+            fixtures.MockPatch('time.monotonic')).mock
+        clock.side_effect = [0, 0, 1, 4, 10, 10]
+        profiler = profiling.Profiler()
+
+        with profiler:
+            with profiling.phase('resolve'):
+                profiler.record_response(
+                    _response('http://masakari/v1/segments', elapsed=2))
+
+        self.assertEqual(1.0, profiler.times['resolve'])
+        self.assertEqual(2.0, profiler.times['resolve/request'])
+        self.assertEqual(7.0, profiler.times['other'])
+        self.assertEqual(10, profiler.wall)
+
+    def test_phase_without_profiler(self):
+        with profiling.phase('resolve'):
+            pass
+        self.assertIsNone(profiling.get_profiler())
+
+    def test_command_not_profiled(self):
+        cmd = ProfiledFakeCommand()
+
+        self.assertEqual(0, cmd.run(mock.Mock()))
+        self.assertEqual('', cmd.app.stderr.getvalue())
+
+    def test_command_profiled(self):
+        cmd = ProfiledFakeCommand(ha_profile=True)
+
+        self.assertEqual(0, cmd.run(mock.Mock()))
+
+        report = cmd.app.stderr.getvalue()
+        self.assertIn('Profile of "segment list"', report)
+        self.assertIn('HTTP: 2 requests, 12 bytes sent, 4 bytes received',
+                      report)
+        self.assertIn('POST 201', report)
+        self.assertIn('    auth                  1 requests, 12 bytes sent, '
+                      '2 bytes received', report)
+        self.assertIn('    other/request         1 requests, 0 bytes sent, '
+                      '2 bytes received', report)
+        self.assertIsNone(profiling.get_profiler())
+
+    def test_shell_profiled(self):
+        # The shell of osc_lib gets the token before running the command
+        clock = [0.0]
+        self.useFixture(fixtures.MockPatch(
+            'masakariclient.common.profiling.time.monotonic',
+            side_effect=lambda: clock[0]))
+
+        def _token(request, context):
+            clock[0] += 5
+            context.headers['X-Subject-Token'] = 'token'
+            return TOKEN
+
+        requests_mock = self.useFixture(requests_fixture.Fixture())
+        requests_mock.post(AUTH_URL + '/auth/tokens', json=_token,
+                           status_code=201)
+        requests_mock.get(HA_URL, json={'version': {
+            'id': 'v1.0', 'status': 'CURRENT', 'min_version': '1.0',
+            'version': '1.3', 'links': [{'rel': 'self', 'href': HA_URL}]}})
+        requests_mock.get(HA_URL + '/segments', json={'segments': [
+            {'uuid': 'uuid-1', 'name': 'segment-1'}]})
+        requests_mock.get(HA_URL + '/segments/uuid-1', json={'segment': {
+            'uuid': 'uuid-1', 'name': 'segment-1'}})
+        app = FakeShell()
+
+        self.assertEqual(0, app.run([
+            '--os-auth-type', 'v3password', '--os-auth-url', AUTH_URL,
+            '--os-username', 'user', '--os-password', 'password',
+            '--os-project-name', 'project', '--os-user-domain-id', 'default',
+            '--os-project-domain-id', 'default', '--ha-profile',
+            'segment', 'show']))
+
+        report = app.stderr.getvalue().splitlines()
+        self.assertEqual('Profile of "segment show" (5.000s):', report[0])
+        self.assertEqual('  auth                5.000s      1', report[1])
+        # The listing of the segments is told apart from their get
+        self.assertEqual('resolve/request', report[3].split()[0])
+        self.assertEqual('1', report[3].split()[-1])
+        self.assertIn('other/request', [line.split()[0] for line in report])
+        self.assertIsNone(profiling.get_profiler())
+
+    def test_command_profile_dump(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'profile.out')
+        cmd = ProfiledFakeCommand(ha_profile='true', ha_profile_dump=path)
+
+        cmd.run(mock.Mock())
+
+        self.assertIn('written to %s' % path, cmd.app.stderr.getvalue())
+        pstats.Stats(path)
+
+    def test_command_memory_profiled(self):
+        app = mock.Mock(stdout=io.StringIO(), stderr=io.StringIO())
+        app.options = mock.Mock(ha_profile=False, ha_memprofile=True,
+                                ha_metrics=None)
+        cmd = FakeLister(app, None, cmd_name='fake list')
+        parsed_args = cmd.get_parser('fake list').parse_args(['-f', 'value'])
+
+        self.assertEqual(0, cmd.run(parsed_args))
+
+        report = app.stderr.getvalue()
+        self.assertIn('Memory profile of "fake list"', report)
+        self.assertIn('take_action ', report)
+        self.assertIn('output ', report)
+        self.assertIn('100 rows, 1.1 KiB per row', report)
+        self.assertIn('test_profiling.py', report)
+        self.assertEqual(100, len(app.stdout.getvalue().splitlines()))
@@ -0,0 +1,160 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from cliff import columns as cliff_columns
+from openstack import exceptions as sdk_exc
+from openstack.instance_ha.v1 import vmove
+from osc_lib import utils
+
+from masakariclient.common import rows
+from masakariclient.tests import base
+
+VMOVE = {
+    'id': 1,
+    'uuid': '3b1f8e5a-0d44-4a49-b0a1-2b3c5e2f0c11',
+    'instance_uuid': '99ffc832-2252-4a9e-9b98-28bc70f7ff09',
+    'instance_name': 'vm-1',
+    'source_host': 'host-1',
+    'dest_host': 'host-2',
+    'status': 'succeeded',
+    'type': 'evacuation',
+}
+
+
+class UpperColumn(cliff_columns.FormattableColumn):
+    def human_readable(self):
+        return self._value.upper()
+
+
+class TestRows(base.TestCase):
+
+    def setUp(self):
+        super(TestRows, self).setUp()
+        self.manager = mock.Mock(default_microversion='1.3')
+
+    def test_projection_matches_resources(self):
+        self.manager.get.return_value = base.fake_list_response(
+            'vmoves', [VMOVE])
+        columns = ['uuid', 'server_id', 'server_name', 'notification_id',
+                   'start_time', 'unknown']
+
+        row, = rows.vmoves(self.manager, 'notification-uuid', columns)
+
+        resource = vmove.VMove.existing(notification_id='notification-uuid',
+                                        **VMOVE)
+        self.assertEqual(utils.get_item_properties(resource, columns), row)
+        self.manager.get.assert_called_once_with(
+            '/notifications/notification-uuid/vmoves',
+            headers={'Accept': 'application/json'}, params={},
+            microversion='1.3')
+
+    def test_formatters(self):
+        self.manager.get.return_value = base.fake_list_response(
+            'vmoves', [VMOVE])
+
+        row, = rows.vmoves(self.manager, 'notification-uuid',
+                           ['server_name', 'status'],
+                           formatters={'status': UpperColumn})
+        self.assertEqual('vm-1', row[0])
+        self.assertEqual('SUCCEEDED', row[1].human_readable())
+
+    def test_pagination(self):
+        self.manager.get.side_effect = [
+            base.fake_list_response(
+                'hosts', [{'id': 1, 'name': 'host-1'},
+                          {'id': 2, 'name': 'host-2'}],
+                links=[{'rel': 'next',
+                        'href': 'http://masakari/v1/segments/segment-uuid/'
+                                'hosts?limit=2&marker=2'}]),
+            base.fake_list_response('hosts', [{'id': 3, 'name': 'host-3'}]),
+            # With a limit, the listing stops on an empty page
+            base.fake_list_response('hosts', []),
+        ]
+
+        names = [row[0] for row in rows.hosts(
+            self.manager, 'segment-uuid', ['name'], limit=2,
+            sort_key='name')]
+
+        self.assertEqual(['host-1', 'host-2', 'host-3'], names)
+        calls = self.manager.get.call_args_list
+        self.assertEqual('/segments/segment-uuid/hosts', calls[0][0][0])
+        self.assertEqual({'limit': 2, 'sort_key': 'name'},
+                         calls[0][1]['params'])
+        self.assertEqual({'limit': ['2'], 'marker': ['2'],
+                          'sort_key': 'name'}, calls[1][1]['params'])
+        self.assertEqual({'limit': 2, 'marker': 3, 'sort_key': 'name'},
+                         calls[2][1]['params'])
+
+    def test_query_mapping(self):
+        self.manager.get.return_value = base.fake_list_response(
+            'notifications', [])
+
+        self.assertEqual([], list(rows.notifications(
+            self.manager, ['notification_uuid'],
+            generated_since='2024-01-01')))
+        self.assertEqual(
+            {'generated-since': '2024-01-01'},
+            self.manager.get.call_args[1]['params'])
+
+    def test_invalid_query(self):
+        self.assertRaises(sdk_exc.InvalidResourceQuery, list,
+                          rows.segments(self.manager, ['name'], bogus='x'))
+        self.manager.get.assert_not_called()
+
+    def test_microversion_with_action(self):
+        # openstacksdk up to 4.4.0 requires the action of the request
+        def _get_microversion(session, *, action):
+            return '1.%d' % len(action)
+
+        self.manager.get.return_value = base.fake_list_response(
+            'segments', [])
+        with mock.patch.object(rows._segment.Segment, '_get_microversion',
+                               _get_microversion):
+            self.assertEqual([], list(rows.segments(self.manager, ['name'])))
+
+        self.assertEqual('1.4', self.manager.get.call_args[1]['microversion'])
+
+    def test_fallback_to_resources(self):
+        # A later openstacksdk changing the private methods of Resource
+        def _get_next_link(uri, response, data, marker, limit, total,
+                           page_size):
+            pass
+
+        resource = vmove.VMove.existing(notification_id='notification-uuid',
+                                        **VMOVE)
+        self.manager.vmoves.return_value = iter([resource])
+        columns = ['uuid', 'server_id', 'notification_id', 'status']
+        with mock.patch.object(vmove.VMove, '_get_next_link',
+                               _get_next_link):
+            result = list(rows.vmoves(self.manager, 'notification-uuid',
+                                      columns,
+                                      formatters={'status': UpperColumn},
+                                      limit=10))
+
+        row, = result
+        self.assertEqual(
+            utils.get_item_properties(resource, columns[:-1]), row[:-1])
+        self.assertEqual('SUCCEEDED', row[-1].human_readable())
+        self.manager.vmoves.assert_called_once_with('notification-uuid',
+                                                    limit=10)
+        self.manager.get.assert_not_called()
+
+    def test_fallback_without_body_attributes(self):
+        self.manager.segments.return_value = iter([])
+        with mock.patch.object(rows, '_BODY', '_other'):
+            self.assertEqual([], list(rows.segments(self.manager, ['name'],
+                                                    sort_key='name')))
+
+        self.manager.segments.assert_called_once_with(sort_key='name')
+        self.manager.get.assert_not_called()
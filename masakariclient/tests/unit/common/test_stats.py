@@ -0,0 +1,75 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from oslotest import base
+
+from masakariclient.common import stats
+
+
+def _notification(status, seconds, type='COMPUTE_HOST', host='host-1'):
+    return {'notification_uuid': 'uuid', 'type': type, 'status': status,
+            'source_host_uuid': host,
+            'generated_time': '2024-01-01T00:00:00.000000',
+            'updated_at': '2024-01-01T00:%02d:%02d.000000'
+                          % divmod(seconds, 60)}
+
+
+def _vmove(status, seconds):
+    return {'status': status, 'start_time': '2024-01-01T00:00:00.000000',
+            'end_time': '2024-01-01T00:00:%02d.000000' % seconds}
+
+
+class TestRecoveryStats(base.BaseTestCase):
+
+    def test_rows(self):
+        recovery = stats.RecoveryStats()
+        recovery.add(_notification('finished', 60),
+                     [_vmove('succeeded', 10), _vmove('succeeded', 20),
+                      _vmove('failed', 30), _vmove('ongoing', 1)])
+        recovery.add(_notification('finished', 120))
+        recovery.add(_notification('failed', 300))
+        recovery.add(_notification('running', 600))
+
+        rows = {row[1]: row for row in recovery.rows()}
+
+        self.assertEqual(4, recovery.notifications)
+        self.assertEqual(['evacuation', 'failed_evacuation',
+                          'failed_recovery', 'recovery'], sorted(rows))
+        self.assertEqual(('all', 'recovery', 2, 60.0, 90.0), rows[
+            'recovery'][:5])
+        self.assertEqual(120.0, rows['recovery'][-1])
+        self.assertEqual(('all', 'evacuation', 2, 10.0, 15.0),
+                         rows['evacuation'][:5])
+        self.assertEqual(1, rows['failed_recovery'][2])
+        # The percentiles are within the growth of the histogram buckets
+        p50 = rows['evacuation'][5]
+        self.assertTrue(10.0 <= p50 <= 10.0 * 1.1, p50)
+
+    def test_group_by(self):
+        recovery = stats.RecoveryStats(['type', 'host'])
+        recovery.add(_notification('finished', 60, host='host-2'))
+        recovery.add(_notification('finished', 120, type='VM'))
+
+        groups = [(row[0], row[2]) for row in recovery.rows()]
+
+        self.assertEqual([('all', 2), ('host=host-1', 1),
+                          ('host=host-2', 1), ('type=COMPUTE_HOST', 1),
+                          ('type=VM', 1)], groups)
+
+    def test_missing_timestamps(self):
+        recovery = stats.RecoveryStats()
+        notification = _notification('finished', 60)
+        notification['updated_at'] = None
+        recovery.add(notification, [_vmove('succeeded', 10)])
+
+        self.assertEqual([('all', 'evacuation')],
+                         [row[:2] for row in recovery.rows()])
@@ -0,0 +1,115 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+from unittest import mock
+import uuid
+
+from openstack import exceptions as sdk_exc
+from osc_lib import exceptions
+
+from masakariclient.osc.v1 import benchmark
+from masakariclient.osc.v1.benchmark import Benchmark
+from masakariclient.tests import base
+
+SEGMENT_ID = str(uuid.uuid4())
+HOST_ID = str(uuid.uuid4())
+
+
+class FakeNamespace(object):
+    """Fake parser object."""
+    def __init__(self, scenario=None, concurrency=2, duration=60,
+                 requests=10, segment=None, host=None, endpoint=None):
+        super(FakeNamespace, self).__init__()
+        self.scenario = scenario
+        self.concurrency = concurrency
+        self.duration = duration
+        self.requests = requests
+        self.segment = segment
+        self.host = host
+        self.endpoint = endpoint
+
+
+class TestV1Benchmark(base.TestCase):
+    def setUp(self):
+        super(TestV1Benchmark, self).setUp()
+        self.app = mock.Mock()
+        self.app_args = mock.Mock()
+        self.client_manager = mock.Mock()
+        self.app.client_manager.ha = self.client_manager
+        self.benchmark = Benchmark(self.app, self.app_args,
+                                   cmd_name='ha benchmark')
+
+    def _rows(self, parsed_args):
+        columns, rows = self.benchmark.take_action(parsed_args)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def test_list_segments(self):
+        self.client_manager.segments.return_value = []
+        parsed_args = FakeNamespace(scenario=['list-segments'],
+                                    endpoint='http://localhost:15868')
+
+        row, = self._rows(parsed_args)
+        self.assertEqual('list-segments', row['Scenario'])
+        self.assertEqual(10, row['Requests'])
+        self.assertEqual(0, row['Errors'])
+        self.assertIsNotNone(row['P99 (ms)'])
+        self.assertEqual(10, self.client_manager.segments.call_count)
+        self.assertEqual('http://localhost:15868',
+                         self.client_manager.endpoint_override)
+
+    def test_show_host_resolves_names_once(self):
+        segment = mock.Mock(uuid=SEGMENT_ID)
+        segment.name = 'segment'
+        host = mock.Mock(uuid=HOST_ID)
+        host.name = 'host'
+        self.client_manager.segments.return_value = [segment]
+        self.client_manager.hosts.return_value = [host]
+        parsed_args = FakeNamespace(scenario=['show-host'],
+                                    segment='segment', host='host')
+
+        row, = self._rows(parsed_args)
+        self.assertEqual(10, row['Requests'])
+        self.client_manager.hosts.assert_called_once_with(SEGMENT_ID)
+        self.client_manager.get_host.assert_called_with(
+            HOST_ID, segment_id=SEGMENT_ID)
+
+    def test_create_notification_errors(self):
+        self.client_manager.create_notification.side_effect = (
+            sdk_exc.HttpException(http_status=409))
+        parsed_args = FakeNamespace(scenario=['create-notification'],
+                                    host='host')
+
+        row, = self._rows(parsed_args)
+        self.assertEqual(10, row['Errors'])
+        self.assertEqual(100.0, row['Error Rate (%)'])
+        self.assertEqual('HTTP 409: 10', row['Error Details'])
+        self.assertIsNone(row['P50 (ms)'])
+        payloads = [call[1]['payload'] for call in
+                    self.client_manager.create_notification.call_args_list]
+        self.assertEqual(10, len({p['benchmark_id'] for p in payloads}))
+
+    def test_missing_host(self):
+        parsed_args = FakeNamespace(scenario=['list-segments', 'show-host'])
+
+        self.assertRaises(exceptions.CommandError,
+                          self.benchmark.take_action, parsed_args)
+        self.client_manager.segments.assert_not_called()
+
+    def test_parse_duration(self):
+        self.assertEqual(60, benchmark._parse_duration('60'))
+        self.assertEqual(30, benchmark._parse_duration('30s'))
+        self.assertEqual(300, benchmark._parse_duration('5m'))
+        self.assertRaises(argparse.ArgumentTypeError,
+                          benchmark._parse_duration, '1x')
+        self.assertRaises(argparse.ArgumentTypeError,
+                          benchmark._parse_duration, '0')
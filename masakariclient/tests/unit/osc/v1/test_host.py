@@ -17,12 +17,22 @@ test_masakariclient
 
 Tests for `masakariclient` module.
 """
+import io
+import os
 from unittest import mock
 import uuid
 
+import fixtures
+from osc_lib import exceptions
+from osc_lib.tests import utils as osc_lib_utils
 from osc_lib import utils
 
+from masakariclient.common import exception as exc
 from masakariclient.osc.v1.host import DeleteHost
+from masakariclient.osc.v1.host import FindHost
+from masakariclient.osc.v1.host import ListHost
+from masakariclient.osc.v1.host import MoveHost
+from masakariclient.osc.v1.host import RollingMaintenanceHost
 from masakariclient.osc.v1.host import ShowHost
 from masakariclient.osc.v1.host import UpdateHost
 from masakariclient.tests import base
@@ -37,8 +47,13 @@ class FakeNamespace(object):
     """Fake parser object."""
     def __init__(self, segment_id=None, host=None,
                  reserved=None, name=None, type=None,
-                 control_attributes=None, on_maintenance=None):
+                 control_attributes=None, on_maintenance=None,
+                 concurrency=10, deadline=None, resume=None, fields=None):
         super(FakeNamespace, self).__init__()
+        self.fields = fields
+        self.concurrency = concurrency
+        self.deadline = deadline
+        self.resume = resume
         self.segment_id = segment_id
         self.host = host
         self.reserved = reserved
@@ -50,10 +65,16 @@ class FakeNamespace(object):
 
 class FakeHosts(object):
     """Fake segment host list."""
-    def __init__(self, name=None, uuid=None):
+    def __init__(self, name=None, uuid=None, reserved=False,
+                 on_maintenance=False, failover_segment_id=None):
         super(FakeHosts, self).__init__()
         self.name = name
         self.uuid = uuid
+        self.type = 'COMPUTE'
+        self.control_attributes = 'SSH'
+        self.reserved = reserved
+        self.on_maintenance = on_maintenance
+        self.failover_segment_id = failover_segment_id
 
 
 class FakeSegments(object):
@@ -106,6 +127,419 @@ class BaseV1Host(base.TestCase):
         self.dummy_host = FakeHost()
 
 
+class TestV1ListHost(BaseV1Host, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1ListHost, self).setUp()
+        self.list_host = ListHost(self.app, self.app_args,
+                                  cmd_name='host list')
+        self.list_columns = ['uuid', 'name', 'type', 'control_attributes',
+                             'reserved', 'on_maintenance',
+                             'failover_segment_id']
+
+    def test_take_action(self):
+        self.app.client_manager.ha.segments.return_value = self.dummy_segments
+        self.app.client_manager.ha.get.return_value = (
+            base.fake_list_response('hosts', [
+                {'uuid': HOST_ID, 'name': HOST_NAME, 'type': 'COMPUTE',
+                 'control_attributes': 'SSH', 'reserved': False,
+                 'on_maintenance': False,
+                 'failover_segment_id': SEGMENT_ID, 'id': 1}]))
+        parsed_args = self.check_parser(self.list_host, [SEGMENT_NAME], [])
+
+        columns, data = self.list_host.take_action(parsed_args)
+
+        self.assertEqual(self.list_columns, columns)
+        self.assertEqual([(HOST_ID, HOST_NAME, 'COMPUTE', 'SSH', False, False,
+                           SEGMENT_ID)], list(data))
+        self.app.client_manager.ha.get.assert_called_once_with(
+            '/segments/%s/hosts' % SEGMENT_ID, headers=mock.ANY, params={},
+            microversion=mock.ANY)
+
+    def test_take_action_all_segments(self):
+        segment_ids = [str(uuid.uuid4()) for _i in range(3)]
+
+        def _get(uri, params=None, **kwargs):
+            if uri == '/segments':
+                return base.fake_list_response('segments', [
+                    {'uuid': sid, 'name': 'segment-%d' % i}
+                    for i, sid in enumerate(segment_ids)])
+            segment_id = uri.split('/')[2]
+            return base.fake_list_response('hosts', [
+                {'uuid': str(uuid.uuid4()), 'name': '%s-host' % segment_id,
+                 'failover_segment_id': segment_id}])
+
+        self.app.client_manager.ha.get.side_effect = _get
+        arglist = ['--all-segments', '--filters', 'reserved=True']
+        parsed_args = self.check_parser(self.list_host, arglist, [])
+
+        columns, data = self.list_host.take_action(parsed_args)
+        rows = list(data)
+
+        self.assertEqual(['segment_name'] + self.list_columns, columns)
+        self.assertEqual(3, len(rows))
+        self.assertEqual(['segment-0', 'segment-1', 'segment-2'],
+                         sorted(row[0] for row in rows))
+        for row in rows:
+            # the failover segment of each host matches the segment name
+            index = int(row[0].split('-')[1])
+            self.assertEqual(segment_ids[index], row[-1])
+        for sid in segment_ids:
+            self.app.client_manager.ha.get.assert_any_call(
+                '/segments/%s/hosts' % sid, headers=mock.ANY,
+                params={'reserved': 'True'}, microversion=mock.ANY)
+
+    def test_take_action_fields(self):
+        self.app.client_manager.ha.segments.return_value = self.dummy_segments
+        self.app.client_manager.ha.get.return_value = (
+            base.fake_list_response('hosts', [
+                {'uuid': HOST_ID, 'name': HOST_NAME, 'type': 'COMPUTE'}]))
+        parsed_args = self.check_parser(
+            self.list_host, [SEGMENT_NAME, '--fields', 'name, type'], [])
+
+        columns, data = self.list_host.take_action(parsed_args)
+
+        self.assertEqual(['name', 'type'], columns)
+        self.assertEqual([(HOST_NAME, 'COMPUTE')], list(data))
+
+    def test_take_action_without_segment(self):
+        parsed_args = self.check_parser(self.list_host, [], [])
+        self.assertRaises(exceptions.CommandError,
+                          self.list_host.take_action, parsed_args)
+
+    def test_take_action_all_segments_with_segment(self):
+        parsed_args = self.check_parser(
+            self.list_host, [SEGMENT_NAME, '--all-segments'], [])
+        self.assertRaises(exceptions.CommandError,
+                          self.list_host.take_action, parsed_args)
+
+    def test_take_action_all_segments_with_paging(self):
+        for arglist in (['--sort', 'name'], ['--limit', '2'],
+                        ['--marker', 'host-uuid']):
+            parsed_args = self.check_parser(
+                self.list_host, ['--all-segments'] + arglist, [])
+            self.assertRaises(exceptions.CommandError,
+                              self.list_host.take_action, parsed_args)
+        self.app.client_manager.ha.get.assert_not_called()
+
+
+class TestV1FindHost(BaseV1Host, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1FindHost, self).setUp()
+        self.find_host = FindHost(self.app, self.app_args,
+                                  cmd_name='host find')
+        self.segments = [FakeSegments(name='segment-%d' % i,
+                                      uuid=uuid.uuid4())
+                         for i in range(2)]
+        self.hosts = {
+            self.segments[0].uuid: [
+                FakeHosts(name='compute-10', uuid=uuid.uuid4()),
+                FakeHosts(name='compute-11', uuid=uuid.uuid4())],
+            self.segments[1].uuid: [
+                FakeHosts(name='compute-2', uuid=uuid.uuid4()),
+                FakeHosts(name='controller-1', uuid=uuid.uuid4())],
+        }
+        self.app.client_manager.ha.segments.return_value = self.segments
+        self.app.client_manager.ha.hosts.side_effect = (
+            lambda segment_id: self.hosts[segment_id])
+
+    def _find(self, arglist):
+        parsed_args = self.check_parser(self.find_host, arglist, [])
+        columns, data = self.find_host.take_action(parsed_args)
+        self.assertEqual(['name', 'uuid', 'segment_name',
+                          'failover_segment_id'], columns)
+        return data
+
+    def test_take_action_exact(self):
+        data = self._find(['compute-2'])
+        self.assertEqual(
+            [('compute-2', str(self.hosts[self.segments[1].uuid][0].uuid),
+              'segment-1', str(self.segments[1].uuid))],
+            data)
+
+    def test_take_action_prefix(self):
+        data = self._find(['compute-1', '--prefix'])
+        self.assertEqual(['compute-10', 'compute-11'],
+                         [entry[0] for entry in data])
+
+    def test_take_action_glob(self):
+        data = self._find(['c*-1*'])
+        self.assertEqual(['compute-10', 'compute-11', 'controller-1'],
+                         [entry[0] for entry in data])
+
+    def test_take_action_not_found(self):
+        self.assertEqual([], self._find(['compute-1']))
+
+    def test_take_action_cache_file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'index.json')
+        self._find(['compute-2', '--cache-file', path])
+        self.assertTrue(os.path.exists(path))
+        self.app.client_manager.ha.segments.reset_mock()
+
+        data = self._find(['compute-2', '--cache-file', path])
+
+        self.assertEqual(['compute-2'], [entry[0] for entry in data])
+        self.app.client_manager.ha.segments.assert_not_called()
+
+    def test_take_action_expired_cache_file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'index.json')
+        self._find(['compute-2', '--cache-file', path])
+        self.app.client_manager.ha.segments.reset_mock()
+
+        self._find(['compute-2', '--cache-file', path,
+                    '--cache-max-age', '-1'])
+
+        self.app.client_manager.ha.segments.assert_called_once_with()
+
+
+class TestV1MoveHost(BaseV1Host, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1MoveHost, self).setUp()
+        self.move_host = MoveHost(self.app, self.app_args,
+                                  cmd_name='host move')
+        self.journal = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'move.journal')
+        self.app.client_manager.ha.segments.return_value = [
+            FakeSegments(name='source', uuid='source-uuid'),
+            FakeSegments(name='destination', uuid='destination-uuid')]
+        self.dummy_hosts = [FakeHosts(name='host-%d' % i, uuid=uuid.uuid4(),
+                                      reserved=bool(i % 2))
+                            for i in range(3)]
+        self.app.client_manager.ha.hosts.return_value = self.dummy_hosts
+
+    def _move(self, arglist):
+        parsed_args = self.check_parser(self.move_host, arglist, [])
+        columns, data = self.move_host.take_action(parsed_args)
+        self.assertEqual(['name', 'status'], columns)
+        return list(data)
+
+    def _host_attrs(self, name, reserved):
+        return dict(name=name, type='COMPUTE', control_attributes='SSH',
+                    reserved=reserved, on_maintenance=False)
+
+    def test_take_action(self):
+        rows = self._move(['source', 'destination', 'host-0', 'host-1'])
+
+        self.assertEqual([('host-0', 'moved'), ('host-1', 'moved')], rows)
+        ha = self.app.client_manager.ha
+        ha.hosts.assert_called_once_with('source-uuid')
+        ha.delete_host.assert_any_call(
+            self.dummy_hosts[1].uuid, segment_id='source-uuid',
+            ignore_missing=False)
+        ha.create_host.assert_any_call(
+            segment_id='destination-uuid',
+            **self._host_attrs('host-1', True))
+        self.assertEqual(2, ha.create_host.call_count)
+
+    def test_take_action_filters(self):
+        self._move(['source', 'destination', '--filters', 'reserved=True'])
+        self.app.client_manager.ha.hosts.assert_called_once_with(
+            'source-uuid', reserved='True')
+
+    def test_take_action_host_not_found(self):
+        self.assertRaises(exceptions.CommandError, self._move,
+                          ['source', 'destination', 'host-0', 'host-9'])
+        self.app.client_manager.ha.delete_host.assert_not_called()
+
+    def test_take_action_restores_source(self):
+        def _create_host(segment_id, **attrs):
+            if segment_id == 'destination-uuid':
+                raise Exception('Service unavailable')
+
+        self.app.client_manager.ha.create_host.side_effect = _create_host
+        rows = self._move(['source', 'destination', 'host-0'])
+
+        self.assertEqual(
+            [('host-0', 'error: Service unavailable (restored in source)')],
+            rows)
+        self.app.client_manager.ha.create_host.assert_called_with(
+            segment_id='source-uuid', **self._host_attrs('host-0', False))
+
+    def test_take_action_journal_rollback(self):
+        def _create_host(segment_id, **attrs):
+            if attrs['name'] == 'host-1':
+                raise Exception('Service unavailable')
+
+        self.app.client_manager.ha.create_host.side_effect = _create_host
+        rows = self._move(['source', 'destination', 'host-0', 'host-1',
+                           '--resume', self.journal])
+        self.assertEqual(('host-0', 'moved'), rows[0])
+        self.assertEqual('error: Service unavailable (not restored)',
+                         rows[1][1])
+
+        # a restarted move skips the hosts already moved
+        self.app.client_manager.ha.delete_host.reset_mock()
+        self.app.client_manager.ha.create_host.reset_mock()
+        self.app.client_manager.ha.create_host.side_effect = None
+        rows = self._move(['source', 'destination', 'host-0',
+                           '--resume', self.journal])
+        self.assertEqual([('host-0', 'moved')], rows)
+        self.app.client_manager.ha.delete_host.assert_not_called()
+
+        # the orphaned host is recreated in the source segment
+        rows = self._move(['source', 'destination', '--rollback',
+                           '--resume', self.journal])
+        self.assertEqual([('host-1', 'restored')], rows)
+        self.app.client_manager.ha.create_host.assert_called_once_with(
+            segment_id='source-uuid', **self._host_attrs('host-1', True))
+        rows = self._move(['source', 'destination', '--rollback',
+                           '--resume', self.journal])
+        self.assertEqual([], rows)
+
+
+class FakeNotification(object):
+    """Fake notification."""
+    def __init__(self, notification_uuid, source_host_uuid, status,
+                 generated_time='2026-01-01T00:00:00.000000'):
+        super(FakeNotification, self).__init__()
+        self.notification_uuid = notification_uuid
+        self.source_host_uuid = source_host_uuid
+        self.status = status
+        self.generated_time = generated_time
+
+
+class TestV1RollingMaintenanceHost(BaseV1Host, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1RollingMaintenanceHost, self).setUp()
+        self.cmd = RollingMaintenanceHost(
+            self.app, self.app_args, cmd_name='host rolling-maintenance')
+        self.state_file = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'state')
+        self.mock_sleep = self.useFixture(
+            fixtures.MockPatch('time.sleep')).mock
+        self.dummy_hosts = [FakeHosts(name='host-%d' % i,
+                                      uuid='host-uuid-%d' % i)
+                            for i in range(3)]
+        ha = self.app.client_manager.ha
+        ha.segments.return_value = self.dummy_segments
+        ha.hosts.return_value = self.dummy_hosts
+        ha.notifications.return_value = []
+
+    def _run(self, arglist):
+        parsed_args = self.check_parser(self.cmd, arglist, [])
+        self.cmd.take_action(parsed_args)
+
+    def test_take_action(self):
+        self._run([SEGMENT_NAME, '--wave-size', '2'])
+
+        ha = self.app.client_manager.ha
+        self.assertEqual(
+            [mock.call('host-uuid-0', segment_id=SEGMENT_ID,
+                       on_maintenance=True),
+             mock.call('host-uuid-1', segment_id=SEGMENT_ID,
+                       on_maintenance=True),
+             mock.call('host-uuid-0', segment_id=SEGMENT_ID,
+                       on_maintenance=False),
+             mock.call('host-uuid-1', segment_id=SEGMENT_ID,
+                       on_maintenance=False),
+             mock.call('host-uuid-2', segment_id=SEGMENT_ID,
+                       on_maintenance=True),
+             mock.call('host-uuid-2', segment_id=SEGMENT_ID,
+                       on_maintenance=False)],
+            ha.update_host.call_args_list)
+        ha.get_notification.assert_not_called()
+        self.mock_sleep.assert_not_called()
+
+    def test_take_action_waits_for_recoveries(self):
+        ha = self.app.client_manager.ha
+        running = FakeNotification('n-1', 'host-uuid-0', 'running')
+
+        def _notifications(status=None, generated_since=None):
+            if status == 'running':
+                return [running,
+                        FakeNotification('n-2', 'other-host', 'running')]
+            return []
+
+        ha.notifications.side_effect = _notifications
+        ha.get_notification.side_effect = [
+            running, FakeNotification('n-1', 'host-uuid-0', 'finished')]
+
+        self._run([SEGMENT_NAME, 'host-0', '--keep-maintenance'])
+
+        self.assertEqual([mock.call('n-1'), mock.call('n-1')],
+                         ha.get_notification.call_args_list)
+        self.mock_sleep.assert_called_once_with(10)
+        ha.update_host.assert_called_once_with(
+            'host-uuid-0', segment_id=SEGMENT_ID, on_maintenance=True)
+
+    def test_take_action_failed_recovery_resume(self):
+        ha = self.app.client_manager.ha
+
+        def _notifications(status=None, generated_since=None):
+            if generated_since:
+                return [FakeNotification('n-1', 'host-uuid-1', 'new')]
+            return []
+
+        ha.notifications.side_effect = _notifications
+        ha.get_notification.return_value = FakeNotification(
+            'n-1', 'host-uuid-1', 'failed')
+
+        self.assertRaises(exceptions.CommandError, self._run,
+                          [SEGMENT_NAME, '--resume', self.state_file])
+
+        ha.update_host.reset_mock()
+        ha.notifications.side_effect = None
+        self._run([SEGMENT_NAME, '--resume', self.state_file])
+
+        # host-0 completed its wave before the failure
+        self.assertEqual(
+            ['host-uuid-1', 'host-uuid-1', 'host-uuid-2', 'host-uuid-2'],
+            [call[0][0] for call in ha.update_host.call_args_list])
+
+    def test_take_action_skips_hosts_on_maintenance(self):
+        self.dummy_hosts[1].on_maintenance = True
+
+        self._run([SEGMENT_NAME, '--wave-size', '2'])
+
+        ha = self.app.client_manager.ha
+        self.assertEqual(
+            [mock.call('host-uuid-0', segment_id=SEGMENT_ID,
+                       on_maintenance=True),
+             mock.call('host-uuid-2', segment_id=SEGMENT_ID,
+                       on_maintenance=True),
+             mock.call('host-uuid-0', segment_id=SEGMENT_ID,
+                       on_maintenance=False),
+             mock.call('host-uuid-2', segment_id=SEGMENT_ID,
+                       on_maintenance=False)],
+            ha.update_host.call_args_list)
+
+    def test_take_action_resume_hosts_put_on_maintenance(self):
+        ha = self.app.client_manager.ha
+        mock_run = self.useFixture(fixtures.MockPatch('subprocess.run')).mock
+        mock_run.return_value.returncode = 1
+
+        self.assertRaises(exceptions.CommandError, self._run,
+                          [SEGMENT_NAME, 'host-0', '--exec', 'patch-hosts',
+                           '--resume', self.state_file])
+
+        # host-0 stayed on maintenance after the failure of its wave
+        self.dummy_hosts[0].on_maintenance = True
+        ha.update_host.reset_mock()
+        mock_run.return_value.returncode = 0
+        self._run([SEGMENT_NAME, 'host-0', '--exec', 'patch-hosts',
+                   '--resume', self.state_file])
+
+        self.assertEqual(
+            [mock.call('host-uuid-0', segment_id=SEGMENT_ID,
+                       on_maintenance=True),
+             mock.call('host-uuid-0', segment_id=SEGMENT_ID,
+                       on_maintenance=False)],
+            ha.update_host.call_args_list)
+
+    @mock.patch('subprocess.run')
+    def test_take_action_exec(self, mock_run):
+        mock_run.return_value.returncode = 1
+        self.assertRaises(exceptions.CommandError, self._run,
+                          [SEGMENT_NAME, '--wave-size', '3',
+                           '--exec', 'patch-hosts --reboot'])
+        mock_run.assert_called_once_with(
+            ['patch-hosts', '--reboot', 'host-0', 'host-1', 'host-2'])
+        # the hosts stay on maintenance after a failure
+        self.assertEqual(
+            3, self.app.client_manager.ha.update_host.call_count)
+
+
 class TestV1ShowHost(BaseV1Host):
     def setUp(self):
         super(TestV1ShowHost, self).setUp()
@@ -115,13 +549,13 @@ class TestV1ShowHost(BaseV1Host):
     def test_take_action_by_uuid(self):
 
         # command param
-        parsed_args = FakeNamespace(segment_id=SEGMENT_ID, host=HOST_ID)
+        parsed_args = FakeNamespace(segment_id=SEGMENT_ID, host=[HOST_ID])
         self._test_take_action(parsed_args)
 
     def test_take_action_by_name(self):
 
         # command param
-        parsed_args = FakeNamespace(segment_id=SEGMENT_ID, host=HOST_NAME)
+        parsed_args = FakeNamespace(segment_id=SEGMENT_ID, host=[HOST_NAME])
         self._test_take_action(parsed_args)
 
     @mock.patch.object(utils, 'get_dict_properties')
@@ -141,6 +575,124 @@ class TestV1ShowHost(BaseV1Host):
             self.dummy_host.to_dict(), self.columns, formatters={})
 
 
+class TestV1ShowMultipleHosts(BaseV1Host, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1ShowMultipleHosts, self).setUp()
+        self.show_host = ShowHost(self.app, self.app_args,
+                                  cmd_name='host show')
+        self.dummy_hosts = [FakeHosts(name='host-%d' % i, uuid=uuid.uuid4())
+                            for i in range(3)]
+        self.app.client_manager.ha.segments.return_value = self.dummy_segments
+        self.app.client_manager.ha.hosts.return_value = self.dummy_hosts
+        self.app.options = mock.Mock(ha_profile=False, ha_memprofile=False,
+                                     ha_metrics=None)
+        self.app.stdout = io.StringIO()
+
+    def test_take_action(self):
+        def _get_host(host_id, segment_id):
+            if host_id == self.dummy_hosts[1].uuid:
+                raise Exception('Service unavailable')
+            return self.dummy_host
+
+        self.app.client_manager.ha.get_host.side_effect = _get_host
+        parsed_args = self.check_parser(
+            self.show_host, [SEGMENT_NAME, 'host-0', 'host-1', 'host-2'], [])
+
+        columns, data = self.show_host.take_action(parsed_args)
+
+        self.assertEqual(self.columns + ['host', 'status'], columns)
+        self.assertEqual(['ok', 'Service unavailable', 'ok'],
+                         [row[-1] for row in data])
+        self.assertEqual(['host-0', 'host-1', 'host-2'],
+                         [row[-2] for row in data])
+        self.assertIsNone(data[1][columns.index('name')])
+        # the segment and host names are resolved with a listing each
+        self.app.client_manager.ha.segments.assert_called_once_with()
+        self.app.client_manager.ha.hosts.assert_called_once_with(SEGMENT_ID)
+        self.assertEqual(3, self.app.client_manager.ha.get_host.call_count)
+
+    def test_take_action_fields(self):
+        self.app.client_manager.ha.get_host.side_effect = [
+            self.dummy_host, Exception('Service unavailable'),
+            self.dummy_host]
+        parsed_args = self.check_parser(
+            self.show_host,
+            [SEGMENT_NAME, 'host-0', 'host-1', 'host-2',
+             '--fields', 'name,reserved', '--fields', 'uuid'],
+            [('fields', ['name,reserved', 'uuid'])])
+
+        columns, data = self.show_host.take_action(parsed_args)
+
+        self.assertEqual(['name', 'reserved', 'uuid', 'host', 'status'],
+                         columns)
+        self.assertEqual((HOST_NAME, 'False', HOST_ID, 'host-0', 'ok'),
+                         data[0])
+        self.assertEqual((None, None, None, 'host-1', 'Service unavailable'),
+                         data[1])
+
+    def test_take_action_fields_without_name(self):
+        self.app.client_manager.ha.get_host.side_effect = [
+            self.dummy_host, Exception('Service unavailable')]
+        parsed_args = self.check_parser(
+            self.show_host,
+            [SEGMENT_NAME, 'host-0', 'host-1', '--fields', 'uuid,reserved'],
+            [('fields', ['uuid,reserved'])])
+
+        columns, data = self.show_host.take_action(parsed_args)
+
+        # The failing host is identified without the name column
+        self.assertEqual(['uuid', 'reserved', 'host', 'status'], columns)
+        self.assertEqual([(HOST_ID, 'False', 'host-0', 'ok'),
+                          (None, None, 'host-1', 'Service unavailable')],
+                         list(data))
+
+    def test_run_columns(self):
+        self.app.client_manager.ha.get_host.return_value = self.dummy_host
+        parsed_args = self.check_parser(
+            self.show_host,
+            [SEGMENT_NAME, 'host-0', 'host-1', '-f', 'value', '-c', 'status',
+             '-c', 'host'], [])
+
+        self.assertEqual(0, self.show_host.run(parsed_args))
+
+        self.assertEqual('host-0 ok\nhost-1 ok\n',
+                         self.app.stdout.getvalue())
+
+    def test_run_failed_hosts(self):
+        self.app.client_manager.ha.get_host.side_effect = [
+            self.dummy_host, Exception('Service unavailable')]
+        parsed_args = self.check_parser(
+            self.show_host,
+            [SEGMENT_NAME, 'host-0', 'host-1', '-f', 'value', '-c', 'host',
+             '-c', 'status'], [])
+
+        ex = self.assertRaises(exceptions.CommandError, self.show_host.run,
+                               parsed_args)
+
+        self.assertEqual('1 of 2 hosts failed to show.', str(ex))
+        # The table is displayed before the error
+        self.assertEqual('host-0 ok\nhost-1 Service unavailable\n',
+                         self.app.stdout.getvalue())
+
+    def test_run_unknown_columns(self):
+        self.app.client_manager.ha.get_host.return_value = self.dummy_host
+        parsed_args = self.check_parser(
+            self.show_host,
+            [SEGMENT_NAME, 'host-0', 'host-1', '-c', 'bogus'], [])
+
+        self.assertRaises(exceptions.CommandError, self.show_host.run,
+                          parsed_args)
+
+    def test_take_action_unknown_fields(self):
+        parsed_args = self.check_parser(
+            self.show_host, [SEGMENT_NAME, 'host-0', '--fields', 'bogus'],
+            [])
+
+        self.assertRaises(exc.CommandError, self.show_host.take_action,
+                          parsed_args)
+        self.app.client_manager.ha.get_host.assert_not_called()
+
+
 class TestV1UpdateHost(BaseV1Host):
     def setUp(self):
         super(TestV1UpdateHost, self).setUp()
@@ -188,13 +740,13 @@ class TestV1DeleteHost(BaseV1Host):
     def test_take_action_by_uuid(self):
 
         # command param
-        parsed_args = FakeNamespace(segment_id=SEGMENT_ID, host=HOST_ID)
+        parsed_args = FakeNamespace(segment_id=SEGMENT_ID, host=[HOST_ID])
         self._test_take_action(parsed_args)
 
     def test_take_action_by_name(self):
 
         # command param
-        parsed_args = FakeNamespace(segment_id=SEGMENT_ID, host=HOST_NAME)
+        parsed_args = FakeNamespace(segment_id=SEGMENT_ID, host=[HOST_NAME])
         self._test_take_action(parsed_args)
 
     def _test_take_action(self, parsed_args):
@@ -209,3 +761,72 @@ class TestV1DeleteHost(BaseV1Host):
 
         self.app.client_manager.ha.delete_host.assert_called_once_with(
             HOST_ID, segment_id=SEGMENT_ID, ignore_missing=False)
+
+
+class TestV1DeleteMultipleHosts(BaseV1Host, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1DeleteMultipleHosts, self).setUp()
+        self.delete_host = DeleteHost(self.app, self.app_args,
+                                      cmd_name='host delete')
+        self.dummy_hosts = [FakeHosts(name='host-%d' % i, uuid=uuid.uuid4())
+                            for i in range(3)]
+        self.app.client_manager.ha.segments.return_value = self.dummy_segments
+        self.app.client_manager.ha.hosts.return_value = self.dummy_hosts
+
+    def test_take_action(self):
+        parsed_args = self.check_parser(
+            self.delete_host, [SEGMENT_NAME, 'host-0', 'host-1', 'host-2'],
+            [])
+
+        self.delete_host.take_action(parsed_args)
+
+        self.app.client_manager.ha.hosts.assert_called_once_with(SEGMENT_ID)
+        for host in self.dummy_hosts:
+            self.app.client_manager.ha.delete_host.assert_any_call(
+                host.uuid, segment_id=SEGMENT_ID, ignore_missing=False)
+
+    def test_take_action_failure(self):
+        def _delete_host(host_id, segment_id, ignore_missing):
+            if host_id == self.dummy_hosts[1].uuid:
+                raise Exception('Service unavailable')
+
+        self.app.client_manager.ha.delete_host.side_effect = _delete_host
+        parsed_args = self.check_parser(
+            self.delete_host, [SEGMENT_NAME, 'host-0', 'host-1', 'host-2'],
+            [])
+
+        self.assertRaises(exceptions.CommandError,
+                          self.delete_host.take_action, parsed_args)
+        self.assertEqual(3, self.app.client_manager.ha.delete_host.call_count)
+
+    def test_take_action_resume(self):
+        journal = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                               'delete.journal')
+        ha = self.app.client_manager.ha
+
+        def _delete_host(host_id, segment_id, ignore_missing):
+            if host_id == self.dummy_hosts[1].uuid:
+                raise Exception('Service unavailable')
+
+        ha.delete_host.side_effect = _delete_host
+        argv = [SEGMENT_NAME, 'host-0', 'host-1', 'host-2',
+                '--resume', journal]
+
+        self.assertRaises(exceptions.CommandError,
+                          self.delete_host.take_action,
+                          self.check_parser(self.delete_host, argv, []))
+
+        # only the failed host is deleted again
+        ha.reset_mock()
+        ha.delete_host.side_effect = None
+        self.delete_host.take_action(
+            self.check_parser(self.delete_host, argv, []))
+        ha.delete_host.assert_called_once_with(
+            self.dummy_hosts[1].uuid, segment_id=SEGMENT_ID,
+            ignore_missing=False)
+
+        # nothing is left to do, the API is not queried
+        ha.reset_mock()
+        self.delete_host.take_action(
+            self.check_parser(self.delete_host, argv, []))
+        self.assertEqual([], ha.method_calls)
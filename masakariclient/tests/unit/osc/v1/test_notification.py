@@ -17,13 +17,24 @@ test_masakariclient
 
 Tests for `masakariclient` module.
 """
+import io
+import os
 from unittest import mock
 import uuid
 
+from cliff.formatters import json_format
+import fixtures
+from osc_lib import exceptions
 from osc_lib.tests import utils as osc_lib_utils
 from osc_lib import utils
+from oslo_serialization import jsonutils
 
+from masakariclient.common import archive
+from masakariclient.common import format_columns
+from masakariclient.osc.v1.notification import ListNotification
+from masakariclient.osc.v1.notification import QueryNotificationArchive
 from masakariclient.osc.v1.notification import ShowNotification
+from masakariclient.osc.v1.notification import StatsNotification
 from masakariclient.tests import base
 
 NOTIFICATION_NAME = 'notification_name'
@@ -80,6 +91,138 @@ class BaseV1Notification(base.TestCase, osc_lib_utils.TestCommand):
                         'generated_time', 'payload']
 
 
+class TestListNotificationV1(BaseV1Notification):
+
+    def setUp(self):
+        super(TestListNotificationV1, self).setUp()
+        self.list_notification = ListNotification(
+            self.app, self.app_args, cmd_name='notification list')
+        self.client_manager.get.return_value = base.fake_list_response(
+            'notifications', [self.dummy_notification.to_dict()])
+
+    def test_take_action_fields(self):
+        arglist = ['--fields', 'notification_uuid,status']
+        parsed_args = self.check_parser(self.list_notification, arglist, [])
+
+        columns, data = self.list_notification.take_action(parsed_args)
+
+        self.assertEqual(['notification_uuid', 'status'], columns)
+        self.assertEqual([(NOTIFICATION_ID, 'finished')], list(data))
+
+    def test_take_action_payload_summary(self):
+        arglist = ['--fields', 'payload']
+        parsed_args = self.check_parser(self.list_notification, arglist, [])
+
+        columns, data = self.list_notification.take_action(parsed_args)
+
+        payload, = next(data)
+        self.assertEqual('event=LIFECYCLE, instances=1, '
+                         'vir_domain_event=STOPPED_FAILED',
+                         payload.human_readable())
+        self.assertEqual(self.dummy_notification.to_dict()['payload'],
+                         payload.machine_readable())
+
+    def test_produce_output_json(self):
+        arglist = ['--fields', 'notification_uuid,payload', '--noindent']
+        parsed_args = self.check_parser(self.list_notification, arglist, [])
+        self.app.stdout = io.StringIO()
+        self.list_notification.formatter = json_format.JSONFormatter()
+
+        columns, data = self.list_notification.take_action(parsed_args)
+        self.list_notification.produce_output(parsed_args, columns, data)
+
+        self.assertIsInstance(self.list_notification.formatter,
+                              format_columns.StreamingJSONFormatter)
+        self.assertEqual(
+            [{'notification_uuid': str(NOTIFICATION_ID),
+              'payload': self.dummy_notification.to_dict()['payload']}],
+            jsonutils.loads(self.app.stdout.getvalue()))
+
+
+class TestStatsNotificationV1(BaseV1Notification):
+
+    def setUp(self):
+        super(TestStatsNotificationV1, self).setUp()
+        self.stats = StatsNotification(self.app, self.app_args,
+                                       cmd_name='notification stats')
+        notification = {
+            'notification_uuid': 'notification-1',
+            'type': 'COMPUTE_HOST',
+            'status': 'finished',
+            'source_host_uuid': 'host-1',
+            'generated_time': '2024-01-01T00:00:00.000000',
+            'updated_at': '2024-01-01T00:05:00.000000'}
+        vmove = {'uuid': 'vmove-1', 'status': 'succeeded',
+                 'start_time': '2024-01-01T00:01:00.000000',
+                 'end_time': '2024-01-01T00:01:30.000000'}
+        self.client_manager.default_microversion = '1.3'
+        self.client_manager.get.side_effect = [
+            base.fake_list_response('notifications', [notification]),
+            base.fake_list_response('vmoves', [vmove])]
+
+    def test_take_action(self):
+        arglist = ['--group-by', 'host', '--filters',
+                   'generated-since=2024-01-01']
+        parsed_args = self.check_parser(self.stats, arglist, [])
+
+        columns, data = self.stats.take_action(parsed_args)
+
+        self.assertEqual('Group', columns[0])
+        self.assertEqual(
+            [('all', 'evacuation', 1, 30.0), ('all', 'recovery', 1, 300.0),
+             ('host=host-1', 'evacuation', 1, 30.0),
+             ('host=host-1', 'recovery', 1, 300.0)],
+            [row[:4] for row in data])
+        self.client_manager.get.assert_any_call(
+            '/notifications/notification-1/vmoves',
+            headers={'Accept': 'application/json'}, params={},
+            microversion='1.3')
+
+
+class TestQueryNotificationArchiveV1(BaseV1Notification):
+
+    def setUp(self):
+        super(TestQueryNotificationArchiveV1, self).setUp()
+        self.query = QueryNotificationArchive(
+            self.app, self.app_args, cmd_name='notification archive query')
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'archive.sqlite')
+        notification = self.dummy_notification.to_dict()
+        with archive.Archive(self.path) as db:
+            db.add_notification(tuple(
+                str(notification.get(column))
+                if column == 'notification_uuid' else notification.get(column)
+                for column in archive.NOTIFICATION_COLUMNS))
+
+    def test_take_action(self):
+        arglist = ['--db', self.path, '--type', 'VM', '--status', 'finished',
+                   '--fields', 'notification_uuid,payload']
+        parsed_args = self.check_parser(self.query, arglist, [])
+
+        columns, data = self.query.take_action(parsed_args)
+
+        self.assertEqual(['notification_uuid', 'payload'], columns)
+        (notification_uuid, payload), = list(data)
+        self.assertEqual(str(NOTIFICATION_ID), notification_uuid)
+        self.assertEqual(self.dummy_notification.to_dict()['payload'],
+                         payload.machine_readable())
+
+    def test_take_action_filtered_out(self):
+        arglist = ['--db', self.path, '--type', 'COMPUTE_HOST']
+        parsed_args = self.check_parser(self.query, arglist, [])
+
+        columns, data = self.query.take_action(parsed_args)
+
+        self.assertEqual([], list(data))
+
+    def test_take_action_missing_archive(self):
+        arglist = ['--db', self.path + '.missing']
+        parsed_args = self.check_parser(self.query, arglist, [])
+
+        self.assertRaises(exceptions.CommandError, self.query.take_action,
+                          parsed_args)
+
+
 class TestShowNotificationV1(BaseV1Notification):
 
     def test_take_action_by_uuid(self):
@@ -87,14 +230,21 @@ class TestShowNotificationV1(BaseV1Notification):
         parsed_args = self.check_parser(self.show_notification, arglist, [])
         self._test_take_action(parsed_args)
 
+    def test_take_action_full_payload(self):
+        arglist = ['8c35987c-f416-46ca-be37-52f58fd8d294', '--payload', 'full']
+        parsed_args = self.check_parser(self.show_notification, arglist, [])
+        self._test_take_action(parsed_args, payload='full')
+
     @mock.patch.object(utils, 'get_dict_properties')
-    def _test_take_action(self, parsed_args, mock_get_dict_properties):
+    def _test_take_action(self, parsed_args, mock_get_dict_properties,
+                          payload='summary'):
         self.app.client_manager.ha.get_notification.return_value = (
             self.dummy_notification)
 
         self.show_notification.take_action(parsed_args)
         mock_get_dict_properties.assert_called_once_with(
-            self.dummy_notification.to_dict(), self.columns, formatters={})
+            self.dummy_notification.to_dict(), self.columns,
+            formatters=format_columns.get_notification_formatters(payload))
 
 
 class TestShowNotificationV1_1(TestShowNotificationV1):
@@ -17,16 +17,27 @@ test_masakariclient
 
 Tests for `masakariclient` module.
 """
+import os
 from unittest import mock
 
 import ddt
+import fixtures
 import uuid
 
+from openstack import exceptions as sdk_exc
 from osc_lib.tests import utils as osc_lib_utils
 from osc_lib import utils
+from oslo_serialization import jsonutils
 
+from masakariclient.common import exception as exc
+from masakariclient.osc.v1.segment import ApplySegment
+from masakariclient.osc.v1.segment import CloneSegment
 from masakariclient.osc.v1.segment import CreateSegment
 from masakariclient.osc.v1.segment import DeleteSegment
+from masakariclient.osc.v1.segment import ExportSegment
+from masakariclient.osc.v1.segment import ImportSegment
+from masakariclient.osc.v1.segment import ListSegment
+from masakariclient.osc.v1.segment import ListSegmentCapacity
 from masakariclient.osc.v1.segment import ShowSegment
 from masakariclient.osc.v1.segment import UpdateSegment
 from masakariclient.tests import base
@@ -39,9 +50,13 @@ class FakeNamespace(object):
     """Fake parser object."""
     def __init__(self, segment=None, name=None,
                  description=None,
-                 recovery_method=None, service_type=None):
+                 recovery_method=None, service_type=None,
+                 cascade=False, resume=None, fields=None):
         super(FakeNamespace, self).__init__()
+        self.fields = fields
         self.segment = segment
+        self.cascade = cascade
+        self.resume = resume
         self.name = name
         self.description = description
         self.recovery_method = recovery_method
@@ -61,6 +76,16 @@ class FakeSegments(object):
         self.service_type = service_type
 
 
+class FakeHosts(object):
+    """Fake segment host list."""
+    def __init__(self, name=None, reserved=False, on_maintenance=False):
+        super(FakeHosts, self).__init__()
+        self.name = name
+        self.uuid = uuid.uuid4()
+        self.reserved = reserved
+        self.on_maintenance = on_maintenance
+
+
 class FakeSegment(object):
     """Fake segment show detail."""
     def __init__(self,):
@@ -92,6 +117,503 @@ class BaseV1Segment(base.TestCase):
         self.dummy_segment = FakeSegment()
 
 
+class TestV1ListSegment(BaseV1Segment, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1ListSegment, self).setUp()
+        self.list_seg = ListSegment(self.app, self.app_args,
+                                    cmd_name='segment list')
+        self.columns = ['uuid', 'name', 'description', 'service_type',
+                        'recovery_method']
+        self.dummy_segments = [
+            FakeSegments(name='segment-%d' % i, uuid=uuid.uuid4(),
+                         recovery_method='reserved_host')
+            for i in range(3)]
+        self.app.client_manager.ha.segments.return_value = (
+            self.dummy_segments)
+
+    def test_take_action(self):
+        self.app.client_manager.ha.get.return_value = (
+            base.fake_list_response('segments', [
+                {'uuid': str(s.uuid), 'name': s.name,
+                 'recovery_method': s.recovery_method}
+                for s in self.dummy_segments]))
+        parsed_args = self.check_parser(self.list_seg, [], [])
+        columns, data = self.list_seg.take_action(parsed_args)
+        self.assertEqual(self.columns, columns)
+        self.assertEqual((str(self.dummy_segments[0].uuid), 'segment-0', None,
+                          None, 'reserved_host'), next(data))
+        self.assertEqual(2, len(list(data)))
+        self.app.client_manager.ha.get.assert_called_once_with(
+            '/segments', headers=mock.ANY, params={}, microversion='1.0')
+        self.app.client_manager.ha.hosts.assert_not_called()
+
+    def test_take_action_with_host_stats(self):
+        hosts = {
+            self.dummy_segments[0].uuid: [
+                FakeHosts('host-0'),
+                FakeHosts('host-1', reserved=True),
+                FakeHosts('host-2', reserved=True, on_maintenance=True)],
+            self.dummy_segments[1].uuid: [],
+            self.dummy_segments[2].uuid: [
+                FakeHosts('host-3', on_maintenance=True)],
+        }
+        self.app.client_manager.ha.hosts.side_effect = (
+            lambda segment_id: iter(hosts[segment_id]))
+        parsed_args = self.check_parser(
+            self.list_seg, ['--with-host-stats'], [])
+
+        columns, data = self.list_seg.take_action(parsed_args)
+
+        self.assertEqual(self.columns + ['hosts', 'reserved_hosts',
+                                         'maintenance_hosts',
+                                         'available_reserved_hosts'],
+                         columns)
+        rows = list(data)
+        # the order of the segments is preserved
+        self.assertEqual(['segment-0', 'segment-1', 'segment-2'],
+                         [row[1] for row in rows])
+        self.assertEqual([(3, 2, 1, 1), (0, 0, 0, 0), (1, 0, 1, 0)],
+                         [row[-4:] for row in rows])
+
+    def test_take_action_with_host_stats_cache(self):
+        cache_file = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'stats.json')
+        ha = self.app.client_manager.ha
+        ha.hosts.side_effect = (
+            lambda segment_id: iter([FakeHosts('host-0', reserved=True)]))
+        parsed_args = self.check_parser(
+            self.list_seg, ['--with-host-stats', '--cache-file', cache_file],
+            [])
+
+        columns, data = self.list_seg.take_action(parsed_args)
+        self.assertEqual([(1, 1, 0, 1)] * 3, [row[-4:] for row in data])
+        self.assertEqual(3, ha.hosts.call_count)
+
+        # The counts are served from the cache, except for the segment
+        # missing from it
+        ha.hosts.reset_mock()
+        self.dummy_segments.append(
+            FakeSegments(name='segment-3', uuid=uuid.uuid4(),
+                         recovery_method='reserved_host'))
+        columns, data = self.list_seg.take_action(parsed_args)
+        self.assertEqual([(1, 1, 0, 1)] * 4, [row[-4:] for row in data])
+        ha.hosts.assert_called_once_with(self.dummy_segments[3].uuid)
+
+        # Expired counts are fetched again
+        ha.hosts.reset_mock()
+        parsed_args.cache_max_age = -1
+        columns, data = self.list_seg.take_action(parsed_args)
+        self.assertEqual(4, len(list(data)))
+        self.assertEqual(4, ha.hosts.call_count)
+
+    def test_take_action_with_host_stats_fields(self):
+        self.app.client_manager.ha.hosts.side_effect = (
+            lambda segment_id: iter([FakeHosts('host-0', reserved=True)]))
+        parsed_args = self.check_parser(
+            self.list_seg,
+            ['--with-host-stats', '--fields', 'name,reserved_hosts'], [])
+
+        columns, data = self.list_seg.take_action(parsed_args)
+
+        self.assertEqual(['name', 'reserved_hosts'], columns)
+        self.assertEqual([('segment-0', 1), ('segment-1', 1),
+                          ('segment-2', 1)], list(data))
+
+
+class TestV1ListSegmentCapacity(BaseV1Segment, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1ListSegmentCapacity, self).setUp()
+        self.cmd = ListSegmentCapacity(self.app, self.app_args,
+                                       cmd_name='segment capacity')
+        self.dummy_segments = [
+            FakeSegments(name='rh', uuid=uuid.uuid4(),
+                         recovery_method='reserved_host'),
+            FakeSegments(name='auto', uuid=uuid.uuid4(),
+                         recovery_method='auto'),
+            FakeSegments(name='rh_priority', uuid=uuid.uuid4(),
+                         recovery_method='rh_priority'),
+        ]
+        self.hosts = {
+            self.dummy_segments[0].uuid: [
+                FakeHosts('host-0'),
+                FakeHosts('host-1', reserved=True),
+                FakeHosts('host-2', reserved=True)],
+            self.dummy_segments[2].uuid: [
+                FakeHosts('host-3'),
+                FakeHosts('host-4', reserved=True, on_maintenance=True)],
+        }
+        self.app.client_manager.ha.segments.return_value = (
+            self.dummy_segments)
+        self.app.client_manager.ha.hosts.side_effect = (
+            lambda segment_id: iter(self.hosts[segment_id]))
+
+    def test_take_action(self):
+        parsed_args = self.check_parser(self.cmd, ['--failures', '2'], [])
+        columns, data = self.cmd.take_action(parsed_args)
+        rows = list(data)
+
+        self.assertEqual(['uuid', 'name', 'recovery_method', 'hosts',
+                          'reserved_hosts', 'maintenance_hosts',
+                          'available_reserved_hosts', 'headroom', 'at_risk'],
+                         columns)
+        # segments using the auto recovery method are not reported
+        self.assertEqual(['rh', 'rh_priority'], [row[1] for row in rows])
+        self.assertEqual((3, 2, 0, 2, 0, False), rows[0][3:])
+        self.assertEqual((2, 1, 1, 0, -2, True), rows[1][3:])
+        self.assertEqual(2, self.app.client_manager.ha.hosts.call_count)
+
+    def test_take_action_at_risk(self):
+        parsed_args = self.check_parser(self.cmd, ['--at-risk'], [])
+        columns, data = self.cmd.take_action(parsed_args)
+        self.assertEqual(['rh_priority'], [row[1] for row in data])
+
+    def test_take_action_from_snapshot(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'topology.jsonl')
+        with open(path, 'w') as snapshot:
+            for segment in self.dummy_segments:
+                hosts = self.hosts.get(segment.uuid, [])
+                snapshot.write(jsonutils.dumps({
+                    'uuid': str(segment.uuid),
+                    'name': segment.name,
+                    'recovery_method': segment.recovery_method,
+                    'hosts': [{'name': host.name,
+                               'reserved': host.reserved,
+                               'on_maintenance': host.on_maintenance}
+                              for host in hosts]}) + '\n')
+        parsed_args = self.check_parser(
+            self.cmd, ['--from-snapshot', path], [])
+
+        columns, data = self.cmd.take_action(parsed_args)
+        rows = list(data)
+
+        self.assertEqual(['rh', 'rh_priority'], [row[1] for row in rows])
+        self.assertEqual((3, 2, 0, 2, 1, False), rows[0][3:])
+        self.assertEqual((2, 1, 1, 0, -1, True), rows[1][3:])
+        self.app.client_manager.ha.segments.assert_not_called()
+
+
+class TestV1ExportImportSegment(BaseV1Segment, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1ExportImportSegment, self).setUp()
+        self.export_cmd = ExportSegment(self.app, self.app_args,
+                                        cmd_name='segment export')
+        self.import_cmd = ImportSegment(self.app, self.app_args,
+                                        cmd_name='segment import')
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'topology.jsonl')
+        self.dummy_segments = [
+            FakeSegments(name='segment-%d' % i, uuid=str(uuid.uuid4()),
+                         recovery_method='auto', service_type='COMPUTE')
+            for i in range(3)]
+        self.hosts = {
+            segment.uuid: [FakeHosts('%s-host-%d' % (segment.name, i),
+                                     reserved=bool(i))
+                           for i in range(2)]
+            for segment in self.dummy_segments}
+        for hosts in self.hosts.values():
+            for host in hosts:
+                host.type = 'COMPUTE'
+                host.control_attributes = 'SSH'
+        self.app.client_manager.ha.segments.return_value = (
+            self.dummy_segments)
+        self.app.client_manager.ha.hosts.side_effect = (
+            lambda segment_id: iter(self.hosts[segment_id]))
+        self.app.client_manager.ha.create_segment.side_effect = (
+            lambda **attrs: FakeSegments(uuid='new-' + attrs['name']))
+
+    def _export(self):
+        parsed_args = self.check_parser(self.export_cmd, [self.path], [])
+        self.export_cmd.take_action(parsed_args)
+
+    def _import(self, arglist=()):
+        parsed_args = self.check_parser(
+            self.import_cmd, [self.path] + list(arglist), [])
+        columns, data = self.import_cmd.take_action(parsed_args)
+        self.assertEqual(['name', 'uuid', 'hosts', 'status'], columns)
+        return sorted(data)
+
+    def test_export(self):
+        self._export()
+        with open(self.path) as snapshot:
+            segments = [jsonutils.loads(line) for line in snapshot]
+        self.assertEqual(['segment-0', 'segment-1', 'segment-2'],
+                         [segment['name'] for segment in segments])
+        self.assertEqual(
+            {'uuid': None, 'name': 'segment-0-host-1', 'type': 'COMPUTE',
+             'control_attributes': 'SSH', 'reserved': True,
+             'on_maintenance': False},
+            dict(segments[0]['hosts'][1], uuid=None))
+
+    def test_import(self):
+        self._export()
+        rows = self._import()
+        self.assertEqual(
+            [('segment-%d' % i, 'new-segment-%d' % i, 2, 'imported')
+             for i in range(3)],
+            rows)
+        self.app.client_manager.ha.create_segment.assert_any_call(
+            name='segment-0', recovery_method='auto', service_type='COMPUTE')
+        self.app.client_manager.ha.create_host.assert_any_call(
+            segment_id='new-segment-0', name='segment-0-host-1',
+            type='COMPUTE', control_attributes='SSH', reserved=True,
+            on_maintenance=False)
+        self.assertEqual(
+            6, self.app.client_manager.ha.create_host.call_count)
+
+    def test_import_resume_from_checkpoint(self):
+        self._export()
+        checkpoint = self.path + '.checkpoint'
+
+        def _create_host(segment_id, **attrs):
+            if attrs['name'] == 'segment-1-host-1':
+                raise Exception('Service unavailable')
+
+        self.app.client_manager.ha.create_host.side_effect = _create_host
+        rows = self._import(['--resume', checkpoint])
+        self.assertEqual('error: Service unavailable', rows[1][3])
+
+        self.app.client_manager.ha.create_segment.reset_mock()
+        self.app.client_manager.ha.create_host.reset_mock()
+        self.app.client_manager.ha.create_host.side_effect = None
+        rows = self._import(['--resume', checkpoint])
+
+        # only the failed host is created again
+        self.app.client_manager.ha.create_segment.assert_not_called()
+        self.app.client_manager.ha.create_host.assert_called_once_with(
+            segment_id='new-segment-1', name='segment-1-host-1',
+            type='COMPUTE', control_attributes='SSH', reserved=True,
+            on_maintenance=False)
+        self.assertEqual(('segment-1', 'new-segment-1', 1, 'imported'),
+                         rows[1])
+
+
+class TestV1ApplySegment(BaseV1Segment, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1ApplySegment, self).setUp()
+        self.cmd = ApplySegment(self.app, self.app_args,
+                                cmd_name='segment apply')
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'desired.yaml')
+        self.dummy_segments = [
+            FakeSegments(name='segment-%d' % i, uuid='segment-uuid-%d' % i,
+                         recovery_method='auto', service_type='COMPUTE',
+                         description=None)
+            for i in range(2)]
+        self.hosts = {
+            'segment-uuid-0': [FakeHosts('host-0'),
+                               FakeHosts('host-1', reserved=True)],
+            'segment-uuid-1': [FakeHosts('host-2')],
+        }
+        for hosts in self.hosts.values():
+            for host in hosts:
+                host.uuid = host.name + '-uuid'
+                host.type = 'COMPUTE'
+                host.control_attributes = 'SSH'
+        self.app.client_manager.ha.segments.return_value = (
+            self.dummy_segments)
+        self.app.client_manager.ha.hosts.side_effect = (
+            lambda segment_id: iter(self.hosts[segment_id]))
+        self.app.client_manager.ha.create_segment.return_value = (
+            FakeSegments(uuid='segment-uuid-new'))
+
+    def _apply(self, desired, arglist=()):
+        with open(self.path, 'w') as desired_file:
+            desired_file.write(desired)
+        parsed_args = self.check_parser(
+            self.cmd, [self.path] + list(arglist), [])
+        columns, data = self.cmd.take_action(parsed_args)
+        self.assertEqual(['action', 'resource', 'segment', 'name',
+                          'changes', 'status'], columns)
+        return data
+
+    def _assert_no_writes(self):
+        for method in ('create_segment', 'update_segment', 'delete_segment',
+                       'create_host', 'update_host', 'delete_host'):
+            getattr(self.app.client_manager.ha, method).assert_not_called()
+
+    def test_apply_no_changes(self):
+        data = self._apply("""
+segments:
+  - name: segment-0
+    recovery_method: auto
+    hosts:
+      - name: host-0
+        reserved: false
+      - name: host-1
+        reserved: "True"
+        type: COMPUTE
+""")
+        self.assertEqual([], data)
+        self._assert_no_writes()
+        # the hosts of the segments missing from the file are not fetched
+        self.app.client_manager.ha.hosts.assert_called_once_with(
+            'segment-uuid-0')
+
+    def test_apply_dry_run(self):
+        data = self._apply("""
+- name: segment-0
+  recovery_method: rh_priority
+  hosts:
+    - name: host-0
+      on_maintenance: true
+    - name: host-3
+      type: COMPUTE
+      control_attributes: SSH
+- name: segment-2
+  recovery_method: auto
+  service_type: COMPUTE
+  hosts:
+    - name: host-4
+      type: COMPUTE
+      control_attributes: SSH
+""", ['--dry-run', '--prune'])
+
+        self.assertEqual([
+            ('update', 'segment', 'segment-0', 'segment-0',
+             'recovery_method: auto -> rh_priority', 'planned'),
+            ('create', 'segment', 'segment-2', 'segment-2',
+             'recovery_method=auto, service_type=COMPUTE', 'planned'),
+            ('delete', 'host', 'segment-0', 'host-1', '', 'planned'),
+            ('delete', 'host', 'segment-1', 'host-2', '', 'planned'),
+            ('update', 'host', 'segment-0', 'host-0',
+             'on_maintenance: False -> True', 'planned'),
+            ('create', 'host', 'segment-0', 'host-3',
+             'control_attributes=SSH, type=COMPUTE', 'planned'),
+            ('create', 'host', 'segment-2', 'host-4',
+             'control_attributes=SSH, type=COMPUTE', 'planned'),
+            ('delete', 'segment', 'segment-1', 'segment-1', '', 'planned'),
+        ], data)
+        self._assert_no_writes()
+
+    def test_apply(self):
+        data = self._apply("""
+- name: segment-0
+  hosts:
+    - name: host-0
+      on_maintenance: true
+- name: segment-2
+  recovery_method: auto
+  service_type: COMPUTE
+  hosts:
+    - name: host-1
+      type: COMPUTE
+      control_attributes: SSH
+""")
+
+        self.assertEqual(['done'] * 4, [row[-1] for row in data])
+        ha = self.app.client_manager.ha
+        ha.create_segment.assert_called_once_with(
+            name='segment-2', recovery_method='auto', service_type='COMPUTE')
+        ha.update_host.assert_called_once_with(
+            'host-0-uuid', segment_id='segment-uuid-0', on_maintenance=True)
+        # host-1 moves from segment-0 to the new segment
+        ha.delete_host.assert_called_once_with(
+            'host-1-uuid', segment_id='segment-uuid-0', ignore_missing=False)
+        ha.create_host.assert_called_once_with(
+            segment_id='segment-uuid-new', name='host-1', type='COMPUTE',
+            control_attributes='SSH')
+        ha.delete_segment.assert_not_called()
+
+    def test_apply_without_hosts_key(self):
+        data = self._apply("""
+- name: segment-0
+  description: updated
+- name: segment-1
+  hosts: []
+""")
+
+        # The hosts of segment-0 are kept, those of segment-1 deleted
+        self.assertEqual([
+            ('update', 'segment', 'segment-0', 'segment-0',
+             'description: None -> updated', 'done'),
+            ('delete', 'host', 'segment-1', 'host-2', '', 'done'),
+        ], data)
+        ha = self.app.client_manager.ha
+        ha.delete_host.assert_called_once_with(
+            'host-2-uuid', segment_id='segment-uuid-1', ignore_missing=False)
+
+    def test_apply_duplicate_host(self):
+        self.assertRaises(exc.CommandError, self._apply, """
+- name: segment-0
+  hosts: [{name: host-0}]
+- name: segment-1
+  hosts: [{name: host-0}]
+""")
+
+    def test_apply_invalid_file(self):
+        self.assertRaises(exc.CommandError, self._apply, "segments: 1")
+
+
+class TestV1CloneSegment(BaseV1Segment, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1CloneSegment, self).setUp()
+        self.cmd = CloneSegment(self.app, self.app_args,
+                                cmd_name='segment clone')
+        self.app.client_manager.ha.segments.return_value = [
+            FakeSegments(name=SEGMENT_NAME, uuid=SEGMENT_ID)]
+        self.app.client_manager.ha.get_segment.return_value = FakeSegments(
+            name=SEGMENT_NAME, uuid=SEGMENT_ID, description='production',
+            recovery_method='auto', service_type='COMPUTE')
+        self.hosts = [FakeHosts('host-%d' % i, reserved=bool(i))
+                      for i in range(3)]
+        for host in self.hosts:
+            host.type = 'COMPUTE'
+            host.control_attributes = 'SSH'
+        self.app.client_manager.ha.hosts.return_value = self.hosts
+        self.app.client_manager.ha.create_segment.return_value = (
+            FakeSegments(uuid='new-uuid'))
+
+    def test_take_action(self):
+        parsed_args = self.check_parser(
+            self.cmd, [SEGMENT_NAME, 'staging', '--host-name-map',
+                       'host-0=staging-0;host-1=staging-1'], [])
+
+        columns, data = self.cmd.take_action(parsed_args)
+
+        self.assertEqual(['source_host', 'name', 'status'], columns)
+        self.assertEqual([('host-2', None, 'skipped'),
+                          ('host-0', 'staging-0', 'created'),
+                          ('host-1', 'staging-1', 'created')], data)
+        ha = self.app.client_manager.ha
+        ha.hosts.assert_called_once_with(SEGMENT_ID)
+        ha.create_segment.assert_called_once_with(
+            name='staging', description='production',
+            recovery_method='auto', service_type='COMPUTE')
+        ha.create_host.assert_any_call(
+            segment_id='new-uuid', name='staging-1', type='COMPUTE',
+            control_attributes='SSH', reserved=True, on_maintenance=False)
+        self.assertEqual(2, ha.create_host.call_count)
+
+    def test_take_action_resume(self):
+        journal = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                               'clone.journal')
+
+        def _create_host(segment_id, name, **attrs):
+            if name == 'staging-1':
+                raise Exception('Service unavailable')
+
+        ha = self.app.client_manager.ha
+        ha.create_host.side_effect = _create_host
+        argv = [SEGMENT_NAME, 'staging', '--host-name-map',
+                'host-0=staging-0;host-1=staging-1', '--resume', journal]
+        self.cmd.take_action(self.check_parser(self.cmd, argv, []))
+
+        # the new segment and the first host are not created again
+        ha.reset_mock()
+        ha.create_host.side_effect = None
+        columns, data = self.cmd.take_action(
+            self.check_parser(self.cmd, argv, []))
+
+        self.assertEqual([('host-2', None, 'skipped'),
+                          ('host-0', 'staging-0', 'recorded'),
+                          ('host-1', 'staging-1', 'created')], data)
+        ha.create_segment.assert_not_called()
+        ha.create_host.assert_called_once_with(
+            segment_id='new-uuid', name='staging-1', type='COMPUTE',
+            control_attributes='SSH', reserved=True, on_maintenance=False)
+
+
 class TestV1ShowSegment(BaseV1Segment):
     def setUp(self):
         super(TestV1ShowSegment, self).setUp()
@@ -253,6 +775,81 @@ class TestV1DeleteSegment(BaseV1Segment):
             SEGMENT_ID, False)
 
 
+class TestV1DeleteSegmentCascade(BaseV1Segment, osc_lib_utils.TestCommand):
+    def setUp(self):
+        super(TestV1DeleteSegmentCascade, self).setUp()
+        self.delete_seg = DeleteSegment(self.app, self.app_args,
+                                        cmd_name='segment delete')
+        self.useFixture(fixtures.MockPatch('time.sleep'))
+        self.dummy_segments = [
+            FakeSegments(name='segment-%d' % i, uuid='segment-uuid-%d' % i)
+            for i in range(2)]
+        self.hosts = {
+            'segment-uuid-0': [FakeHosts('host-0'), FakeHosts('host-1')],
+            'segment-uuid-1': [FakeHosts('host-2')],
+        }
+        self.app.client_manager.ha.segments.return_value = (
+            self.dummy_segments)
+        self.app.client_manager.ha.hosts.side_effect = (
+            lambda segment_id: iter(self.hosts[segment_id]))
+
+    def test_take_action(self):
+        conflicts = []
+
+        def _delete_host(host_id, segment_id, ignore_missing):
+            # the first deletion of host-0 conflicts with a recovery
+            if host_id == self.hosts['segment-uuid-0'][0].uuid and (
+                    not conflicts):
+                conflicts.append(host_id)
+                raise sdk_exc.ConflictException(http_status=409)
+
+        self.app.client_manager.ha.delete_host.side_effect = _delete_host
+        parsed_args = self.check_parser(
+            self.delete_seg, ['segment-0', 'segment-1', '--cascade'], [])
+
+        self.delete_seg.take_action(parsed_args)
+
+        ha = self.app.client_manager.ha
+        # the segment names are resolved with a single listing
+        ha.segments.assert_called_once_with()
+        self.assertEqual(4, ha.delete_host.call_count)
+        self.assertEqual(
+            [mock.call('segment-uuid-0', False),
+             mock.call('segment-uuid-1', False)],
+            sorted(ha.delete_segment.call_args_list))
+
+    def test_take_action_host_failure(self):
+        def _delete_host(host_id, segment_id, ignore_missing):
+            if segment_id == 'segment-uuid-1':
+                raise sdk_exc.ConflictException(http_status=409)
+
+        self.app.client_manager.ha.delete_host.side_effect = _delete_host
+        parsed_args = self.check_parser(
+            self.delete_seg, ['segment-0', 'segment-1', '--cascade'], [])
+
+        self.delete_seg.take_action(parsed_args)
+
+        # the segment whose host could not be deleted is kept
+        self.app.client_manager.ha.delete_segment.assert_called_once_with(
+            'segment-uuid-0', False)
+
+    def test_take_action_resume(self):
+        journal = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                               'delete.journal')
+        ha = self.app.client_manager.ha
+        ha.delete_segment.side_effect = (
+            lambda uuid, ignore_missing: self.hosts.pop(uuid))
+        argv = ['segment-0', 'segment-1', '--cascade', '--resume', journal]
+        self.delete_seg.take_action(
+            self.check_parser(self.delete_seg, argv, []))
+
+        # the deleted segments are skipped without querying the API
+        ha.reset_mock()
+        self.delete_seg.take_action(
+            self.check_parser(self.delete_seg, argv, []))
+        self.assertEqual([], ha.method_calls)
+
+
 @ddt.ddt
 class TestV1CreateSegment(BaseV1Segment, osc_lib_utils.TestCommand):
 
@@ -12,11 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 from unittest import mock
 import uuid
 
+import fixtures
+from osc_lib import exceptions
 from osc_lib import utils
 
+from masakariclient.osc.v1.vmove import ListVMove
 from masakariclient.osc.v1.vmove import ShowVMove
 from masakariclient.tests import base
 
@@ -27,8 +31,9 @@ SERVER_ID = uuid.uuid4()
 
 class FakeNamespace(object):
     """Fake parser object."""
-    def __init__(self, notification_id=None, vmove_id=None):
+    def __init__(self, notification_id=None, vmove_id=None, fields=None):
         super(FakeNamespace, self).__init__()
+        self.fields = fields
         self.notification_id = notification_id
         self.vmove_id = vmove_id
 
@@ -91,3 +96,88 @@ class TestV1ShowVMove(BaseV1VMove):
             VMOVE_ID, NOTIFICATION_ID)
         mock_get_dict_properties.assert_called_once_with(
             self.dummy_vmove.to_dict(), self.columns, formatters={})
+
+
+class TestV1ListVMoveWatch(BaseV1VMove):
+    def setUp(self):
+        super(TestV1ListVMoveWatch, self).setUp()
+        self.list_vmove = ListVMove(self.app, self.app_args,
+                                    cmd_name='notification vmove list')
+        self.mock_sleep = self.useFixture(fixtures.MockPatch(
+            'time.sleep')).mock
+        self.stream = io.StringIO()
+        self.useFixture(fixtures.MonkeyPatch('sys.stderr', self.stream))
+        self.client_manager.default_microversion = '1.3'
+        self.client_manager.get_notification.side_effect = [
+            mock.Mock(notification_uuid='n1', status='running'),
+            mock.Mock(notification_uuid='n1', status='running'),
+            mock.Mock(notification_uuid='n1', status='finished'),
+        ]
+        self.client_manager.get_vmove.return_value = mock.Mock(
+            **self._vmove('v1', 'succeeded', '00:01', '00:02'))
+        self.listings = []
+        self.client_manager.get.side_effect = self._list
+
+    @staticmethod
+    def _vmove(uuid, status, start=None, end=None):
+        vmove = {'uuid': uuid, 'server_id': 'server-%s' % uuid,
+                 'server_name': 'vm', 'source_host': 'host-1',
+                 'dest_host': 'host-2', 'type': 'evacuation',
+                 'status': status, 'start_time': None, 'end_time': None}
+        if start:
+            vmove['start_time'] = '2024-01-01T00:%s.000000' % start
+        if end:
+            vmove['end_time'] = '2024-01-01T00:%s.000000' % end
+        return vmove
+
+    def _list(self, uri, params=None, **kwargs):
+        self.listings.append(params.get('status'))
+        polls = [
+            # Initial listing
+            [self._vmove('v1', 'ongoing', '00:01'),
+             self._vmove('v2', 'pending')],
+            # In flight moves while the notification is running
+            [],
+            [self._vmove('v2', 'ongoing', '00:00')],
+            # Final listing
+            [self._vmove('v2', 'succeeded', '00:00', '00:03'),
+             self._vmove('v1', 'succeeded', '00:01', '00:02')],
+        ]
+        records = polls[len(self.listings) - 1]
+        for record in records:
+            record['instance_uuid'] = record.pop('server_id', None)
+            record['instance_name'] = record.pop('server_name', None)
+        return base.fake_list_response('vmoves', records)
+
+    def test_take_action_watch(self):
+        arglist = ['n1', '--watch', '--poll-interval', '1',
+                   '--fields', 'uuid,status']
+        parsed_args = self.list_vmove.get_parser(
+            'notification vmove list').parse_args(arglist)
+
+        columns, data = self.list_vmove.take_action(parsed_args)
+
+        self.assertEqual(['uuid', 'status'], columns)
+        self.assertEqual([['v2', 'succeeded'], ['v1', 'succeeded']],
+                         list(data))
+        # Only the moves in flight are listed while the notification runs,
+        # and the move no longer in flight is fetched alone.
+        self.assertEqual([None, 'pending', 'ongoing', None], self.listings)
+        self.client_manager.get_vmove.assert_called_once_with('v1', 'n1')
+        progress = self.stream.getvalue().splitlines()
+        self.assertEqual(3, len(progress))
+        self.assertEqual('Notification n1 running: 0/2 vmoves done '
+                         '(1 ongoing, 1 pending), ETA unknown', progress[0])
+        self.assertIn('1/2 vmoves done (1 ongoing, 1 succeeded), ETA ',
+                      progress[1])
+        self.assertEqual('Notification n1 finished: 2/2 vmoves done '
+                         '(2 succeeded)', progress[2])
+        self.assertEqual(2, self.mock_sleep.call_count)
+
+    def test_take_action_watch_with_limit(self):
+        arglist = ['n1', '--watch', '--limit', '1']
+        parsed_args = self.list_vmove.get_parser(
+            'notification vmove list').parse_args(arglist)
+
+        self.assertRaises(exceptions.CommandError,
+                          self.list_vmove.take_action, parsed_args)
@@ -0,0 +1,103 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from oslotest import base
+
+from masakariclient import aio
+
+
+class FakeSegment(object):
+    def __init__(self, name, uuid):
+        self.name = name
+        self.uuid = uuid
+
+
+class TestAsyncHAClient(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestAsyncHAClient, self).setUp()
+        self.proxy = mock.Mock()
+
+    def test_call(self):
+        self.proxy.get_host.return_value = 'host'
+        client = aio.AsyncHAClient(self.proxy)
+
+        result = asyncio.run(client.get_host('host-uuid', segment_id='seg'))
+
+        self.assertEqual('host', result)
+        self.proxy.get_host.assert_called_once_with('host-uuid',
+                                                    segment_id='seg')
+
+    def test_iterate_by_chunks(self):
+        self.proxy.hosts.side_effect = lambda segment, **query: iter(
+            range(5))
+
+        async def _list(client):
+            return [host async for host in client.hosts('seg', limit=2)]
+
+        client = aio.AsyncHAClient(self.proxy, chunk_size=2)
+        self.assertEqual([0, 1, 2, 3, 4], asyncio.run(_list(client)))
+        self.proxy.hosts.assert_called_once_with('seg', limit=2)
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        counts = {'in_flight': 0, 'max': 0}
+
+        def _get_notification(uuid):
+            with lock:
+                counts['in_flight'] += 1
+                counts['max'] = max(counts['max'], counts['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                counts['in_flight'] -= 1
+            return uuid
+
+        self.proxy.get_notification.side_effect = _get_notification
+        client = aio.AsyncHAClient(self.proxy, concurrency=3)
+
+        results = asyncio.run(client.gather(client.get_notification,
+                                            range(20)))
+
+        self.assertEqual(list(range(20)), results)
+        self.assertLessEqual(counts['max'], 3)
+
+    def test_map(self):
+        def _get_segment(uuid):
+            if uuid == 2:
+                raise ValueError(uuid)
+            return uuid * 2
+
+        self.proxy.get_segment.side_effect = _get_segment
+
+        async def _map(client):
+            return [result async for result in
+                    client.map(client.get_segment, iter(range(4)))]
+
+        client = aio.AsyncHAClient(self.proxy, concurrency=2)
+        results = sorted(asyncio.run(_map(client)), key=lambda r: r[0])
+
+        self.assertEqual([(0, 0), (1, 2), (3, 6)],
+                         [(item, result) for item, result, error in results
+                          if error is None])
+        self.assertIsInstance(results[2][2], ValueError)
+
+    def test_get_uuids_by_name(self):
+        self.proxy.segments.return_value = [FakeSegment('seg', 'seg-uuid')]
+        client = aio.AsyncHAClient(self.proxy)
+
+        self.assertEqual({'seg': 'seg-uuid'},
+                         asyncio.run(client.get_uuids_by_name(['seg'])))
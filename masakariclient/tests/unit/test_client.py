@@ -0,0 +1,111 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+import fixtures
+from oslotest import base
+
+from masakariclient import client
+from masakariclient.common import exception as exc
+
+SEGMENT_ID = 'a1b2c3d4-0000-4000-8000-000000000001'
+
+
+class FakeResource(object):
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class TestHAClient(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestHAClient, self).setUp()
+        self.sleep = self.useFixture(fixtures.MockPatch('time.sleep')).mock
+        self.proxy = mock.Mock(default_microversion='1.1')
+        self.proxy.segments.return_value = [
+            FakeResource(name='segment-1', uuid=SEGMENT_ID)]
+        self.hosts = [FakeResource(name='host-%d' % i, uuid='host-uuid-%d' % i)
+                      for i in range(3)]
+        self.proxy.hosts.return_value = self.hosts
+        self.client = client.HAClient(self.proxy, concurrency=4)
+
+    def test_resolve_hosts(self):
+        self.assertEqual({'host-1': 'host-uuid-1', 'other': 'other'},
+                         self.client.resolve_hosts('segment-1',
+                                                   ['host-1', 'other']))
+        self.proxy.segments.assert_called_once_with()
+        self.proxy.hosts.assert_called_once_with(SEGMENT_ID)
+
+    def test_segments_queries(self):
+        self.client.segments(sort='name:asc', filters=['service_type=COMPUTE'])
+
+        self.proxy.segments.assert_called_once_with(
+            sort_key=['name'], sort_dir=['asc'], service_type='COMPUTE')
+
+    def test_all_hosts(self):
+        self.assertEqual([('segment-1', 'host-0'), ('segment-1', 'host-1'),
+                          ('segment-1', 'host-2')],
+                         [(segment.name, host.name) for segment, host in
+                          self.client.all_hosts()])
+
+    def test_create_segments_drops_is_enabled(self):
+        list(self.client.create_segments(
+            [{'name': 'segment-2', 'is_enabled': False,
+              'description': None}]))
+
+        self.proxy.create_segment.assert_called_once_with(name='segment-2')
+
+    def test_delete_hosts(self):
+        def _delete_host(uuid, segment_id, ignore_missing):
+            if uuid == 'host-uuid-1':
+                raise ValueError(uuid)
+
+        self.proxy.delete_host.side_effect = _delete_host
+
+        results = {host: error for host, _result, error in
+                   self.client.delete_hosts('segment-1',
+                                            ['host-0', 'host-1'])}
+
+        self.assertIsNone(results['host-0'])
+        self.assertIsInstance(results['host-1'], ValueError)
+        self.proxy.delete_host.assert_any_call(
+            'host-uuid-0', segment_id=SEGMENT_ID, ignore_missing=False)
+
+    def test_update_hosts(self):
+        list(self.client.update_hosts(
+            'segment-1', [('host-2', {'on_maintenance': True})]))
+
+        self.proxy.update_host.assert_called_once_with(
+            'host-uuid-2', segment_id=SEGMENT_ID, on_maintenance=True)
+
+    def test_wait_for_notifications(self):
+        statuses = {'n-1': ['running', 'finished'], 'n-2': ['failed']}
+        self.proxy.get_notification.side_effect = (
+            lambda uuid: FakeResource(notification_uuid=uuid,
+                                      status=statuses[uuid].pop(0)))
+
+        result = self.client.wait_for_notifications(['n-1', 'n-2'])
+
+        self.assertEqual({'n-1': 'finished', 'n-2': 'failed'},
+                         {uuid: notification.status
+                          for uuid, notification in result.items()})
+        self.assertEqual(3, self.proxy.get_notification.call_count)
+        self.sleep.assert_called_once_with(5)
+
+    def test_wait_for_notification_timeout(self):
+        self.proxy.get_notification.return_value = FakeResource(
+            status='running')
+
+        self.assertRaises(exc.DeadlineExceeded,
+                          self.client.wait_for_notification, 'n-1',
+                          interval=5, timeout=1)